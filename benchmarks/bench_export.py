@@ -0,0 +1,83 @@
+import os
+import sys
+import json
+import argparse
+import tempfile
+import subprocess
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+# Each export runs in its own interpreter so peak RSS is per format
+PROBE = r"""
+import sys, time, json, resource
+sys.path.insert(0, sys.argv[1])
+from tts_audio import export_audio
+started = time.perf_counter()
+export_audio(sys.argv[2], sys.argv[3], sample_rate=int(sys.argv[4]) or None)
+seconds = time.perf_counter() - started
+try:
+    # ru_maxrss can carry over the parent's peak across fork and exec
+    with open("/proc/self/status") as f:
+        peak_kb = next(int(line.split()[1]) for line in f if line.startswith("VmHWM:"))
+except (OSError, StopIteration):
+    peak_kb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+print(json.dumps({
+    "seconds": seconds,
+    "peak_rss_mb": peak_kb / 1024,
+}))
+"""
+
+
+def make_track(path, minutes):
+    # Encode ten seconds of speech-band audio once and repeat its frames,
+    # which gives a gTTS-like 24 kHz mono MP3 of any length in seconds
+    import numpy as np
+    import soundfile as sf
+    from tts_mp3 import merge_mp3
+
+    rate = 24000
+    t = np.arange(rate * 10) / rate
+    tone = 0.2 * np.sin(2 * np.pi * 220 * t) * (1 + np.sin(2 * np.pi * 3 * t)) / 2
+    seed = path + ".seed.mp3"
+    sf.write(seed, tone.astype("float32"), rate, format="MP3")
+    with open(seed, "rb") as f:
+        data = f.read()
+    os.remove(seed)
+    merge_mp3([data] * (minutes * 6), path)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark exporting a long track to every format.")
+    parser.add_argument("--minutes", type=int, default=60)
+    parser.add_argument("--sample-rate", type=int, default=44100)
+    parser.add_argument("--json", help="write results to this file")
+    args = parser.parse_args()
+
+    results = {"minutes": args.minutes, "formats": {}}
+    with tempfile.TemporaryDirectory() as tmp:
+        source = os.path.join(tmp, "track.mp3")
+        make_track(source, args.minutes)
+        results["source_mb"] = os.path.getsize(source) / 1024 / 1024
+        print(f"source: {args.minutes} min, {results['source_mb']:.1f} MB")
+        for fmt in ("mp3", "wav", "ogg", "flac"):
+            target = os.path.join(tmp, "out." + fmt)
+            # mp3 without resampling takes the plain copy path
+            rate = 0 if fmt == "mp3" else args.sample_rate
+            output = subprocess.run(
+                [sys.executable, "-c", PROBE, ROOT, source, target, str(rate)],
+                capture_output=True, text=True, check=True
+            ).stdout
+            result = json.loads(output.strip().splitlines()[-1])
+            result["output_mb"] = os.path.getsize(target) / 1024 / 1024
+            results["formats"][fmt] = result
+            os.remove(target)
+            print(f"{fmt:5} {result['seconds']:8.2f} s  peak RSS {result['peak_rss_mb']:7.1f} MB  "
+                  f"output {result['output_mb']:8.1f} MB")
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+import os
+import sys
+import json
+import time
+import argparse
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from bench_http import StandIn
+from tts_http import HTTPClient
+from tts_governor import RateGovernor
+from tts_metrics import Metrics
+from tts_providers import GTTSProvider
+from tts_engine import SynthesisPool
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Check that the rate governor settles near the limit of a throttling stand-in server."
+    )
+    parser.add_argument("--requests", type=int, default=600, help="segments to synthesize")
+    parser.add_argument("--max-rate", type=float, default=50, help="requests per second the stand-in serves")
+    parser.add_argument("--retry-after", type=float, help="Retry-After the stand-in sends with a 429")
+    parser.add_argument("--latency", type=float, default=0.02, help="server delay per request, seconds")
+    parser.add_argument("--workers", type=int, default=16)
+    parser.add_argument("--min-share", type=float, default=0.7,
+                        help="steady-state throughput required, as a share of --max-rate (default: 0.7)")
+    parser.add_argument("--json", help="write results to this file")
+    args = parser.parse_args()
+
+    server = StandIn(args.latency, max_rate=args.max_rate, retry_after=args.retry_after)
+    base_url = server.start()
+    client = HTTPClient(limit=args.workers)
+    governor = RateGovernor(max_limit=args.workers)
+    provider = GTTSProvider(client=client, base_url=base_url, governor=governor)
+    metrics = Metrics()
+    pool = SynthesisPool(lambda segment: provider.synthesize(segment, "en"), workers=args.workers, metrics=metrics)
+    segments = [f"Sentence number {i} of the governor benchmark." for i in range(args.requests)]
+
+    finished = []
+    started = time.perf_counter()
+    failed = None
+    try:
+        for _ in pool.map(segments, on_done=lambda segment: finished.append(time.perf_counter())):
+            pass
+    except Exception as e:
+        failed = str(e)
+    seconds = time.perf_counter() - started
+    client.close()
+    server.stop()
+
+    # Throughput once the governor had time to find the limit
+    half = finished[len(finished) // 2:]
+    steady = (len(half) - 1) / (half[-1] - half[0]) if len(half) > 1 and half[-1] > half[0] else 0.0
+    host = next(iter(governor.snapshot().values()), {})
+    counters = metrics.snapshot()["counters"]
+    results = {
+        "requests": server.requests,
+        "served": len(finished),
+        "throttled": server.throttled,
+        "retries": counters["retries"],
+        "seconds": seconds,
+        "steady_rate": steady,
+        "max_rate": args.max_rate,
+        "governor": host,
+        "failed": failed,
+    }
+    print(f"{len(finished)} segments in {seconds:.2f} s, steady {steady:.1f}/s of {args.max_rate:g}/s allowed, "
+          f"{server.throttled} throttled ({server.throttled / max(1, server.requests):.0%} of requests)")
+    print(f"governor: limit {host.get('limit')}, rate {host.get('rate')}/s, latency {host.get('latency')} s")
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
+    if failed:
+        print(f"FAIL: conversion failed: {failed}", file=sys.stderr)
+        return 1
+    if steady < args.min_share * args.max_rate:
+        print(f"FAIL: steady throughput below {args.min_share:.0%} of the allowed rate", file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
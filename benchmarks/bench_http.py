@@ -0,0 +1,142 @@
+import os
+import sys
+import json
+import time
+import base64
+import asyncio
+import argparse
+import threading
+from collections import deque
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from tts_http import HTTPClient
+from tts_providers import GTTSProvider, StubProvider
+from tts_engine import SynthesisPool
+from tts_segmenter import segment_text
+
+SAMPLE = (
+    "The quick brown fox jumps over the lazy dog, while the patient narrator keeps reading aloud. "
+    "Long documents are split into short segments, and every segment is one request. "
+)
+
+
+# Local stand-in for the batchexecute endpoint. Answers like Google does
+# (chunked, keep-alive) with silent MP3 frames and counts the connections
+# it accepts, so connection reuse can be checked without the network.
+# With max_rate it also throttles like Google: requests beyond that many
+# per second get 429, with Retry-After if retry_after is set.
+class StandIn:
+    def __init__(self, latency=0.0, max_rate=None, retry_after=None):
+        self.latency = latency
+        self.max_rate = max_rate
+        self.retry_after = retry_after
+        self.connections = 0
+        self.requests = 0
+        self.throttled = 0
+        self.accepted = deque()
+        self.loop = asyncio.new_event_loop()
+        self.server = None
+
+    def start(self):
+        self.server = self.loop.run_until_complete(asyncio.start_server(self.handle, "127.0.0.1", 0))
+        threading.Thread(target=self.loop.run_forever, daemon=True).start()
+        return f"http://127.0.0.1:{self.server.sockets[0].getsockname()[1]}"
+
+    def stop(self):
+        self.loop.call_soon_threadsafe(self.server.close)
+        self.loop.call_soon_threadsafe(self.loop.stop)
+
+    def payload(self):
+        audio = base64.b64encode(StubProvider().synthesize("x" * 40, "en")).decode("ascii")
+        line = json.dumps([["wrb.fr", "jQ1olc", json.dumps([audio]), None, None, None, "generic"]],
+                          separators=(",", ":"))
+        return f")]}}'\n\n{len(line)}\n{line}\n".encode("utf-8")
+
+    def over_rate(self):
+        # Sliding one-second window of the requests that were served
+        if self.max_rate is None:
+            return False
+        now = time.monotonic()
+        while self.accepted and self.accepted[0] <= now - 1.0:
+            self.accepted.popleft()
+        if len(self.accepted) >= self.max_rate:
+            return True
+        self.accepted.append(now)
+        return False
+
+    async def handle(self, reader, writer):
+        self.connections += 1
+        try:
+            while True:
+                head = await reader.readuntil(b"\r\n\r\n")
+                length = 0
+                for line in head.split(b"\r\n"):
+                    if line.lower().startswith(b"content-length:"):
+                        length = int(line.split(b":")[1])
+                await reader.readexactly(length)
+                self.requests += 1
+                if self.latency:
+                    await asyncio.sleep(self.latency)
+                if self.over_rate():
+                    self.throttled += 1
+                    retry = f"Retry-After: {self.retry_after}\r\n" if self.retry_after is not None else ""
+                    writer.write(f"HTTP/1.1 429 Too Many Requests\r\n{retry}Content-Length: 0\r\n\r\n".encode())
+                    await writer.drain()
+                    continue
+                body = self.payload()
+                writer.write(b"HTTP/1.1 200 OK\r\nContent-Type: application/json\r\n"
+                             b"Transfer-Encoding: chunked\r\n\r\n"
+                             + b"%x\r\n" % len(body) + body + b"\r\n0\r\n\r\n")
+                await writer.drain()
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            writer.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Check HTTP connection reuse against a local stand-in server.")
+    parser.add_argument("--chars", type=int, default=20000, help="text length to synthesize")
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--latency", type=float, default=0.005, help="server delay per request, seconds")
+    parser.add_argument("--json", help="write results to this file")
+    args = parser.parse_args()
+
+    text = (SAMPLE * (args.chars // len(SAMPLE) + 1))[:args.chars]
+    segments = [segment.text for segment in segment_text(text)]
+    server = StandIn(args.latency)
+    base_url = server.start()
+    client = HTTPClient(limit=args.workers)
+    provider = GTTSProvider(client=client, base_url=base_url)
+    pool = SynthesisPool(lambda segment: provider.synthesize(segment, "en"), workers=args.workers)
+
+    started = time.perf_counter()
+    audio = sum(len(data) for data in pool.map(segments))
+    seconds = time.perf_counter() - started
+    client.close()
+    server.stop()
+
+    results = {
+        "segments": len(segments),
+        "requests": server.requests,
+        "connections": server.connections,
+        "workers": args.workers,
+        "seconds": seconds,
+        "audio_bytes": audio,
+    }
+    print(f"{results['requests']} requests over {results['connections']} connections "
+          f"({args.workers} workers) in {seconds:.2f} s")
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
+    # Each connection must carry many requests, not one handshake per request
+    if server.connections > args.workers:
+        print(f"FAIL: expected at most {args.workers} connections", file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,73 @@
+import os
+import sys
+import time
+import argparse
+import tempfile
+import tracemalloc
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from tts_peaks import PeakBuilder, PeakFile
+
+RATE = 24000
+BLOCK = 65536
+WIDTH = 1200
+
+
+def build(path, hours):
+    # Speech-like bursts with pauses, fed block by block as an export would
+    rng = np.random.default_rng(0)
+    builder = PeakBuilder()
+    total = int(hours * 3600 * RATE)
+    started = time.perf_counter()
+    for pos in range(0, total, BLOCK):
+        block = rng.uniform(-0.6, 0.6, min(BLOCK, total - pos)).astype(np.float32)
+        if (pos // BLOCK) % 5 == 4:
+            block[:] = 0
+        builder.add(block[:, None], RATE)
+    builder.save(path)
+    return time.perf_counter() - started
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Time building, opening and zooming a waveform peak pyramid.")
+    parser.add_argument("--hours", type=float, default=3.0, help="audio length")
+    parser.add_argument("--max-ms", type=float, default=50.0, help="slowest open or view allowed")
+    args = parser.parse_args()
+
+    fd, path = tempfile.mkstemp(suffix=".peaks")
+    os.close(fd)
+    try:
+        seconds = build(path, args.hours)
+        print(f"built {args.hours:g} h in {seconds:.2f} s, sidecar {os.path.getsize(path) / 1024 / 1024:.2f} MB")
+
+        tracemalloc.start()
+        started = time.perf_counter()
+        peaks = PeakFile(path)
+        opened = (time.perf_counter() - started) * 1000
+        views = []
+        span = peaks.duration
+        # Whole file down to a second, each at a few places
+        while span >= 1:
+            for start in np.linspace(0, peaks.duration - span, 5):
+                started = time.perf_counter()
+                peaks.view(start, start + span, WIDTH)
+                views.append((time.perf_counter() - started) * 1000)
+            span /= 4
+        peak_memory = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+        print(f"open {opened:.2f} ms, {len(views)} views: median {np.median(views):.3f} ms, "
+              f"max {max(views):.3f} ms, peak allocations {peak_memory / 1024:.0f} KB")
+        del peaks
+    finally:
+        os.remove(path)
+    if max(opened, max(views)) > args.max_ms:
+        print(f"FAIL: slower than {args.max_ms:g} ms", file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
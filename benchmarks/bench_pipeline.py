@@ -0,0 +1,167 @@
+import os
+import sys
+import json
+import random
+import argparse
+import tempfile
+import subprocess
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+DEFAULT_SIZES = "1K,10K,100K,1M,10M"
+WORDS = ("the quick brown fox jumps over a lazy dog while our narrator keeps reading "
+         "long chapters aloud to anyone who listens patiently").split()
+
+# (result key, True if larger is better)
+COMPARED = (
+    ("chars_per_sec", True),
+    ("first_audio", False),
+    ("merge_seconds", False),
+    ("export_seconds", False),
+    ("peak_rss_mb", False),
+)
+
+# Each size runs in its own interpreter so peak RSS is per size
+PROBE = r"""
+import sys, time, json, resource
+root, source, target, config = sys.argv[1], sys.argv[2], sys.argv[3], json.loads(sys.argv[4])
+sys.path.insert(0, root)
+from tts_engine import Conversion
+from tts_providers import StubProvider
+from tts_text import TextFile
+
+provider = StubProvider(latency=config["latency"], jitter=config["jitter"], failure_rate=config["failure_rate"],
+                        seed=config["seed"], seconds_per_char=config["seconds_per_char"])
+first = {}
+started = time.perf_counter()
+conversion = Conversion(TextFile(source), "en", target, workers=config["workers"], provider=provider)
+conversion.run(on_segment=lambda path: first.setdefault("at", time.perf_counter()))
+seconds = time.perf_counter() - started
+try:
+    # ru_maxrss can carry over the parent's peak across fork and exec
+    with open("/proc/self/status") as f:
+        peak_kb = next(int(line.split()[1]) for line in f if line.startswith("VmHWM:"))
+except (OSError, StopIteration):
+    peak_kb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+stages = conversion.metrics.snapshot()["stages"]
+counters = conversion.metrics.snapshot()["counters"]
+print(json.dumps({
+    "chars": conversion.total_chars,
+    "segments": conversion.segments,
+    "seconds": seconds,
+    "chars_per_sec": conversion.total_chars / seconds,
+    "first_audio": first["at"] - started,
+    "synthesize_p50": stages["synthesize"]["p50"],
+    "synthesize_p95": stages["synthesize"]["p95"],
+    "merge_seconds": stages["merge"]["sum"],
+    "export_seconds": stages.get("export", {}).get("sum", 0.0),
+    "retries": counters["retries"],
+    "peak_rss_mb": peak_kb / 1024,
+}))
+"""
+
+
+def parse_size(text):
+    text = text.strip().upper()
+    scale = {"K": 1000, "M": 1000 * 1000}.get(text[-1:], 1)
+    return int(float(text.rstrip("KM")) * scale)
+
+
+def make_text(path, chars, seed):
+    # Seeded prose with sentence and clause punctuation, written in blocks
+    rng = random.Random(seed)
+    written = 0
+    with open(path, "w", encoding="utf-8") as f:
+        while written < chars:
+            words = [rng.choice(WORDS) for _ in range(rng.randint(6, 30))]
+            if len(words) > 12:
+                words[rng.randint(3, len(words) - 4)] += ","
+            sentence = " ".join(words).capitalize() + rng.choice(".!?") + " "
+            sentence = sentence[:chars - written]
+            f.write(sentence)
+            written += len(sentence)
+
+
+def compare(results, baseline, threshold):
+    # Relative change per metric; worse-than-threshold changes are returned
+    regressions = []
+    for size, result in results.items():
+        old = baseline.get("results", {}).get(size)
+        if not old:
+            continue
+        for key, higher_is_better in COMPARED:
+            before, after = old.get(key), result.get(key)
+            if not before or after is None:
+                continue
+            change = (after - before) / before
+            if (-change if higher_is_better else change) > threshold:
+                regressions.append((size, key, before, after, change))
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Benchmark the conversion pipeline against a deterministic stub engine."
+    )
+    parser.add_argument("--sizes", default=DEFAULT_SIZES, help=f"input sizes in characters (default: {DEFAULT_SIZES})")
+    parser.add_argument("--workers", type=int, default=8)
+    parser.add_argument("--latency", type=float, default=0.005, help="stub latency per request, seconds")
+    parser.add_argument("--jitter", type=float, default=0.002, help="stub latency jitter, +/- seconds")
+    parser.add_argument("--failure-rate", type=float, default=0.0, help="share of stub requests that fail")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--seconds-per-char", type=float, default=0.006,
+                        help="stub audio length per character (smaller keeps big runs small on disk)")
+    parser.add_argument("--format", default="mp3", choices=("mp3", "wav", "ogg", "flac"),
+                        help="output format; anything but mp3 adds the export stage")
+    parser.add_argument("--json", help="write results to this file")
+    parser.add_argument("--baseline", help="results JSON of an earlier run to compare with")
+    parser.add_argument("--threshold", type=float, default=0.2,
+                        help="relative change counted as a regression (default: 0.2)")
+    args = parser.parse_args()
+
+    config = {
+        "workers": args.workers, "latency": args.latency, "jitter": args.jitter,
+        "failure_rate": args.failure_rate, "seed": args.seed, "seconds_per_char": args.seconds_per_char,
+        "format": args.format,
+    }
+    results = {}
+    print(f"{'size':>10} {'segments':>9} {'chars/s':>10} {'first audio':>12} {'merge':>8} {'export':>8} {'RSS':>8}")
+    with tempfile.TemporaryDirectory() as tmp:
+        for size in args.sizes.split(","):
+            chars = parse_size(size)
+            source = os.path.join(tmp, f"input_{chars}.txt")
+            target = os.path.join(tmp, f"output_{chars}.{args.format}")
+            make_text(source, chars, args.seed)
+            output = subprocess.run(
+                [sys.executable, "-c", PROBE, ROOT, source, target, json.dumps(config)],
+                capture_output=True, text=True, check=True
+            ).stdout
+            result = json.loads(output.strip().splitlines()[-1])
+            results[str(chars)] = result
+            for path in (source, target):
+                os.remove(path)
+            print(f"{chars:>10} {result['segments']:>9} {result['chars_per_sec']:>10.0f} "
+                  f"{result['first_audio'] * 1000:>9.1f} ms {result['merge_seconds']:>7.2f}s "
+                  f"{result['export_seconds']:>7.2f}s {result['peak_rss_mb']:>5.0f} MB")
+
+    report = {"config": config, "results": results}
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(report, f, indent=2)
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        if baseline.get("config") != config:
+            print("note: baseline was run with a different configuration")
+        regressions = compare(results, baseline, args.threshold)
+        for size, key, before, after, change in regressions:
+            print(f"REGRESSION {size} chars: {key} {before:.4g} -> {after:.4g} ({change:+.0%})")
+        if regressions:
+            return 1
+        print(f"no regressions beyond {args.threshold:.0%}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,35 @@
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from tts_segmenter import segment_text
+
+SAMPLES = {
+    "en": "The quick brown fox jumps over the lazy dog, again and again. Is it tired? Not yet! ",
+    "fa": "این یک متن آزمایشی است، برای سنجش سرعت. آیا کار می‌کند؟ بله! ",
+    "zh-CN": "这是一个用于测试速度的文本，包含标点符号。它能工作吗？当然！",
+    "ru": "Это тестовый текст, предназначенный для измерения скорости. Работает ли он? Да! ",
+}
+SIZES_MB = (1, 4, 16)
+
+
+def bench(lang, sample, size_mb):
+    text = sample * (size_mb * 1024 * 1024 // len(sample.encode("utf-8")))
+    start = time.perf_counter()
+    first = None
+    count = 0
+    for _ in segment_text(text):
+        if first is None:
+            first = time.perf_counter() - start
+        count += 1
+    elapsed = time.perf_counter() - start
+    print(f"{lang:6} {size_mb:3d} MB  {count:8d} segments  {elapsed:7.3f} s  "
+          f"{size_mb / elapsed:7.1f} MB/s  first segment {first * 1000:.3f} ms")
+
+
+if __name__ == "__main__":
+    for lang, sample in SAMPLES.items():
+        for size_mb in SIZES_MB:
+            bench(lang, sample, size_mb)
@@ -0,0 +1,76 @@
+import os
+import sys
+import json
+import argparse
+import statistics
+import subprocess
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Runs in a fresh interpreter so module caches from earlier runs do not count
+PROBE = r"""
+import sys, time, json
+started = time.perf_counter()
+sys.path.insert(0, sys.argv[1])
+from PyQt6.QtCore import QObject, QEvent, QTimer
+from PyQt6.QtWidgets import QApplication
+import tts_pro
+imported = time.perf_counter()
+app = QApplication(sys.argv[:1])
+painted = {}
+
+class PaintWatch(QObject):
+    def eventFilter(self, obj, event):
+        if event.type() == QEvent.Type.Paint and "at" not in painted:
+            painted["at"] = time.perf_counter()
+            QTimer.singleShot(0, app.quit)
+        return False
+
+window = tts_pro.TTSApp()
+watch = PaintWatch()
+window.installEventFilter(watch)
+window.show()
+QTimer.singleShot(5000, app.quit)
+app.exec()
+first_paint = painted.get("at", time.perf_counter())
+print(json.dumps({
+    "import": imported - started,
+    "first_paint": first_paint - started,
+    "modules": sorted(m for m in ("gtts", "pygame", "requests") if m in sys.modules),
+}))
+"""
+
+
+def run_once():
+    env = dict(os.environ)
+    env.setdefault("QT_QPA_PLATFORM", "offscreen")
+    output = subprocess.run(
+        [sys.executable, "-c", PROBE, ROOT], env=env, capture_output=True, text=True, check=True
+    ).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure GUI import time and time to first paint.")
+    parser.add_argument("-n", "--runs", type=int, default=5)
+    parser.add_argument("--max-import", type=float, default=0.5, help="regression threshold in seconds")
+    parser.add_argument("--max-first-paint", type=float, default=1.5, help="regression threshold in seconds")
+    args = parser.parse_args()
+
+    runs = [run_once() for _ in range(args.runs)]
+    imports = statistics.median(r["import"] for r in runs)
+    first_paint = statistics.median(r["first_paint"] for r in runs)
+    print(f"import         {imports * 1000:8.1f} ms (median of {args.runs})")
+    print(f"first paint    {first_paint * 1000:8.1f} ms")
+    eager = runs[-1]["modules"]
+    if eager:
+        print(f"loaded eagerly: {', '.join(eager)}")
+
+    failed = imports > args.max_import or first_paint > args.max_first_paint
+    if failed:
+        print("REGRESSION: startup exceeded the configured threshold")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,70 @@
+import os
+import sys
+import time
+import json
+import argparse
+import statistics
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+
+def timed(app, action):
+    started = time.perf_counter()
+    action()
+    # Let Qt run the relayout and repaint the switch triggered
+    app.processEvents()
+    return time.perf_counter() - started
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure language and theme switching latency.")
+    parser.add_argument("-n", "--rounds", type=int, default=20)
+    parser.add_argument("--max-language", type=float, default=0.05, help="regression threshold in seconds")
+    parser.add_argument("--max-theme", type=float, default=0.25, help="regression threshold in seconds")
+    parser.add_argument("--json", help="write results to this file")
+    args = parser.parse_args()
+
+    from PyQt6.QtWidgets import QApplication
+    app = QApplication(sys.argv[:1])
+    import tts_pro
+    window = tts_pro.TTSApp()
+    window.show()
+    app.processEvents()
+
+    languages, themes, lookups = [], [], []
+    buttons = window.theme_buttons.buttons()
+    for _ in range(args.rounds):
+        for index in range(window.lang_combo.count()):
+            languages.append(timed(app, lambda: window.lang_combo.setCurrentIndex(index)))
+        for button in buttons:
+            button.setChecked(True)
+            themes.append(timed(app, lambda: window.apply_theme_by_button(button)))
+        started = time.perf_counter()
+        for text in tts_pro.TRANSLATIONS["en"]:
+            window.tr(text)
+        lookups.append((time.perf_counter() - started) / len(tts_pro.TRANSLATIONS["en"]))
+
+    results = {
+        "language_switch": statistics.median(languages),
+        "theme_switch": statistics.median(themes),
+        "theme_switch_max": max(themes),
+        "tr_lookup": statistics.median(lookups),
+    }
+    print(f"language switch {results['language_switch'] * 1000:8.2f} ms (median of {len(languages)})")
+    print(f"theme switch    {results['theme_switch'] * 1000:8.2f} ms (median of {len(themes)}, "
+          f"max {results['theme_switch_max'] * 1000:.2f} ms)")
+    print(f"tr() lookup     {results['tr_lookup'] * 1e6:8.2f} us")
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
+
+    failed = results["language_switch"] > args.max_language or results["theme_switch"] > args.max_theme
+    if failed:
+        print("REGRESSION: switching exceeded the configured threshold")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,48 @@
+import numpy as np
+import pytest
+
+from tts_audio import TimeStretch, export_audio
+
+sf = pytest.importorskip("soundfile")
+
+RATE = 24000
+
+
+def sine(seconds, amplitude, frequency=440):
+    t = np.arange(int(seconds * RATE)) / RATE
+    return (amplitude * np.sin(2 * np.pi * frequency * t)).astype(np.float32)
+
+
+def rms(samples):
+    return float(np.sqrt(np.mean(samples.astype(np.float64) ** 2)))
+
+
+@pytest.mark.parametrize("speed", [0.5, 0.75, 1.25, 1.5, 2.0])
+def test_time_stretch_keeps_the_level(speed):
+    source = sine(3, 0.5)[:, None]
+    stretch = TimeStretch(speed, RATE, 1)
+    out = [stretch.process(source[pos:pos + 65536]) for pos in range(0, len(source), 65536)]
+    out = np.concatenate(out + [stretch.flush(1)])[:, 0]
+    assert len(out) == round(len(source) / speed)
+    middle = out[len(out) // 4:3 * len(out) // 4]
+    assert rms(middle) == pytest.approx(rms(source), rel=0.03)
+
+
+def test_normalize_keeps_the_balance_between_passages(tmp_path):
+    source, target = str(tmp_path / "in.wav"), str(tmp_path / "out.wav")
+    sf.write(source, np.concatenate((sine(3, 0.1), sine(3, 0.5))), RATE, subtype="FLOAT")
+    export_audio(source, target, normalize=True, block_frames=4096)
+    out, _ = sf.read(target, dtype="float32")
+    quiet, loud = out[RATE:2 * RATE], out[4 * RATE:5 * RATE]
+    assert np.abs(loud).max() == pytest.approx(0.89, abs=0.01)
+    assert rms(loud) / rms(quiet) == pytest.approx(5, rel=0.02)
+
+
+@pytest.mark.parametrize("options", [{}, {"speed": 1.5}, {"sample_rate": 16000}])
+def test_export_onto_the_source_is_refused(tmp_path, options):
+    source = str(tmp_path / "in.wav")
+    sf.write(source, sine(1, 0.5), RATE, subtype="FLOAT")
+    before = open(source, "rb").read()
+    with pytest.raises(ValueError):
+        export_audio(source, source, **options)
+    assert open(source, "rb").read() == before
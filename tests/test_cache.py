@@ -0,0 +1,43 @@
+from tts_cache import SegmentCache
+from tts_engine import Conversion
+from tts_providers import StubProvider
+
+TEXT = ("It was the best of times, it was the worst of times. It was the age of wisdom, "
+        "it was the age of foolishness.\n\nIt was the epoch of belief; it was the epoch of incredulity.")
+
+
+class CountingProvider(StubProvider):
+    def __init__(self):
+        super().__init__()
+        self.synthesized = 0
+
+    def synthesize(self, text, lang, tld="com", cancelled=None):
+        with self.lock:
+            self.synthesized += 1
+        return super().synthesize(text, lang, tld, cancelled)
+
+
+def test_second_conversion_is_served_from_cache(tmp_path):
+    cache = SegmentCache(directory=str(tmp_path / "cache"))
+    provider = CountingProvider()
+    # Different outputs, so nothing is reused from the first one
+    Conversion(TEXT, "en", str(tmp_path / "first.mp3"), cache=cache, provider=provider).run()
+    first = provider.synthesized
+    assert first > 1
+
+    provider.synthesized = 0
+    conversion = Conversion(TEXT, "en", str(tmp_path / "second.mp3"), cache=cache, provider=provider)
+    conversion.run()
+    assert provider.synthesized == 0
+    assert conversion.metrics.snapshot()["counters"]["cache_hits"] == first
+    assert (tmp_path / "first.mp3").read_bytes() == (tmp_path / "second.mp3").read_bytes()
+
+
+def test_cache_survives_reopening(tmp_path):
+    directory = str(tmp_path / "cache")
+    Conversion(TEXT, "en", str(tmp_path / "first.mp3"), cache=SegmentCache(directory=directory),
+               provider=CountingProvider()).run()
+    provider = CountingProvider()
+    Conversion(TEXT, "en", str(tmp_path / "second.mp3"), cache=SegmentCache(directory=directory),
+               provider=provider).run()
+    assert provider.synthesized == 0
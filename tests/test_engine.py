@@ -0,0 +1,134 @@
+import os
+import time
+import threading
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from tts_engine import Conversion, ConversionCancelled, SynthesisExecutor, SynthesisPool
+from tts_metrics import Metrics
+from tts_providers import StubProvider
+
+TEXT = " ".join(f"Sentence {i} of the document." for i in range(300))
+
+
+class ConcurrencyProvider(StubProvider):
+    def __init__(self, latency):
+        super().__init__(latency=latency)
+        self.active = 0
+        self.most = 0
+
+    def synthesize(self, text, lang, tld="com", cancelled=None):
+        with self.lock:
+            self.active += 1
+            self.most = max(self.most, self.active)
+        try:
+            return super().synthesize(text, lang, tld, cancelled)
+        finally:
+            with self.lock:
+                self.active -= 1
+
+
+def test_resizing_the_executor_mid_conversion(tmp_path):
+    executor = SynthesisExecutor(4)
+    provider = ConcurrencyProvider(latency=0.005)
+    conversion = Conversion(TEXT, "en", str(tmp_path / "out.mp3"), provider=provider, executor=executor,
+                            workers=8)
+    resized = threading.Event()
+
+    def on_progress(value):
+        if value > 30 and not resized.is_set():
+            resized.set()
+            executor.resize(1)
+            provider.most = 0
+
+    try:
+        conversion.run(on_progress)
+    finally:
+        executor.shutdown()
+    assert resized.is_set()
+    assert os.path.getsize(tmp_path / "out.mp3") > 0
+    # Calls already running when it shrank could still overlap
+    assert provider.most <= 4
+
+
+class CountingExecutor(ThreadPoolExecutor):
+    def __init__(self, workers):
+        super().__init__(max_workers=workers)
+        self.submitted = 0
+
+    def submit(self, fn, *args):
+        self.submitted += 1
+        return super().submit(fn, *args)
+
+
+def test_pool_returns_results_in_input_order():
+    chunks = list(range(12))
+    finished = []
+
+    def synthesize(chunk):
+        # Later chunks are faster, so they finish first
+        time.sleep(0.002 * (len(chunks) - chunk))
+        finished.append(chunk)
+        return f"audio {chunk}"
+
+    pool = SynthesisPool(synthesize, workers=4)
+    assert list(pool.map(chunks)) == [f"audio {chunk}" for chunk in chunks]
+    assert finished != chunks
+
+
+def test_pool_retries_within_the_budget():
+    calls = Counter()
+    failures = {"a": 0, "b": 2, "c": 10}
+
+    def synthesize(chunk):
+        calls[chunk] += 1
+        if calls[chunk] <= failures[chunk]:
+            raise OSError("flaky")
+        return chunk
+
+    metrics = Metrics()
+    pool = SynthesisPool(synthesize, workers=1, retries=3, backoff=0.001, metrics=metrics)
+    assert list(pool.map(["a", "b"])) == ["a", "b"]
+    assert calls == {"a": 1, "b": 3}
+    with pytest.raises(OSError):
+        list(pool.map(["c"]))
+    # One try and three retries
+    assert calls["c"] == 4
+    assert metrics.snapshot()["counters"]["retries"] == 2 + 3
+
+
+def test_progress_ends_on_the_total_character_count(tmp_path):
+    text = "  First sentence here.   Second one!\n\n\nA new paragraph, wrapped\nacross lines.  " * 20 + "\n\n  "
+    progress = []
+    conversion = Conversion(text, "en", str(tmp_path / "out.mp3"), provider=StubProvider(latency=0.001))
+    conversion.run(progress.append)
+    assert conversion.done_chars == conversion.total_chars == len(text)
+    assert progress == sorted(progress)
+    assert progress[-1] == 100
+
+
+def test_cancel_stops_new_submissions():
+    cancelled = threading.Event()
+    executor = CountingExecutor(2)
+    calls = []
+
+    def synthesize(chunk):
+        calls.append(cancelled.is_set())
+        time.sleep(0.005)
+        return chunk
+
+    def on_done(chunk):
+        if chunk == 5:
+            cancelled.set()
+            executor.submitted_at_cancel = executor.submitted
+
+    pool = SynthesisPool(synthesize, workers=2, executor=executor, cancelled=cancelled)
+    with pytest.raises(ConversionCancelled):
+        list(pool.map(range(1000), on_done))
+    executor.shutdown()
+    assert executor.submitted == executor.submitted_at_cancel
+    # At most the calls already past their cancel check reach the provider
+    assert sum(calls) <= 2
+    assert len(calls) < 20
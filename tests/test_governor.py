@@ -0,0 +1,44 @@
+import time
+import threading
+
+import pytest
+
+from tts_governor import Cancelled, HostGovernor, RateGovernor
+
+
+def cancel_after(seconds):
+    cancelled = threading.Event()
+    threading.Timer(seconds, cancelled.set).start()
+    return cancelled
+
+
+def test_retry_after_wait_ends_on_cancel():
+    governor = HostGovernor("host")
+    governor.release(governor.acquire(), "throttled", retry_after=60)
+    started = time.monotonic()
+    with pytest.raises(Cancelled):
+        governor.acquire(cancel_after(0.2))
+    assert time.monotonic() - started < 1
+    assert governor.active == 0
+
+
+def test_paced_wait_ends_on_cancel():
+    governor = HostGovernor("host")
+    governor.rate = 0.05
+    governor.release(governor.acquire(), "ok")
+    started = time.monotonic()
+    with pytest.raises(Cancelled):
+        governor.acquire(cancel_after(0.2))
+    assert time.monotonic() - started < 1
+    # The cancelled request gave its slot back
+    assert governor.active == 0
+
+
+def test_full_host_wait_ends_on_cancel():
+    governors = RateGovernor(limit=1)
+    with governors.slot("host"):
+        started = time.monotonic()
+        with pytest.raises(Cancelled):
+            with governors.slot("host", cancel_after(0.2)):
+                pass
+        assert time.monotonic() - started < 1
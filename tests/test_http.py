@@ -0,0 +1,138 @@
+import socket
+import asyncio
+import threading
+import urllib.parse
+import socketserver
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from tts_http import HostPool, open_tunnel, proxy_for
+
+
+class Target(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def do_POST(self):
+        body = self.rfile.read(int(self.headers["Content-Length"]))
+        self.send_response(200)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+class Proxy(socketserver.StreamRequestHandler):
+    tunnels = []
+
+    def handle(self):
+        request = b""
+        while not request.endswith(b"\r\n\r\n"):
+            request += self.rfile.read(1)
+        method, address = request.split()[:2]
+        self.tunnels.append((method, address, b"Proxy-Authorization: Basic dXNlcjpwdw==" in request))
+        host, port = address.decode().rsplit(":", 1)
+        upstream = socket.create_connection((host, int(port)))
+        self.wfile.write(b"HTTP/1.1 200 Connection established\r\n\r\n")
+
+        def pipe(source, sink):
+            try:
+                while data := source.recv(65536):
+                    sink.sendall(data)
+                sink.shutdown(socket.SHUT_WR)
+            except OSError:
+                pass
+
+        threading.Thread(target=pipe, args=(upstream, self.connection), daemon=True).start()
+        pipe(self.connection, upstream)
+
+
+def serve(server):
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server.server_address[1]
+
+
+def test_requests_go_through_a_connect_proxy():
+    Proxy.tunnels = []
+    target = ThreadingHTTPServer(("127.0.0.1", 0), Target)
+    proxy = socketserver.ThreadingTCPServer(("127.0.0.1", 0), Proxy)
+    proxy.daemon_threads = True
+    try:
+        target_port, proxy_port = serve(target), serve(proxy)
+
+        async def fetch():
+            pool = HostPool(f"http://127.0.0.1:{target_port}",
+                            proxy=urllib.parse.urlsplit(f"http://user:pw@127.0.0.1:{proxy_port}"))
+            responses = [await pool.request("POST", "/", f"body {i}".encode()) for i in range(3)]
+            pool.close()
+            return responses, pool.opened
+
+        responses, opened = asyncio.run(fetch())
+        assert [r.body for r in responses] == [b"body 0", b"body 1", b"body 2"]
+        # Kept alive through one tunnel
+        assert opened == 1
+        assert Proxy.tunnels == [(b"CONNECT", f"127.0.0.1:{target_port}".encode(), True)]
+    finally:
+        target.shutdown()
+        proxy.shutdown()
+
+
+def test_https_origins_use_the_system_proxy(monkeypatch):
+    monkeypatch.setenv("https_proxy", "http://proxy.example:3128")
+    monkeypatch.setenv("no_proxy", "localhost")
+    proxy = proxy_for(urllib.parse.urlsplit("https://translate.google.com"))
+    assert (proxy.hostname, proxy.port) == ("proxy.example", 3128)
+    assert proxy_for(urllib.parse.urlsplit("https://localhost:8443")) is None
+    assert proxy_for(urllib.parse.urlsplit("http://127.0.0.1:8000")) is None
+
+
+class Refusing(socketserver.StreamRequestHandler):
+    reply = b"HTTP/1.1 407 Proxy Authentication Required\r\nContent-Length: 0\r\n\r\n"
+
+    def handle(self):
+        while self.rfile.readline() not in (b"\r\n", b""):
+            pass
+        self.wfile.write(self.reply)
+
+
+class Hanging(Refusing):
+    reply = b""
+
+
+@pytest.mark.parametrize("handler, message", [(Refusing, "407"), (Hanging, "closed")])
+def test_refused_connect_fails_the_request(handler, message):
+    proxy = socketserver.ThreadingTCPServer(("127.0.0.1", 0), handler)
+    proxy.daemon_threads = True
+    try:
+        proxy_url = urllib.parse.urlsplit(f"http://127.0.0.1:{serve(proxy)}")
+        with pytest.raises(ConnectionError, match=message):
+            open_tunnel(proxy_url, "translate.google.com", 443)
+
+        async def fetch():
+            pool = HostPool("https://translate.google.com", proxy=proxy_url)
+            try:
+                await pool.request("POST", "/", b"body")
+            finally:
+                pool.close()
+
+        with pytest.raises(ConnectionError, match=message):
+            asyncio.run(fetch())
+    finally:
+        proxy.shutdown()
+
+
+def test_tunnel_without_credentials_sends_no_authorization():
+    target = ThreadingHTTPServer(("127.0.0.1", 0), Target)
+    proxy = socketserver.ThreadingTCPServer(("127.0.0.1", 0), Proxy)
+    proxy.daemon_threads = True
+    Proxy.tunnels = []
+    try:
+        target_port, proxy_port = serve(target), serve(proxy)
+        sock = open_tunnel(urllib.parse.urlsplit(f"http://127.0.0.1:{proxy_port}"), "127.0.0.1", target_port)
+        sock.close()
+        assert Proxy.tunnels == [(b"CONNECT", f"127.0.0.1:{target_port}".encode(), False)]
+    finally:
+        target.shutdown()
+        proxy.shutdown()
@@ -0,0 +1,58 @@
+import pytest
+
+from tts_engine import Conversion
+from tts_index import SegmentIndex, index_path
+from tts_mp3 import parse_header
+from tts_providers import StubProvider
+
+TEXT = " ".join(f"Sentence number {i} is {'quite ' * (i % 7)}long." for i in range(60))
+
+
+def convert(tmp_path, name, **options):
+    output = str(tmp_path / name)
+    conversion = Conversion(TEXT, "en", output, provider=StubProvider(), **options)
+    conversion.run()
+    return output, SegmentIndex.load(index_path(output))
+
+
+def test_index_round_trip(tmp_path):
+    index = SegmentIndex()
+    for i in range(5):
+        index.add(i * 100, 90 + i, 0xFEDCBA9876543210 + i, 4000 * i + 96, 1.5 * i)
+    index.audio_size = 20096
+    index.flags = 0
+    loaded = SegmentIndex.load(index.save(str(tmp_path / "x.idx")))
+    assert [list(values) for values in loaded.arrays()] == [list(values) for values in index.arrays()]
+    assert (loaded.flags, loaded.audio_size) == (0, 20096)
+    assert loaded.at_text(250) == 2
+    assert loaded.at_time(4.6) == 3
+    assert loaded.span(4) == (400, 494)
+
+
+def test_byte_offsets_land_on_frame_syncs(tmp_path):
+    output, index = convert(tmp_path, "out.mp3")
+    with open(output, "rb") as f:
+        data = f.read()
+    assert index.has_byte_offsets()
+    assert index.audio_size == len(data)
+    assert len(index) > 10
+    assert list(index.byte_offsets) == sorted(set(index.byte_offsets))
+    for offset in index.byte_offsets:
+        assert parse_header(data, offset) is not None
+    # Each segment's time is where the frames before it end
+    frame = StubProvider.FRAME_SECONDS
+    for i in range(1, len(index)):
+        frames = (index.byte_offsets[i] - index.byte_offsets[i - 1]) // len(StubProvider.FRAME)
+        assert index.times[i] - index.times[i - 1] == pytest.approx(frames * frame)
+    for i in range(len(index)):
+        start, end = index.span(i)
+        assert TEXT[start:end].startswith("Sentence")
+
+
+def test_export_rescales_times_and_drops_byte_offsets(tmp_path):
+    pytest.importorskip("soundfile")
+    _, merged = convert(tmp_path, "out.mp3")
+    _, exported = convert(tmp_path, "out.wav", speed=2.0)
+    assert not exported.has_byte_offsets()
+    assert list(exported.text_offsets) == list(merged.text_offsets)
+    assert list(exported.times) == pytest.approx([t / 2 for t in merged.times])
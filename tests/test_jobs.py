@@ -0,0 +1,43 @@
+import os
+import threading
+
+from tts_engine import Conversion
+from tts_jobs import JobStore
+from tts_providers import StubProvider
+
+TEXT = " ".join(f"Sentence {i} of the document." for i in range(200))
+
+
+def test_concurrent_identical_jobs_do_not_share_a_checkpoint(tmp_path):
+    store = JobStore(str(tmp_path / "jobs"))
+    first = store.open(TEXT, "en", "com", "stub", "out.mp3")
+    second = store.open(TEXT, "en", "com", "stub", "out.mp3")
+    assert first.directory != second.directory
+    second.write_segment(0, b"audio")
+    first.remove()
+    assert os.path.isdir(second.directory)
+    second.close()
+    assert not os.path.exists(second.directory)
+    first.close()
+    # Once closed, the checkpoint is the one to resume again
+    assert store.open(TEXT, "en", "com", "stub", "out.mp3").directory == first.directory
+
+
+def test_identical_texts_convert_concurrently(tmp_path):
+    store = JobStore(str(tmp_path / "jobs"))
+    errors = []
+
+    def convert(name):
+        try:
+            Conversion(TEXT, "en", str(tmp_path / name), provider=StubProvider(latency=0.001), jobs=store,
+                       memory_budget=0).run()
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=convert, args=(name,)) for name in ("a.mp3", "b.mp3", "c.mp3")]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert not errors
+    assert os.listdir(tmp_path / "jobs") == []
@@ -0,0 +1,65 @@
+import tts_mp3
+from tts_mp3 import merge_mp3, count_frames, parse_header
+from tts_providers import StubProvider
+
+# The stub's silent MPEG-2 layer III frame (32 kbps, 24 kHz, mono) and the
+# same frame at 64 kbps: equal duration, twice the bytes
+FRAME_32 = StubProvider.FRAME
+FRAME_64 = b"\xff\xf3\x84\xc4" + bytes(188)
+XING_AT = 4 + 9
+
+
+def xing_counts(path):
+    with open(path, "rb") as f:
+        data = f.read()
+    assert data[XING_AT:XING_AT + 4] == b"Xing"
+    counts = data[XING_AT + 8:XING_AT + 16]
+    return int.from_bytes(counts[:4], "big"), int.from_bytes(counts[4:], "big"), len(data)
+
+
+def merge_counting(monkeypatch, sources, output):
+    calls = []
+    real = tts_mp3.parse_header
+
+    def counting(*args):
+        calls.append(1)
+        return real(*args)
+
+    monkeypatch.setattr(tts_mp3, "parse_header", counting)
+    merge_mp3(sources, output)
+    return len(calls)
+
+
+def test_merge_work_does_not_grow_with_duration(tmp_path, monkeypatch):
+    short = merge_counting(monkeypatch, [FRAME_32 * 100] * 4, str(tmp_path / "short.mp3"))
+    long = merge_counting(monkeypatch, [FRAME_32 * 10000] * 4, str(tmp_path / "long.mp3"))
+    # Per-frame work would be 100 times more; only the copy grows
+    assert long == short
+    assert (tmp_path / "long.mp3").stat().st_size > 90 * (tmp_path / "short.mp3").stat().st_size
+
+
+def test_merge_bytes_follow_bitrate_not_duration(tmp_path):
+    low, high = str(tmp_path / "low.mp3"), str(tmp_path / "high.mp3")
+    written_low = merge_mp3([FRAME_32 * 500] * 3, low)
+    written_high = merge_mp3([FRAME_64 * 500] * 3, high)
+    frames_low, _, _ = xing_counts(low)
+    frames_high, _, _ = xing_counts(high)
+    # Same audio length, twice the bytes
+    assert frames_low == frames_high == 1500
+    assert written_high - len(FRAME_64) == 2 * (written_low - len(FRAME_32))
+
+
+def test_xing_header_counts_frames_and_bytes(tmp_path):
+    output = str(tmp_path / "mixed.mp3")
+    written = merge_mp3([FRAME_32 * 7, b"", FRAME_64 * 5, FRAME_32 * 3], output)
+    frames, size, file_size = xing_counts(output)
+    assert frames == 15
+    assert size == written == file_size
+    assert file_size == len(FRAME_32) + 10 * len(FRAME_32) + 5 * len(FRAME_64)
+
+
+def test_count_frames_walks_padded_frames():
+    padded = b"\xff\xf3\x46\xc4" + bytes(93)
+    assert parse_header(padded, 0)[0] == 97
+    data = FRAME_32 * 3 + padded + FRAME_32
+    assert count_frames(data, 0, len(data)) == 5
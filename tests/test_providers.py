@@ -0,0 +1,54 @@
+import io
+import sys
+import wave
+
+from tts_providers import EspeakProvider, espeak_voices
+
+VOICES = """Pty Language       Age/Gender VoiceName          File                 Other Languages
+ 5  af              --/M      Afrikaans          gmw/af
+ 2  en-gb           --/M      English_(Great_Britain) gmw/en               (en 2)
+ 2  en-us           --/M      English_(America)  gmw/en-US            (en-r 5)(en 3)
+ 5  ru              --/M      Russian            zle/ru
+"""
+
+# Prints the voice list, or "synthesizes" whatever it read from stdin as
+# a WAV file carrying the text, and fails on options it does not know
+FAKE = f"""#!{sys.executable}
+import sys, io, wave
+args = sys.argv[1:]
+if args == ["--voices"]:
+    print({VOICES!r}, end="")
+    sys.exit()
+if args[:1] != ["-v"] or args[2:] != ["--stdout", "--stdin"]:
+    sys.exit("unknown option")
+buffer = io.BytesIO()
+with wave.open(buffer, "wb") as w:
+    w.setnchannels(1); w.setsampwidth(2); w.setframerate(22050)
+    w.writeframes(sys.stdin.buffer.read())
+sys.stdout.buffer.write(buffer.getvalue())
+"""
+
+
+def fake_espeak(tmp_path, monkeypatch):
+    binary = tmp_path / "espeak-ng"
+    binary.write_text(FAKE)
+    binary.chmod(0o755)
+    monkeypatch.setenv("PATH", str(tmp_path))
+    return str(binary)
+
+
+def test_espeak_languages_include_aliases(tmp_path, monkeypatch):
+    voices = espeak_voices(fake_espeak(tmp_path, monkeypatch))
+    # The lowest number wins; real voice names are never replaced
+    assert voices["en"] == "English_(Great_Britain)"
+    assert voices["en-r"] == "English_(America)"
+    assert voices["en-us"] == "English_(America)"
+    assert "ru" in voices
+
+
+def test_espeak_text_goes_to_stdin(tmp_path, monkeypatch):
+    fake_espeak(tmp_path, monkeypatch)
+    text = "-5 degrees outside, --stdout is not an option here"
+    data = EspeakProvider().synthesize(text, "en")
+    with wave.open(io.BytesIO(data)) as w:
+        assert w.readframes(w.getnframes()) == text.encode("utf-8")
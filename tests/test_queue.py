@@ -0,0 +1,95 @@
+import os
+import time
+
+import pytest
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+QtCore = pytest.importorskip("PyQt6.QtCore")
+
+from tts_jobs import JobStore
+from tts_providers import StubProvider
+
+tts_pro = pytest.importorskip("tts_pro")
+
+TEXT = " ".join(f"Sentence {i} of the document." for i in range(300))
+
+
+@pytest.fixture(scope="module")
+def app():
+    return QtCore.QCoreApplication.instance() or QtCore.QCoreApplication([])
+
+
+def wait_for(app, condition, timeout=20):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, "timed out"
+        app.processEvents()
+        time.sleep(0.002)
+
+
+class Recorder:
+    def __init__(self, tmp_path, latency=0.0, jobs=None):
+        self.tmp_path = tmp_path
+        self.latency = latency
+        self.jobs = jobs
+        self.started = []
+        self.queue = None
+        self.most_running = 0
+
+    def make_thread(self, job):
+        self.started.append(job.name)
+        return tts_pro.TTSThread(job.text, job.lang, job.output_file, provider=StubProvider(latency=self.latency),
+                                 jobs=self.jobs, workers=2)
+
+    def job_changed(self, job):
+        self.most_running = max(self.most_running, len(self.queue.running()))
+
+    def make_queue(self, max_running):
+        self.queue = tts_pro.ConversionQueue(self.make_thread, max_running)
+        self.queue.job_changed.connect(self.job_changed)
+        return self.queue
+
+    def add(self, name, priority, text="A short job."):
+        return self.queue.add(name, text, "en", "com", str(self.tmp_path / f"{name}.mp3"), priority)
+
+
+def test_queue_runs_by_priority_within_the_limit(app, tmp_path):
+    recorder = Recorder(tmp_path, latency=0.002)
+    queue = recorder.make_queue(max_running=0)
+    for name, priority in [("low", 2), ("normal", 1), ("high", 0), ("normal2", 1), ("high2", 0)]:
+        recorder.add(name, priority, TEXT[:400])
+    queue.set_max_running(2)
+    wait_for(app, lambda: all(job.status == "Done" for job in queue.jobs))
+    assert recorder.started == ["high", "high2", "normal", "normal2", "low"]
+    assert recorder.most_running == 2
+    assert all(os.path.exists(job.output_file) for job in queue.jobs)
+    for job in queue.jobs:
+        job.thread.wait()
+
+
+def test_pause_and_resume(app, tmp_path):
+    recorder = Recorder(tmp_path, latency=0.003, jobs=JobStore(str(tmp_path / "jobs")))
+    queue = recorder.make_queue(max_running=1)
+    running = recorder.add("long", 1, TEXT)
+    waiting = recorder.add("waiting", 1)
+    # A queued job is held back without starting
+    queue.pause(waiting)
+    assert waiting.status == "Paused"
+
+    wait_for(app, lambda: running.progress >= 20)
+    queue.pause(running)
+    wait_for(app, lambda: running.status == "Paused")
+    assert recorder.started == ["long"]
+    queue.resume(running)
+    wait_for(app, lambda: running.status == "Done")
+    # The second run went on from the checkpoint
+    assert running.thread.conversion.resumed > 0
+    assert recorder.started == ["long", "long"]
+
+    queue.resume(waiting)
+    wait_for(app, lambda: waiting.status == "Done")
+    queue.clear_finished()
+    assert queue.jobs == []
+    for thread in queue.retired:
+        thread.wait()
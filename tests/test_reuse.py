@@ -0,0 +1,69 @@
+import struct
+
+import pytest
+
+from tts_engine import Conversion
+from tts_index import index_path
+from tts_providers import StubProvider
+
+PARAGRAPHS = [f"Paragraph {i} tells the quick story of item {i}." for i in range(20)]
+TEXT = "\n\n".join(PARAGRAPHS)
+EDITED = TEXT.replace("the quick story of item 7", "the slow story of item 7")
+
+
+class CountingProvider(StubProvider):
+    def __init__(self):
+        super().__init__()
+        self.synthesized = 0
+
+    def synthesize(self, text, lang, tld="com", cancelled=None):
+        with self.lock:
+            self.synthesized += 1
+        return super().synthesize(text, lang, tld, cancelled)
+
+
+def convert(text, output_file):
+    provider = CountingProvider()
+    conversion = Conversion(text, "en", str(output_file), provider=provider)
+    conversion.run()
+    return conversion, provider
+
+
+def test_one_word_edit_synthesizes_one_segment(tmp_path):
+    output = tmp_path / "out.mp3"
+    convert(TEXT, output)
+    conversion, provider = convert(EDITED, output)
+    assert provider.synthesized == 1
+    assert conversion.reused == len(PARAGRAPHS) - 1
+    # Same bytes as converting the edited text from scratch
+    clean, _ = convert(EDITED, tmp_path / "clean.mp3")
+    assert clean.reused == 0
+    assert output.read_bytes() == (tmp_path / "clean.mp3").read_bytes()
+
+
+def write_v1_index(output, count=len(PARAGRAPHS)):
+    # The first format: no key hashes or audio size to reuse anything by
+    with open(index_path(str(output)), "wb") as f:
+        f.write(struct.pack("<8sQI", b"TTSIDX1\0", count, 1))
+        f.write(bytes((8 + 4 + 8 + 8) * count))
+
+
+def write_short_v1_index(output):
+    write_v1_index(output, count=0)
+
+
+def append_to_output(output):
+    with open(output, "ab") as f:
+        f.write(StubProvider.FRAME)
+
+
+@pytest.mark.parametrize("spoil", [write_v1_index, write_short_v1_index, append_to_output])
+def test_unusable_index_is_ignored(tmp_path, spoil):
+    output = tmp_path / "out.mp3"
+    convert(TEXT, output)
+    spoil(output)
+    conversion, provider = convert(EDITED, output)
+    assert conversion.reused == 0
+    assert provider.synthesized == len(PARAGRAPHS)
+    convert(EDITED, tmp_path / "clean.mp3")
+    assert output.read_bytes() == (tmp_path / "clean.mp3").read_bytes()
@@ -0,0 +1,83 @@
+import random
+
+import pytest
+
+from tts_segmenter import iter_segments, segment_text
+
+
+def blocks(text, size):
+    return [text[pos:pos + size] for pos in range(0, len(text), size)]
+
+
+def random_text(seed, pieces):
+    rng = random.Random(seed)
+    words = ["a", "b", " ", " ", "\n", ".", ",", "。", "word ", "x" * 30, "y" * 130, "\n\n", "  \n"]
+    return "".join(rng.choice(words) for _ in range(pieces))
+
+
+BLOCK_TEXTS = [
+    "\n\n\n" + "b" * 70 + "a" * 60 + " ",
+    "First line\nwrapped here.\n\n  \nSecond paragraph, with a clause; and more.",
+] + [random_text(seed, 120) for seed in range(20)]
+
+
+@pytest.mark.parametrize("size", [1, 2, 3, 7, 64, 4096])
+@pytest.mark.parametrize("text", BLOCK_TEXTS)
+def test_block_size_does_not_change_segments(text, size):
+    assert list(iter_segments(blocks(text, size))) == list(segment_text(text))
+
+
+LANGUAGE_TEXTS = {
+    "en": "The first sentence is here. The second one asks a question? " * 6,
+    "fa": "این جمله اول است. آیا این جمله دوم است؟ " * 8,
+    "zh-CN": "这是第一句话。这是第二句话，还有一个从句！" * 8,
+    "ru": "Это первое предложение. Это второе, с запятой! " * 6,
+}
+
+
+@pytest.mark.parametrize("lang", sorted(LANGUAGE_TEXTS))
+def test_segments_end_at_punctuation(lang):
+    text = LANGUAGE_TEXTS[lang]
+    segments = list(segment_text(text))
+    assert len(segments) > 1
+    for segment in segments:
+        assert len(segment.text) <= 100
+        assert segment.text[-1] in ".?!。！，؟,"
+
+
+def test_no_segment_is_over_the_limit():
+    text = "Short. " * 50 + "A clause, another clause; and a colon: then more words here. " * 20
+    assert all(len(segment.text) <= 100 for segment in segment_text(text))
+    assert all(len(segment.text) <= 30 for segment in segment_text(text, limit=30))
+
+
+def test_unpunctuated_text_splits_at_whitespace():
+    words = ["word%03d" % i for i in range(60)]
+    segments = list(segment_text(" ".join(words)))
+    assert all(len(segment.text) <= 100 for segment in segments)
+    # No word is cut, none lost
+    assert " ".join(segment.text for segment in segments).split() == words
+
+
+def test_words_over_the_limit_are_hard_cut():
+    text = "x" * 250 + " short tail"
+    segments = [segment.text for segment in segment_text(text)]
+    assert segments[:2] == ["x" * 100, "x" * 100]
+    assert "".join(segments).replace(" ", "") == text.replace(" ", "")
+    assert all(len(segment) <= 100 for segment in segments)
+
+
+@pytest.mark.parametrize("text", [
+    "  Leading spaces. Then a sentence, and a clause!\n\nNew paragraph\nwrapped across lines.  ",
+    LANGUAGE_TEXTS["fa"] + "\n\n" + LANGUAGE_TEXTS["zh-CN"],
+    "word " * 80 + "y" * 150,
+])
+def test_offsets_point_back_into_the_text(text):
+    for segment in segment_text(text):
+        # Line breaks are sent as spaces, nothing else changes
+        assert text[segment.offset:segment.offset + len(segment.text)].replace("\n", " ") == segment.text
+
+
+def test_punctuation_only_runs_are_dropped():
+    assert [segment.text for segment in segment_text("Hello... !!! ?? World.")] == ["Hello... !!! ?? World."]
+    assert list(segment_text("... !!! ,,,")) == []
@@ -0,0 +1,140 @@
+import json
+import time
+import socket
+import threading
+import http.client
+
+import pytest
+
+from tts_providers import StubProvider
+from tts_segmenter import segment_text
+from tts_server import SynthesisService, TTSServer
+
+TEXT = " ".join(f"Sentence {i} of the document." for i in range(300))
+
+
+class CountingProvider(StubProvider):
+    def __init__(self, latency):
+        super().__init__(latency=latency)
+        self.synthesized = 0
+
+    def synthesize(self, text, lang, tld="com", cancelled=None):
+        with self.lock:
+            self.synthesized += 1
+        return super().synthesize(text, lang, tld, cancelled)
+
+
+@pytest.fixture
+def serve(tmp_path):
+    started = []
+
+    def start(latency=0.0, **options):
+        provider = CountingProvider(latency)
+        service = SynthesisService(provider=provider, directory=str(tmp_path / "spool"), **options)
+        server = TTSServer(("127.0.0.1", 0), service, quiet=True)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        started.append((server, service))
+        return server.server_address[1], service, provider
+
+    yield start
+    for server, service in started:
+        server.shutdown()
+        server.server_close()
+        service.close()
+
+
+def post(port, body):
+    connection = http.client.HTTPConnection("127.0.0.1", port, timeout=30)
+    connection.request("POST", "/synthesize", json.dumps(body), {"Content-Type": "application/json"})
+    response = connection.getresponse()
+    data = response.read()
+    connection.close()
+    return response, data
+
+
+def wait_for(condition, timeout=20):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, "timed out"
+        time.sleep(0.005)
+
+
+def test_identical_requests_share_one_job(serve):
+    port, service, provider = serve(latency=0.005)
+    results = [None, None]
+
+    def request(i):
+        results[i] = post(port, {"text": TEXT})
+
+    threads = [threading.Thread(target=request, args=(i,)) for i in range(2)]
+    threads[0].start()
+    wait_for(lambda: service.running == 1)
+    threads[1].start()
+    for thread in threads:
+        thread.join()
+    (first, first_body), (second, second_body) = results
+    assert first.status == second.status == 200
+    assert first.getheader("X-Job-Id") == second.getheader("X-Job-Id")
+    assert {first.getheader("X-Coalesced"), second.getheader("X-Coalesced")} == {"0", "1"}
+    assert first_body == second_body and first_body
+    # Synthesized once
+    job = service.job(first.getheader("X-Job-Id"))
+    assert provider.synthesized == job.segments
+
+
+def test_full_queue_gets_503_with_retry_after(serve):
+    port, service, _ = serve(latency=0.05, max_jobs=1, queue_size=1)
+    for waiting, text in enumerate(("Running job. " * 50, "Queued job. " * 50), 1):
+        threading.Thread(target=post, args=(port, {"text": text}), daemon=True).start()
+        wait_for(lambda: service.waiters == waiting)
+    wait_for(lambda: service.running == 1 and service.pending.full())
+    response, data = post(port, {"text": "One too many."})
+    assert response.status == 503
+    assert response.getheader("Retry-After") == "1"
+    assert "full" in json.loads(data)["error"]
+
+
+def test_disconnected_clients_cancel_the_job(serve):
+    port, service, provider = serve(latency=0.02, workers=2)
+    body = json.dumps({"text": TEXT}).encode("utf-8")
+    clients = []
+    for _ in range(2):
+        client = socket.create_connection(("127.0.0.1", port))
+        client.sendall(b"POST /synthesize HTTP/1.1\r\nHost: x\r\nContent-Type: application/json\r\n"
+                       + f"Content-Length: {len(body)}\r\n\r\n".encode("ascii") + body)
+        clients.append(client)
+    wait_for(lambda: service.waiters == 2 and service.running == 1)
+    job = next(iter(service.history.values()))
+    # The job goes on while one client still listens
+    clients[0].close()
+    time.sleep(0.2)
+    assert not job.finished()
+    clients[1].close()
+    wait_for(job.finished)
+    assert job.status == "cancelled"
+    assert provider.synthesized < len(list(segment_text(TEXT)))
+    wait_for(lambda: service.waiters == 0)
+
+
+def test_unknown_tld_is_refused(serve):
+    port, service, provider = serve()
+    response, data = post(port, {"text": "Hello.", "tld": "com@evil.example"})
+    assert response.status == 400
+    assert "tld" in json.loads(data)["error"]
+    assert post(port, {"text": "Hello.", "tld": "co.uk"})[0].status == 200
+    assert provider.synthesized == 1
+
+
+def test_audio_streams_before_the_job_is_done(serve):
+    port, service, _ = serve(latency=0.01, workers=2)
+    connection = http.client.HTTPConnection("127.0.0.1", port, timeout=30)
+    connection.request("POST", "/synthesize", json.dumps({"text": TEXT}), {"Content-Type": "application/json"})
+    response = connection.getresponse()
+    assert response.status == 200
+    first = response.read1(4096)
+    job = service.job(response.getheader("X-Job-Id"))
+    assert first and not job.finished()
+    rest = response.read()
+    connection.close()
+    assert job.status == "done"
+    assert len(first) + len(rest) == job.size
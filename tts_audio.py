@@ -0,0 +1,247 @@
+import io
+import os
+import shutil
+
+import numpy as np
+
+# Container and codec used by soundfile/libsndfile for each export format
+EXPORT_FORMATS = {
+    "mp3": ("MP3", "MPEG_LAYER_III"),
+    "wav": ("WAV", "PCM_16"),
+    "ogg": ("OGG", "VORBIS"),
+    "flac": ("FLAC", "PCM_16"),
+}
+BLOCK_FRAMES = 64 * 1024
+
+
+def load_soundfile():
+    try:
+        import soundfile
+    except ImportError:
+        raise RuntimeError("Audio export needs the soundfile package (pip install soundfile)")
+    return soundfile
+
+
+def encode_mp3(data):
+    # Re-encode a whole (short) segment in another container as MP3
+    sf = load_soundfile()
+    samples, rate = sf.read(io.BytesIO(data), dtype="float32", always_2d=True)
+    buffer = io.BytesIO()
+    sf.write(buffer, samples, rate, format="MP3", subtype="MPEG_LAYER_III")
+    return buffer.getvalue()
+
+
+def format_of(path):
+    return os.path.splitext(path)[1].lstrip(".").lower()
+
+
+# Streaming linear-interpolation resampler. The last input frame of each
+# block is carried over so consecutive blocks join seamlessly.
+class Resampler:
+    def __init__(self, src_rate, dst_rate):
+        self.step = src_rate / dst_rate
+        self.pos = 0.0
+        self.tail = None
+
+    def process(self, block):
+        if self.step == 1:
+            return block
+        if self.tail is not None:
+            block = np.concatenate((self.tail, block))
+        frames = len(block)
+        if frames - 1 <= self.pos:
+            count = 0
+        else:
+            count = int(np.ceil((frames - 1 - self.pos) / self.step))
+        positions = self.pos + np.arange(count) * self.step
+        index = positions.astype(np.int64)
+        frac = (positions - index)[:, None].astype(block.dtype)
+        out = block[index] * (1 - frac) + block[index + 1] * frac
+        self.pos += count * self.step - (frames - 1)
+        self.tail = block[-1:]
+        return out
+
+
+def remix(block, channels):
+    have = block.shape[1]
+    if have == channels:
+        return block
+    if channels == 1:
+        return block.mean(axis=1, keepdims=True)
+    if have == 1:
+        return np.repeat(block, channels, axis=1)
+    return block[:, :channels]
+
+
+def nearest_peak(magnitude):
+    # Index of the closest local maximum along the bins of each frame
+    bins = magnitude.shape[1]
+    padded = np.pad(magnitude, ((0, 0), (1, 1), (0, 0)), constant_values=-1)
+    peak = (magnitude > padded[:, :-2]) & (magnitude >= padded[:, 2:])
+    index = np.arange(bins)[None, :, None]
+    below = np.maximum.accumulate(np.where(peak, index, -bins), axis=1)
+    above = np.minimum.accumulate(np.where(peak, index, 2 * bins)[:, ::-1], axis=1)[:, ::-1]
+    return np.where(index - below <= above - index, below, above)
+
+
+# Pitch-preserving time-stretch with a streaming phase vocoder. Every output
+# frame takes its magnitude from the input at speed * (output position) and
+# advances its phase by the input's own phase change over one hop, so pitch
+# is kept while duration scales by 1 / speed. All frames that fit in the
+# buffered input are transformed at once.
+class TimeStretch:
+    def __init__(self, speed, sample_rate, channels):
+        self.speed = speed
+        self.size = 1 << int(round(np.log2(sample_rate * 0.04)))
+        self.hop = self.size // 4
+        self.window = np.hanning(self.size + 1)[:-1].astype(np.float32)[None, :, None]
+        # Leading zeros let the first real samples get full window overlap
+        self.buffer = np.zeros((self.size - self.hop, channels), np.float32)
+        self.skip = int(round((self.size - self.hop) / speed))
+        self.pos = 0.0
+        self.phase = None
+        self.overlap = np.zeros((self.size - self.hop, channels), np.float32)
+        self.consumed = 0
+        self.produced = 0
+
+    def frames(self, buf, count):
+        step = self.hop * self.speed
+        starts = np.round(self.pos + np.arange(count) * step).astype(np.int64)
+        index = starts[:, None] + np.arange(self.size)
+        current = np.fft.rfft(buf[index] * self.window, axis=1)
+        later = np.fft.rfft(buf[index + self.hop] * self.window, axis=1)
+        angle = np.angle(current)
+        advance = np.angle(later) - angle
+        if self.phase is None:
+            self.phase = angle[0]
+        phases = np.cumsum(advance, axis=0)
+        phases = np.concatenate((np.zeros_like(phases[:1]), phases[:-1])) + self.phase
+        self.phase = np.mod(phases[-1] + advance[-1], 2 * np.pi)
+        magnitude = np.abs(current)
+        peaks = nearest_peak(magnitude)
+        # Identity phase locking: each bin keeps its phase offset from the
+        # nearest spectral peak in the input frame, so the bins of one
+        # partial stay in step and do not cancel out
+        phases = (np.take_along_axis(phases, peaks, axis=1)
+                  + angle - np.take_along_axis(angle, peaks, axis=1))
+        out = np.fft.irfft(magnitude * np.exp(1j * phases), n=self.size, axis=1)
+        # Hann analysis and synthesis windows at 75% overlap sum to 1.5
+        return (out * self.window / 1.5).astype(np.float32)
+
+    def overlap_add(self, frames):
+        count, channels = len(frames), frames.shape[2]
+        out = np.zeros(((count + 3) * self.hop, channels), np.float32)
+        out[:len(self.overlap)] += self.overlap
+        quarters = frames.reshape(count, 4, self.hop, channels)
+        for q in range(4):
+            out[q * self.hop:(q + count) * self.hop] += quarters[:, q].reshape(-1, channels)
+        self.overlap = out[count * self.hop:]
+        return out[:count * self.hop]
+
+    def emit(self, out):
+        if self.skip:
+            dropped = min(self.skip, len(out))
+            out = out[dropped:]
+            self.skip -= dropped
+        self.produced += len(out)
+        return out
+
+    def process(self, block, final=False):
+        if self.speed == 1:
+            return block
+        self.consumed += len(block)
+        buf = np.concatenate((self.buffer, block))
+        if final:
+            buf = np.concatenate((buf, np.zeros((self.size * 2, buf.shape[1]), np.float32)))
+        step = self.hop * self.speed
+        room = len(buf) - self.size - self.hop - self.pos
+        count = int(room // step) + 1 if room >= 0 else 0
+        if count == 0:
+            self.buffer = buf
+            return buf[:0]
+        out = self.overlap_add(self.frames(buf, count))
+        next_pos = self.pos + count * step
+        drop = int(next_pos)
+        self.buffer = buf[drop:]
+        self.pos = next_pos - drop
+        return self.emit(out)
+
+    def flush(self, channels):
+        if self.speed == 1:
+            return np.zeros((0, channels), np.float32)
+        produced = self.produced
+        out = np.concatenate((self.process(np.zeros((0, channels), np.float32), final=True), self.overlap))
+        expected = int(round(self.consumed / self.speed))
+        return out[:max(0, expected - produced)]
+
+
+# Output gain, with optional peak normalization to the source's peak from
+# a first pass over the file. The gain is the same for the whole file, so
+# quiet and loud passages keep their balance.
+class Gain:
+    TARGET_PEAK = 0.89
+    MAX_BOOST = 4.0
+
+    def __init__(self, gain=1.0, peak=None):
+        self.gain = gain
+        if peak:
+            self.gain *= min(self.TARGET_PEAK / peak, self.MAX_BOOST)
+
+    def process(self, block):
+        if self.gain == 1:
+            return block
+        return np.clip(block * self.gain, -1.0, 1.0)
+
+
+def peak_level(sf, source, block_frames=BLOCK_FRAMES):
+    peak = 0.0
+    with sf.SoundFile(source) as src:
+        for block in src.blocks(blocksize=block_frames, dtype="float32", always_2d=True):
+            if len(block):
+                peak = max(peak, float(np.abs(block).max()))
+    return peak
+
+
+def write_block(dst, block, peaks):
+    dst.write(block)
+    if peaks is not None:
+        peaks.add(block, dst.samplerate)
+
+
+def export_audio(source, target, sample_rate=None, channels=None, speed=1.0, gain=1.0, normalize=False,
+                 block_frames=BLOCK_FRAMES, peaks=None):
+    # Decode `source`, apply speed and gain, and re-encode it as the format
+    # implied by `target`'s extension, one block at a time, so memory stays
+    # flat for any length; normalizing decodes the source once more first.
+    # A tts_peaks.PeakBuilder in `peaks` sees every block written; copied
+    # files are not decoded for it.
+    fmt = format_of(target)
+    if fmt not in EXPORT_FORMATS:
+        raise ValueError(f"Unsupported output format: {fmt}")
+    # Opening the target for writing would truncate the source mid-decode
+    if os.path.exists(target) and os.path.samefile(source, target):
+        raise ValueError(f"Cannot export a file onto itself: {target}")
+    processed = speed != 1 or gain != 1 or normalize
+    if not (processed or sample_rate or channels) and fmt == format_of(source):
+        shutil.copyfile(source, target)
+        return target
+
+    sf = load_soundfile()
+    info = sf.info(source)
+    sample_rate = sample_rate or info.samplerate
+    channels = channels or info.channels
+    if not processed and fmt == format_of(source) and (sample_rate, channels) == (info.samplerate, info.channels):
+        shutil.copyfile(source, target)
+        return target
+
+    container, subtype = EXPORT_FORMATS[fmt]
+    stretch = TimeStretch(speed, info.samplerate, channels)
+    level = Gain(gain, peak_level(sf, source, block_frames) if normalize else None)
+    resampler = Resampler(info.samplerate, sample_rate)
+    with sf.SoundFile(source) as src, \
+            sf.SoundFile(target, "w", samplerate=sample_rate, channels=channels,
+                         format=container, subtype=subtype) as dst:
+        for block in src.blocks(blocksize=block_frames, dtype="float32", always_2d=True):
+            write_block(dst, resampler.process(level.process(stretch.process(remix(block, channels)))), peaks)
+        write_block(dst, resampler.process(level.process(stretch.flush(channels))), peaks)
+    return target
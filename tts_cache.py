@@ -0,0 +1,124 @@
+import os
+import hashlib
+import tempfile
+import threading
+import unicodedata
+from collections import OrderedDict
+
+DEFAULT_CACHE_DIR = os.path.join(
+    os.environ.get("XDG_CACHE_HOME") or os.path.expanduser("~/.cache"), "tts_pro", "segments"
+)
+DEFAULT_MAX_BYTES = 512 * 1024 * 1024
+
+
+def normalize_text(text):
+    return " ".join(unicodedata.normalize("NFC", text).split())
+
+
+def segment_key(text, lang, tld, slow=False, engine="gtts"):
+    parts = [normalize_text(text), lang, tld, "slow" if slow else "normal"]
+    # gTTS keys predate other engines and stay as they were
+    if engine != "gtts":
+        parts.append(engine)
+    return hashlib.sha256("\0".join(parts).encode("utf-8")).hexdigest()
+
+
+def write_atomic(path, data):
+    # Write next to the final name and rename, so readers never see a
+    # partial file
+    fd, temp_path = tempfile.mkstemp(suffix=".part", dir=os.path.dirname(path))
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+        os.replace(temp_path, path)
+    except BaseException:
+        try:
+            os.remove(temp_path)
+        except OSError:
+            pass
+        raise
+    return path
+
+
+# Content-addressed store of synthesized segment audio with LRU eviction
+class SegmentCache:
+    def __init__(self, directory=DEFAULT_CACHE_DIR, max_bytes=DEFAULT_MAX_BYTES):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.lock = threading.Lock()
+        self.entries = OrderedDict()
+        self.total_bytes = 0
+        self.load()
+
+    def load(self):
+        os.makedirs(self.directory, exist_ok=True)
+        found = []
+        for sub in os.scandir(self.directory):
+            if not sub.is_dir():
+                continue
+            for entry in os.scandir(sub.path):
+                if entry.name.endswith(".mp3"):
+                    stat = entry.stat()
+                    found.append((stat.st_mtime, entry.name[:-4], stat.st_size))
+        for _, key, size in sorted(found):
+            self.entries[key] = size
+            self.total_bytes += size
+
+    def path(self, key):
+        return os.path.join(self.directory, key[:2], key + ".mp3")
+
+    def get(self, key):
+        with self.lock:
+            if key not in self.entries:
+                self.misses += 1
+                return None
+            self.entries.move_to_end(key)
+            self.hits += 1
+        path = self.path(key)
+        try:
+            # mtime doubles as the LRU order across restarts
+            os.utime(path)
+        except OSError:
+            with self.lock:
+                self.total_bytes -= self.entries.pop(key, 0)
+                self.hits -= 1
+                self.misses += 1
+            return None
+        return path
+
+    def __contains__(self, key):
+        # Unlike get(), not counted as a hit or miss
+        with self.lock:
+            return key in self.entries
+
+    def put(self, key, data):
+        path = self.path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        write_atomic(path, data)
+        with self.lock:
+            self.total_bytes += len(data) - self.entries.pop(key, 0)
+            self.entries[key] = len(data)
+        return path
+
+    def trim(self):
+        # Evict least recently used segments until the cache fits its budget.
+        # Called between conversions so paths handed out stay valid.
+        with self.lock:
+            evicted = []
+            while self.total_bytes > self.max_bytes and self.entries:
+                key, size = self.entries.popitem(last=False)
+                self.total_bytes -= size
+                evicted.append(key)
+        for key in evicted:
+            try:
+                os.remove(self.path(key))
+            except OSError:
+                pass
+        return len(evicted)
+
+    def stats(self):
+        with self.lock:
+            return {"hits": self.hits, "misses": self.misses,
+                    "entries": len(self.entries), "bytes": self.total_bytes}
@@ -0,0 +1,183 @@
+import os
+import sys
+import json
+import time
+import argparse
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+import threading
+
+from tts_engine import Conversion, ConversionCancelled, DEFAULT_WORKERS, MAX_WORKERS, DEFAULT_MEMORY_BUDGET
+from tts_cache import SegmentCache, DEFAULT_CACHE_DIR
+from tts_jobs import JobStore, DEFAULT_JOBS_DIR
+from tts_providers import PROVIDERS, DEFAULT_PROVIDER, GOOGLE_TLDS, get_provider
+from tts_text import TextFile, TEXT_EXTENSIONS
+from tts_metrics import Metrics
+from tts_governor import shared_governor
+
+
+def collect_inputs(paths, output_dir, ext="mp3"):
+    # Yields (source, output_file) pairs; "-" reads standard input
+    for path in paths or ["-"]:
+        if path == "-":
+            yield "-", os.path.join(output_dir, "stdin." + ext)
+        elif os.path.isdir(path):
+            for root, dirs, files in os.walk(path):
+                dirs.sort()
+                for name in sorted(files):
+                    if name.lower().endswith(TEXT_EXTENSIONS):
+                        source = os.path.join(root, name)
+                        relative = os.path.splitext(os.path.relpath(source, path))[0]
+                        yield source, os.path.join(output_dir, relative + "." + ext)
+        else:
+            stem = os.path.splitext(os.path.basename(path))[0]
+            yield path, os.path.join(output_dir, stem + "." + ext)
+
+
+def read_text(source):
+    # Files are streamed from disk during the conversion; stdin is read whole
+    if source == "-":
+        return sys.stdin.read().strip()
+    return TextFile(source)
+
+
+def convert_document(source, output_file, args, cache, jobs, executor, cancelled, metrics=None):
+    started = time.perf_counter()
+    result = {"input": source, "output": output_file}
+    try:
+        text = read_text(source)
+        os.makedirs(os.path.dirname(output_file) or ".", exist_ok=True)
+        conversion = Conversion(text, args.lang, output_file, tld=args.tld, slow=args.slow,
+                                workers=args.workers, cache=cache, provider=args.provider, executor=executor,
+                                speed=args.speed, gain=args.volume, normalize=args.normalize,
+                                sample_rate=args.sample_rate, channels=args.channels, jobs=jobs,
+                                cancelled=cancelled, metrics=metrics,
+                                memory_budget=args.memory_budget * 1024 * 1024, write_index=not args.no_index,
+                                write_peaks=args.peaks)
+        conversion.run()
+        result.update(status="ok", chars=conversion.total_chars, segments=conversion.segments,
+                      resumed=conversion.resumed)
+    except ConversionCancelled:
+        result.update(status="cancelled")
+    except Exception as e:
+        result.update(status="error", error=str(e))
+    result["seconds"] = round(time.perf_counter() - started, 3)
+    return result
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(
+        description="Convert text files to speech without the GUI."
+    )
+    parser.add_argument("inputs", nargs="*", help="text files, directories or - for stdin")
+    parser.add_argument("-d", "--output-dir", default=".", help="directory for the MP3 files")
+    parser.add_argument("-l", "--lang", default="en", help="language code (default: en)")
+    parser.add_argument("-t", "--tld", default="com", choices=GOOGLE_TLDS,
+                        help="accent top-level domain (default: com)")
+    parser.add_argument("-e", "--engine", default=DEFAULT_PROVIDER, choices=sorted(PROVIDERS),
+                        help=f"synthesis engine (default: {DEFAULT_PROVIDER})")
+    parser.add_argument("--slow", action="store_true", help="slow speech")
+    parser.add_argument("--speed", type=float, default=1.0, help="playback speed, 0.5 to 2.0 (default: 1.0)")
+    parser.add_argument("--volume", type=float, default=1.0, help="output gain (default: 1.0)")
+    parser.add_argument("--normalize", action="store_true", help="normalize the output peak level")
+    parser.add_argument("-f", "--format", default="mp3", choices=("mp3", "wav", "ogg", "flac"),
+                        help="output format (default: mp3)")
+    parser.add_argument("--sample-rate", type=int, help="resample the output to this rate")
+    parser.add_argument("--channels", type=int, choices=(1, 2), help="output channel count")
+    parser.add_argument("-w", "--workers", type=int, default=DEFAULT_WORKERS,
+                        help="synthesis requests in flight, shared by all documents")
+    parser.add_argument("-j", "--jobs", type=int, default=2, help="documents converted at once")
+    parser.add_argument("--memory-budget", type=int, default=DEFAULT_MEMORY_BUDGET // (1024 * 1024),
+                        help="MB of synthesized audio per document kept in memory before spilling to "
+                             f"temp files (default: {DEFAULT_MEMORY_BUDGET // (1024 * 1024)})")
+    parser.add_argument("--no-index", action="store_true",
+                        help="do not write the .idx segment index next to each output")
+    parser.add_argument("--peaks", action="store_true",
+                        help="write a .peaks waveform pyramid next to each output (needs NumPy and soundfile)")
+    parser.add_argument("--cache-dir", default=DEFAULT_CACHE_DIR, help="segment cache directory")
+    parser.add_argument("--no-cache", action="store_true", help="disable the segment cache")
+    parser.add_argument("--checkpoint-dir", default=DEFAULT_JOBS_DIR,
+                        help="where unfinished conversions keep their progress")
+    parser.add_argument("--no-checkpoint", action="store_true", help="do not checkpoint or resume")
+    parser.add_argument("--summary", help="write a JSON summary to this file")
+    parser.add_argument("--metrics", help="write per-stage timings and counters as JSON to this file")
+    parser.add_argument("--prometheus", help="write the same metrics in Prometheus text format to this file")
+    return parser
+
+
+def main(argv=None):
+    parser = build_parser()
+    args = parser.parse_args(argv)
+    args.provider = get_provider(args.engine)
+    if not args.provider.available():
+        parser.error(f"engine not available: {args.engine}")
+    if args.lang not in args.provider.languages():
+        parser.error(f"unsupported language for {args.engine}: {args.lang}")
+    if not 0.5 <= args.speed <= 2.0:
+        parser.error("--speed must be between 0.5 and 2.0")
+    args.workers = max(1, min(args.workers, MAX_WORKERS))
+    documents = list(collect_inputs(args.inputs, args.output_dir, args.format))
+    cache = None if args.no_cache else SegmentCache(args.cache_dir)
+    jobs = None if args.no_checkpoint else JobStore(args.checkpoint_dir)
+    if jobs is not None:
+        jobs.prune()
+    cancelled = threading.Event()
+    metrics = Metrics()
+
+    started = time.perf_counter()
+    results = []
+    with ThreadPoolExecutor(max_workers=args.workers) as synth_executor, \
+            ThreadPoolExecutor(max_workers=max(1, args.jobs)) as doc_executor:
+        futures = [
+            doc_executor.submit(convert_document, source, output_file, args, cache, jobs, synth_executor,
+                                cancelled, metrics)
+            for source, output_file in documents
+        ]
+        try:
+            for future in as_completed(futures):
+                result = future.result()
+                results.append(result)
+                if result["status"] == "ok":
+                    resumed = f"  ({result['resumed']} resumed)" if result["resumed"] else ""
+                    print(f"{result['input']} -> {result['output']}  {result['chars']} chars  "
+                          f"{result['segments']} segments  {result['seconds']:.2f} s{resumed}")
+                elif result["status"] == "error":
+                    print(f"{result['input']}: error: {result['error']}", file=sys.stderr)
+        except KeyboardInterrupt:
+            # Finished segments are checkpointed; rerunning the same command resumes
+            print("Interrupted, stopping after the requests in flight...", file=sys.stderr)
+            cancelled.set()
+            for future in futures:
+                future.cancel()
+            results = [f.result() for f in futures if not f.cancelled()]
+    if cache is not None:
+        cache.trim()
+
+    failed = sum(1 for r in results if r["status"] != "ok")
+    summary = {
+        "documents": sorted(results, key=lambda r: r["input"]),
+        "succeeded": len(results) - failed,
+        "failed": failed,
+        "seconds": round(time.perf_counter() - started, 3),
+    }
+    if cache is not None:
+        summary["cache"] = cache.stats()
+    # Concurrency and request rate each provider host settled at
+    governor = shared_governor().snapshot()
+    if governor:
+        summary["governor"] = governor
+    if args.summary:
+        with open(args.summary, "w", encoding="utf-8") as f:
+            json.dump(summary, f, indent=2, ensure_ascii=False)
+    if args.metrics:
+        with open(args.metrics, "w", encoding="utf-8") as f:
+            json.dump(metrics.snapshot(), f, indent=2)
+    if args.prometheus:
+        with open(args.prometheus, "w", encoding="utf-8") as f:
+            f.write(metrics.to_prometheus())
+    print(f"{summary['succeeded']} converted, {failed} failed in {summary['seconds']:.2f} s")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
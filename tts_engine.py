@@ -0,0 +1,469 @@
+import os
+import time
+import tempfile
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+
+from tts_cache import segment_key
+from tts_mp3 import merge_mp3, read_source, remove_files
+from tts_segmenter import iter_segments
+from tts_providers import get_provider, Throttled
+from tts_metrics import Metrics
+from tts_index import SegmentIndex, index_path, key_hash
+
+DEFAULT_WORKERS = 4
+MAX_WORKERS = 16
+MAX_RETRIES = 3
+MAX_THROTTLED = 30
+RETRY_BACKOFF = 0.5
+SLOW_SPEED = 0.75
+DEFAULT_MEMORY_BUDGET = 32 * 1024 * 1024
+
+
+class ConversionCancelled(Exception):
+    pass
+
+
+# Bounded worker pool that synthesizes chunks concurrently and hands the
+# results back in input order. Several pools may share one executor, which
+# then caps the total number of requests in flight.
+class SynthesisPool:
+    def __init__(self, synthesize, workers=DEFAULT_WORKERS, retries=MAX_RETRIES, backoff=RETRY_BACKOFF,
+                 executor=None, cancelled=None, metrics=None):
+        self.synthesize = synthesize
+        self.workers = max(1, min(int(workers), MAX_WORKERS))
+        self.retries = retries
+        self.backoff = backoff
+        self.executor = executor
+        self.cancelled = cancelled or threading.Event()
+        self.metrics = metrics
+
+    def call(self, chunk):
+        attempt = 0
+        throttled = 0
+        while True:
+            if self.cancelled.is_set():
+                raise ConversionCancelled()
+            try:
+                return self.synthesize(chunk)
+            except Throttled:
+                # Slowing down is the governor's job; a throttled request
+                # is only given up on when the provider never lets up
+                if self.metrics is not None:
+                    self.metrics.count("throttled")
+                throttled += 1
+                if throttled > MAX_THROTTLED:
+                    raise
+            except Exception:
+                # Providers stop waiting on a host once cancelled and
+                # raise; that is not a failure to retry
+                if self.cancelled.is_set():
+                    raise ConversionCancelled()
+                if self.metrics is not None:
+                    self.metrics.count("errors")
+                if attempt >= self.retries:
+                    raise
+                if self.metrics is not None:
+                    self.metrics.count("retries")
+                # Backoff doubles as a cancellation point
+                if self.cancelled.wait(self.backoff * 2 ** attempt):
+                    raise ConversionCancelled()
+                attempt += 1
+
+    def map(self, chunks, on_done=None):
+        if self.executor is not None:
+            yield from self.drain(self.executor, chunks, on_done)
+            return
+        with ThreadPoolExecutor(max_workers=self.workers) as executor:
+            yield from self.drain(executor, chunks, on_done)
+
+    def drain(self, executor, chunks, on_done):
+        # Only a couple of chunks per worker are kept in flight, so `chunks`
+        # may be a lazy iterator. on_done(chunk) fires in completion order,
+        # results are yielded in input order.
+        limit = self.workers * 2
+        source = iter(chunks)
+        pending = deque()
+        reported = set()
+        exhausted = False
+        try:
+            while True:
+                if self.cancelled.is_set():
+                    raise ConversionCancelled()
+                while not exhausted and len(pending) < limit:
+                    try:
+                        chunk = next(source)
+                    except StopIteration:
+                        exhausted = True
+                        break
+                    pending.append((chunk, executor.submit(self.call, chunk)))
+                if not pending:
+                    return
+
+                # Requests already sent are left to finish; polling keeps
+                # cancellation responsive while they do
+                wait([future for _, future in pending], timeout=0.2, return_when=FIRST_COMPLETED)
+                for chunk, future in pending:
+                    if future.done() and future not in reported:
+                        reported.add(future)
+                        if on_done and future.exception() is None:
+                            on_done(chunk)
+
+                while pending and pending[0][1] in reported:
+                    chunk, future = pending.popleft()
+                    reported.discard(future)
+                    yield future.result()
+        finally:
+            for _, future in pending:
+                future.cancel()
+
+
+# Executor shared by pools that may be resized while they run: it keeps
+# MAX_WORKERS threads, and at most `size` of them synthesize at once.
+# Calls over the limit wait their turn inside a thread; shrinking lets the
+# calls already running finish.
+class SynthesisExecutor:
+    def __init__(self, size=DEFAULT_WORKERS):
+        self.executor = ThreadPoolExecutor(max_workers=MAX_WORKERS, thread_name_prefix="tts-synth")
+        self.size = size
+        self.running = 0
+        self.cond = threading.Condition()
+
+    def resize(self, size):
+        with self.cond:
+            self.size = size
+            self.cond.notify_all()
+
+    def submit(self, fn, *args):
+        return self.executor.submit(self.run, fn, *args)
+
+    def run(self, fn, *args):
+        with self.cond:
+            while self.running >= self.size:
+                self.cond.wait()
+            self.running += 1
+        try:
+            return fn(*args)
+        finally:
+            with self.cond:
+                self.running -= 1
+                self.cond.notify()
+
+    def shutdown(self, wait=True):
+        self.executor.shutdown(wait=wait)
+
+
+# One text-to-audio conversion: segment, synthesize, merge, then optionally
+# run the DSP/export stage. Shared by the GUI thread and the headless CLI;
+# imports neither PyQt6 nor pygame. `text` is a string or a
+# tts_text.TextFile, which is streamed through segmentation instead of
+# being read into memory.
+class Conversion:
+    def __init__(self, text, lang, output_file, tld="com", slow=False, workers=DEFAULT_WORKERS,
+                 cache=None, provider=None, executor=None, speed=1.0, gain=1.0, normalize=False,
+                 sample_rate=None, channels=None, jobs=None, cancelled=None, metrics=None,
+                 memory_budget=DEFAULT_MEMORY_BUDGET, write_index=True, prefetched=None, write_peaks=False):
+        self.text = text
+        self.lang = lang
+        self.output_file = output_file
+        self.tld = tld
+        self.workers = workers
+        self.cache = cache
+        # Slow speech is a time-stretch of normal-speed audio rather than a
+        # second kind of provider request, so it shares cached segments
+        self.provider = provider or get_provider()
+        self.speed = speed * (SLOW_SPEED if slow else 1.0)
+        self.gain = gain
+        self.normalize = normalize
+        self.sample_rate = sample_rate
+        self.channels = channels
+        self.executor = executor
+        # With a JobStore, finished segments are checkpointed so a cancelled
+        # or crashed conversion resumes where it stopped
+        self.jobs = jobs
+        self.job = None
+        self.cancelled = cancelled or threading.Event()
+        # Several conversions may share one Metrics to report them together
+        self.metrics = metrics or Metrics()
+        self.temp_files = set()
+        self.memory_budget = memory_budget
+        self.buffered = 0
+        self.buffer_lock = threading.Lock()
+        # SegmentIndex of where each segment starts in the text and in the
+        # audio, written next to the output
+        self.write_index = write_index
+        self.write_peaks = write_peaks
+        self.index = None
+        self.previous = None
+        self.previous_spans = {}
+        self.previous_lock = threading.Lock()
+        self.done_chars = 0
+        self.total_chars = 0
+        # Characters each segment in flight stands for, counted from where
+        # the one before it ended, so progress ends on the total
+        self.credits = {}
+        self.tracked = 0
+        self.segments = 0
+        self.resumed = 0
+        self.reused = 0
+        # Keys a tts_prefetch.Prefetcher put in the cache, to count how many
+        # of them the conversion used
+        self.prefetched = prefetched or frozenset()
+        self.prefetch_hits = 0
+        self.prefetch_used = set()
+        self.waited = 0.0
+        self.on_progress = None
+
+    def cancel(self):
+        self.cancelled.set()
+
+    def hold(self, data):
+        # Synthesized audio goes to the merger as bytes; only what would take
+        # the segments waiting to be merged over memory_budget is spilled to
+        # temp files
+        with self.buffer_lock:
+            if self.buffered + len(data) > self.memory_budget:
+                return False
+            self.buffered += len(data)
+            return True
+
+    def release(self, data):
+        with self.buffer_lock:
+            self.buffered -= len(data)
+
+    def load_previous(self):
+        # Converting again over an MP3 output with an index only synthesizes
+        # the segments an edit changed. A merged MP3 is its segments' frames
+        # back to back, so any segment still in the text can be cut out of
+        # it by its index.
+        if self.needs_export() or not os.path.exists(self.output_file):
+            return
+        try:
+            index = SegmentIndex.load(index_path(self.output_file))
+            if not index.has_byte_offsets() or index.audio_size != os.path.getsize(self.output_file):
+                return
+            self.previous = open(self.output_file, "rb")
+        except (OSError, ValueError, EOFError):
+            return
+        self.previous_spans = index.byte_spans()
+
+    def close_previous(self):
+        if self.previous is not None:
+            self.previous.close()
+            self.previous = None
+        self.previous_spans = {}
+
+    def reuse(self, key):
+        span = self.previous_spans.get(key_hash(key))
+        if span is None:
+            return None
+        start, end = span
+        with self.previous_lock:
+            self.previous.seek(start)
+            return self.previous.read(end - start)
+
+    def synthesize(self, item):
+        index, segment, key = item
+        if self.job is not None:
+            path = self.job.completed(index, key)
+            if path:
+                self.resumed += 1
+                self.metrics.count("resumed")
+                return path
+        metrics = self.metrics
+        path = None
+        if self.cache is not None:
+            with metrics.span("cache_read"):
+                path = self.cache.get(key)
+            metrics.count("cache_hits" if path else "cache_misses")
+        if path:
+            if key in self.prefetched:
+                self.prefetch_hits += 1
+                self.prefetch_used.add(key)
+                metrics.count("prefetch_hits")
+            if self.job is not None:
+                self.job.record(index, key, path)
+            return path
+        data = self.reuse(key) if self.previous_spans else None
+        if data is not None:
+            self.reused += 1
+            metrics.count("reused")
+        else:
+            with metrics.span("synthesize"):
+                data = self.provider.synthesize(segment.text, self.lang, self.tld, cancelled=self.cancelled)
+            metrics.count("synthesized")
+            metrics.count("bytes_synthesized", len(data))
+            if self.provider.format != "mp3":
+                # Segments are merged as MP3 frames, whatever the engine emits
+                from tts_audio import encode_mp3
+                with metrics.span("encode"):
+                    data = encode_mp3(data)
+        # The cache and checkpoints need a file; the merger does not, and
+        # takes the bytes as long as they fit the memory budget
+        in_memory = self.hold(data)
+        if self.cache is not None:
+            with metrics.span("write"):
+                path = self.cache.put(key, data)
+        elif self.job is not None:
+            with metrics.span("write"):
+                path = self.job.write_segment(index, data)
+        elif not in_memory:
+            metrics.count("spilled")
+            with metrics.span("write"):
+                temp_fd, path = tempfile.mkstemp(suffix=".mp3")
+                self.temp_files.add(path)
+                with os.fdopen(temp_fd, "wb") as f:
+                    f.write(data)
+        if self.job is not None:
+            self.job.record(index, key, path)
+        return data if in_memory else path
+
+    def segment_done(self, item):
+        self.add_progress(self.credits.pop(item[0]))
+
+    def add_progress(self, chars):
+        self.done_chars += chars
+        if self.on_progress:
+            self.on_progress(min(int(self.done_chars / self.total_chars * 100), 100))
+
+    def open_peaks(self):
+        # With write_peaks, a waveform peak pyramid (tts_peaks) is written
+        # next to the output, built from the audio as it is merged or
+        # exported. It needs NumPy and soundfile, both optional.
+        if not self.write_peaks:
+            return None
+        try:
+            from tts_peaks import PeakBuilder
+            return PeakBuilder()
+        except (ImportError, RuntimeError):
+            return None
+
+    def merge_order(self, segments, on_segment, peaks=None):
+        # Hands segments (bytes or file paths) to the merger as they arrive
+        # in order; buffers and temp files are let go once merged, so
+        # nothing grows with the text length. Time spent waiting here for
+        # the next segment is not merge time. Segments read for `peaks` go
+        # on as bytes, so no file is read twice.
+        segments = iter(segments)
+        while True:
+            started = time.perf_counter()
+            segment = next(segments, None)
+            waited = time.perf_counter() - started
+            self.waited += waited
+            self.metrics.observe("wait", waited)
+            if segment is None:
+                return
+            self.segments += 1
+            self.metrics.count("segments")
+            if on_segment:
+                on_segment(segment)
+            if peaks is not None:
+                data = read_source(segment)
+                with self.metrics.span("peaks"):
+                    peaks.add_mp3(data)
+                yield data
+            else:
+                yield segment
+            if not isinstance(segment, str):
+                self.release(segment)
+            elif segment in self.temp_files:
+                self.temp_files.discard(segment)
+                remove_files((segment,))
+
+    def track(self, segments, spans):
+        # Text spans wait here, in order, for their audio to be merged
+        for index, segment in segments:
+            key = segment_key(segment.text, self.lang, self.tld, engine=self.provider.name)
+            spans.append((segment.offset, len(segment.text), key_hash(key)))
+            end = segment.offset + len(segment.text)
+            self.credits[index] = end - self.tracked
+            self.tracked = end
+            yield index, segment, key
+
+    def needs_export(self):
+        return (self.speed != 1 or self.gain != 1 or self.normalize or self.sample_rate or self.channels
+                or not self.output_file.lower().endswith(".mp3"))
+
+    def run(self, on_progress=None, on_segment=None):
+        with self.metrics.span("total"):
+            return self.run_stages(on_progress, on_segment)
+
+    def run_stages(self, on_progress, on_segment):
+        metrics = self.metrics
+        if isinstance(self.text, str):
+            blocks, self.total_chars = (self.text,), len(self.text)
+        else:
+            with metrics.span("scan"):
+                self.total_chars = self.text.scan()[0]
+            blocks = self.text.blocks()
+        if not self.total_chars:
+            raise ValueError("Text is empty!")
+        self.on_progress = on_progress
+        if self.jobs is not None:
+            self.job = self.jobs.open(self.text, self.lang, self.tld, self.provider.name, self.output_file)
+        try:
+            self.load_previous()
+            # Segments already fit in one provider request, so gTTS does not
+            # re-tokenize them, and synthesis starts on the first one at once
+            pool = SynthesisPool(self.synthesize, workers=self.workers, executor=self.executor,
+                                 cancelled=self.cancelled, metrics=metrics)
+            spans = deque()
+            self.index = SegmentIndex()
+            peaks = self.open_peaks()
+            items = self.track(enumerate(metrics.timed("segment", iter_segments(blocks))), spans)
+            segments = pool.map(items, on_done=self.segment_done)
+
+            # Merge audio files frame-wise while synthesis runs, without
+            # decoding or playing them. The output only replaces an earlier
+            # file once it is complete.
+            merged = self.output_file + ".part.mp3"
+            self.temp_files.add(merged)
+            self.segments = 0
+            self.waited = 0.0
+            started = time.perf_counter()
+            merge_mp3(self.merge_order(segments, on_segment, None if self.needs_export() else peaks), merged,
+                      on_merged=lambda offset, seconds: self.index.add(*spans.popleft(), offset, seconds))
+            metrics.observe("merge", time.perf_counter() - started - self.waited)
+            # Whitespace after the last segment
+            self.add_progress(self.total_chars - self.done_chars)
+            # Windows cannot replace a file that is still open
+            self.close_previous()
+            if not self.needs_export():
+                os.replace(merged, self.output_file)
+                self.index.audio_size = os.path.getsize(self.output_file)
+            else:
+                # NumPy and soundfile are only loaded when the audio is reshaped
+                from tts_audio import export_audio
+                with metrics.span("export"):
+                    export_audio(merged, self.output_file, sample_rate=self.sample_rate,
+                                 channels=self.channels, speed=self.speed, gain=self.gain,
+                                 normalize=self.normalize, peaks=peaks)
+                # Re-encoded audio has other byte offsets, and other times
+                # when stretched
+                self.index.flags = 0
+                self.index.scale_times(1 / self.speed)
+            if self.write_index:
+                self.index.save(index_path(self.output_file))
+            if peaks is not None:
+                from tts_peaks import peaks_path
+                with metrics.span("peaks"):
+                    if len(peaks):
+                        peaks.save(peaks_path(self.output_file))
+                    else:
+                        # Copied rather than decoded; an older pyramid no
+                        # longer matches
+                        remove_files((peaks_path(self.output_file),))
+            metrics.count("bytes_written", os.path.getsize(self.output_file))
+            if self.prefetched:
+                metrics.count("prefetch_wasted", len(self.prefetched - self.prefetch_used))
+            # The checkpoint is only kept for conversions that did not finish
+            if self.job is not None:
+                self.job.remove()
+            return self.output_file
+        finally:
+            if self.job is not None:
+                self.job.close()
+            self.close_previous()
+            remove_files(self.temp_files)
+            self.temp_files = set()
@@ -0,0 +1,202 @@
+import time
+import threading
+from collections import deque
+from contextlib import contextmanager
+
+INITIAL_LIMIT = 8
+MAX_LIMIT = 16
+MIN_RATE = 0.2
+MAX_RATE = 1000.0
+RATE_STEP = 1.0
+STEP_SHARE = 0.1
+BACKOFF = 0.7
+RATE_WINDOW = 2.0
+CUT_INTERVAL = 1.0
+MAX_RETRY_AFTER = 60.0
+LATENCY_WEIGHT = 0.2
+CANCEL_POLL = 0.1
+THROTTLE_STATUSES = (429, 503)
+
+
+class Cancelled(Exception):
+    pass
+
+
+def parse_retry_after(value):
+    # Seconds or an HTTP date; whatever it says, waits are capped
+    if not value:
+        return None
+    try:
+        seconds = float(value)
+    except ValueError:
+        from email.utils import parsedate_to_datetime
+        try:
+            seconds = parsedate_to_datetime(value).timestamp() - time.time()
+        except (TypeError, ValueError):
+            return None
+    return min(max(seconds, 0.0), MAX_RETRY_AFTER)
+
+
+# Admission control for one provider host. Concurrency and, once the host
+# has pushed back, the request rate grow additively with every success and
+# are cut by BACKOFF on a throttle or transient error (AIMD), at most once
+# per CUT_INTERVAL, so the burst of 429s from one overload counts as one
+# signal. The first cut starts from the rate requests were being served
+# at; the rate then grows by a tenth of that per second, so it gets back
+# to the host's limit in seconds whatever that limit is. Retry-After holds
+# back every request to the host until it ends. Waiting requests give up
+# once their conversion's `cancelled` event is set.
+class HostGovernor:
+    def __init__(self, host, limit=INITIAL_LIMIT, max_limit=MAX_LIMIT):
+        self.host = host
+        self.limit = float(limit)
+        self.max_limit = max_limit
+        self.rate = None
+        self.step = RATE_STEP
+        self.active = 0
+        self.next_start = 0.0
+        self.blocked_until = 0.0
+        self.cut_at = 0.0
+        self.served = deque()
+        self.latency = None
+        self.successes = 0
+        self.throttles = 0
+        self.errors = 0
+        self.cond = threading.Condition()
+
+    def served_rate(self, now):
+        while self.served and self.served[0] < now - RATE_WINDOW:
+            self.served.popleft()
+        # Limits are rarely counted over less than a second, so a burst
+        # served in a fraction of one does not count as a higher rate
+        return len(self.served) / max(now - self.served[0], CUT_INTERVAL) if self.served else MIN_RATE
+
+    def acquire(self, cancelled=None):
+        with self.cond:
+            while True:
+                if cancelled is not None and cancelled.is_set():
+                    raise Cancelled()
+                now = time.monotonic()
+                if self.active < max(1, int(self.limit)) and now >= self.blocked_until:
+                    break
+                timeout = self.blocked_until - now if now < self.blocked_until else None
+                if cancelled is not None:
+                    # Slots free up through notify, cancellation does not
+                    timeout = CANCEL_POLL if timeout is None else min(timeout, CANCEL_POLL)
+                self.cond.wait(timeout)
+            self.active += 1
+            # Each request reserves its own start time, so paced requests
+            # sleep apart instead of all waking up for every free moment
+            start = max(now, self.next_start)
+            if self.rate:
+                self.next_start = start + 1.0 / self.rate
+        if start > now:
+            if cancelled is None:
+                time.sleep(start - now)
+            elif cancelled.wait(start - now):
+                self.release(start, "other")
+                raise Cancelled()
+        return start
+
+    def release(self, started, outcome, retry_after=None):
+        with self.cond:
+            now = time.monotonic()
+            self.active -= 1
+            if outcome == "ok":
+                self.successes += 1
+                self.served.append(now)
+                latency = now - started
+                self.latency = latency if self.latency is None else (
+                    self.latency + LATENCY_WEIGHT * (latency - self.latency))
+                self.limit = min(self.max_limit, self.limit + 1.0 / self.limit)
+                if self.rate:
+                    # About `step` requests per second more every second
+                    self.rate = min(MAX_RATE, self.rate + self.step / self.rate)
+            elif outcome in ("throttled", "error"):
+                if outcome == "throttled":
+                    self.throttles += 1
+                else:
+                    self.errors += 1
+                # Requests sent before the last cut saw the old limits
+                if started >= self.cut_at and now - self.cut_at >= CUT_INTERVAL:
+                    self.cut_at = now
+                    self.limit = max(1.0, self.limit * BACKOFF)
+                    if outcome == "throttled":
+                        rate = self.rate or self.served_rate(now)
+                        self.step = max(RATE_STEP, rate * STEP_SHARE)
+                        self.rate = max(MIN_RATE, rate * BACKOFF)
+                if retry_after:
+                    self.blocked_until = max(self.blocked_until, now + retry_after)
+            self.cond.notify_all()
+
+    def snapshot(self):
+        with self.cond:
+            return {
+                "limit": round(self.limit, 2),
+                "rate": round(self.rate, 2) if self.rate else None,
+                "active": self.active,
+                "latency": round(self.latency, 4) if self.latency is not None else None,
+                "successes": self.successes,
+                "throttles": self.throttles,
+                "errors": self.errors,
+            }
+
+
+# Outcome of one request inside RateGovernor.slot(); anything not marked
+# and not raised counts as a success
+class Slot:
+    def __init__(self):
+        self.outcome = None
+        self.retry_after = None
+
+    def throttled(self, retry_after=None):
+        self.outcome = "throttled"
+        self.retry_after = retry_after
+
+    def failed(self):
+        self.outcome = "error"
+
+
+# One HostGovernor per host, shared by every conversion in the process
+class RateGovernor:
+    def __init__(self, limit=INITIAL_LIMIT, max_limit=MAX_LIMIT):
+        self.limit = limit
+        self.max_limit = max_limit
+        self.hosts = {}
+        self.lock = threading.Lock()
+
+    def host(self, name):
+        with self.lock:
+            governor = self.hosts.get(name)
+            if governor is None:
+                governor = self.hosts[name] = HostGovernor(name, self.limit, self.max_limit)
+            return governor
+
+    @contextmanager
+    def slot(self, name, cancelled=None):
+        governor = self.host(name)
+        slot = Slot()
+        started = governor.acquire(cancelled)
+        try:
+            yield slot
+        except BaseException:
+            governor.release(started, slot.outcome or "other", slot.retry_after)
+            raise
+        governor.release(started, slot.outcome or "ok", slot.retry_after)
+
+    def snapshot(self):
+        with self.lock:
+            hosts = list(self.hosts.items())
+        return {name: governor.snapshot() for name, governor in hosts}
+
+
+shared = None
+shared_lock = threading.Lock()
+
+
+def shared_governor():
+    global shared
+    with shared_lock:
+        if shared is None:
+            shared = RateGovernor()
+        return shared
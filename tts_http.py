@@ -0,0 +1,266 @@
+import ssl
+import time
+import base64
+import socket
+import asyncio
+import threading
+import urllib.parse
+import urllib.request
+from collections import deque, namedtuple
+
+DEFAULT_CONNECTIONS = 8
+DEFAULT_TIMEOUT = 30.0
+IDLE_TIMEOUT = 60.0
+
+Response = namedtuple("Response", "status headers body")
+
+
+class HTTPError(Exception):
+    def __init__(self, response, url):
+        super().__init__(f"HTTP {response.status} from {url}")
+        self.response = response
+
+
+def proxy_for(parts):
+    # The HTTPS proxy requests used for gTTS, from the environment (or the
+    # system settings); plain-HTTP origins are local stand-ins
+    if parts.scheme != "https" or urllib.request.proxy_bypass(parts.hostname):
+        return None
+    proxy = urllib.request.getproxies().get("https")
+    if not proxy:
+        return None
+    return urllib.parse.urlsplit(proxy if "://" in proxy else "http://" + proxy)
+
+
+def open_tunnel(proxy, host, port, timeout=DEFAULT_TIMEOUT):
+    # Blocking CONNECT through an HTTP proxy; returns the socket, which
+    # then carries the TLS connection to host:port
+    sock = socket.create_connection((proxy.hostname, proxy.port or 80), timeout)
+    try:
+        lines = [f"CONNECT {host}:{port} HTTP/1.1", f"Host: {host}:{port}"]
+        if proxy.username:
+            user = urllib.parse.unquote(proxy.username)
+            password = urllib.parse.unquote(proxy.password or "")
+            credentials = base64.b64encode(f"{user}:{password}".encode("utf-8")).decode("ascii")
+            lines.append(f"Proxy-Authorization: Basic {credentials}")
+        sock.sendall(("\r\n".join(lines) + "\r\n\r\n").encode("latin-1"))
+        response = b""
+        while b"\r\n\r\n" not in response:
+            data = sock.recv(4096)
+            if not data:
+                raise ConnectionError(f"Proxy {proxy.netloc} closed the connection")
+            response += data
+        status_line = response.split(b"\r\n", 1)[0]
+        if status_line.split(None, 2)[1:2] != [b"200"]:
+            raise ConnectionError(f"Proxy {proxy.netloc} refused CONNECT: {status_line.decode('latin-1')}")
+        return sock
+    except BaseException:
+        sock.close()
+        raise
+
+
+# One HTTP/1.1 connection, kept open between requests unless the server
+# asks for it to be closed
+class Connection:
+    def __init__(self, reader, writer):
+        self.reader = reader
+        self.writer = writer
+        self.last_used = time.monotonic()
+        self.reusable = True
+
+    def stale(self):
+        return self.reader.at_eof() or time.monotonic() - self.last_used > IDLE_TIMEOUT
+
+    async def request(self, method, target, host, headers, body):
+        lines = [f"{method} {target} HTTP/1.1", f"Host: {host}", f"Content-Length: {len(body)}"]
+        lines += [f"{name}: {value}" for name, value in headers.items()]
+        self.writer.write(("\r\n".join(lines) + "\r\n\r\n").encode("latin-1") + body)
+        await self.writer.drain()
+
+        status_line = await self.reader.readuntil(b"\r\n")
+        version, status = status_line.split(None, 2)[:2]
+        response_headers = {}
+        while True:
+            line = await self.reader.readuntil(b"\r\n")
+            if line == b"\r\n":
+                break
+            name, _, value = line.decode("latin-1").partition(":")
+            response_headers[name.strip().lower()] = value.strip()
+
+        if response_headers.get("transfer-encoding", "").lower() == "chunked":
+            parts = []
+            while True:
+                size = int((await self.reader.readuntil(b"\r\n")).split(b";")[0], 16)
+                if size == 0:
+                    # Trailers, if any, end with an empty line too
+                    while await self.reader.readuntil(b"\r\n") != b"\r\n":
+                        pass
+                    break
+                parts.append(await self.reader.readexactly(size))
+                await self.reader.readexactly(2)
+            data = b"".join(parts)
+        elif "content-length" in response_headers:
+            data = await self.reader.readexactly(int(response_headers["content-length"]))
+        else:
+            data = await self.reader.read()
+            self.reusable = False
+
+        connection = response_headers.get("connection", "").lower()
+        if connection == "close" or (version == b"HTTP/1.0" and connection != "keep-alive"):
+            self.reusable = False
+        self.last_used = time.monotonic()
+        return Response(int(status), response_headers, data)
+
+    def close(self):
+        self.writer.close()
+
+
+# Keep-alive connections to one origin. At most `limit` requests run at once;
+# finished connections go back to the idle stack and the most recently used
+# one is handed out first, so a steady stream of requests needs only as many
+# handshakes as it has requests in flight. Behind an HTTPS proxy every
+# connection is a CONNECT tunnel through it.
+class HostPool:
+    def __init__(self, origin, limit=DEFAULT_CONNECTIONS, proxy=None):
+        parts = urllib.parse.urlsplit(origin)
+        self.proxy = proxy or proxy_for(parts)
+        self.origin = origin
+        self.host = parts.hostname
+        self.secure = parts.scheme == "https"
+        self.port = parts.port or (443 if self.secure else 80)
+        self.host_header = parts.netloc
+        self.semaphore = asyncio.Semaphore(limit)
+        self.idle = deque()
+        self.opened = 0
+        self.requests = 0
+
+    async def connect(self):
+        context = ssl.create_default_context() if self.secure else None
+        server_hostname = self.host if self.secure else None
+        if self.proxy is not None:
+            sock = await asyncio.get_running_loop().run_in_executor(
+                None, open_tunnel, self.proxy, self.host, self.port
+            )
+            reader, writer = await asyncio.open_connection(sock=sock, ssl=context, server_hostname=server_hostname)
+        else:
+            reader, writer = await asyncio.open_connection(
+                self.host, self.port, ssl=context, server_hostname=server_hostname
+            )
+        self.opened += 1
+        return Connection(reader, writer)
+
+    def checkout(self):
+        while self.idle:
+            connection = self.idle.pop()
+            if not connection.stale():
+                return connection
+            connection.close()
+        return None
+
+    async def request(self, method, target, body=b"", headers=None, timeout=DEFAULT_TIMEOUT):
+        async with self.semaphore:
+            self.requests += 1
+            connection = self.checkout()
+            if connection is not None:
+                try:
+                    return await self.send(connection, method, target, body, headers, timeout)
+                except (ConnectionError, asyncio.IncompleteReadError):
+                    # The server dropped the idle connection first; that is
+                    # not the request's fault, so try once on a fresh one
+                    pass
+            return await self.send(await self.connect(), method, target, body, headers, timeout)
+
+    async def send(self, connection, method, target, body, headers, timeout):
+        try:
+            response = await asyncio.wait_for(
+                connection.request(method, target, self.host_header, headers or {}, body), timeout
+            )
+        except BaseException:
+            connection.close()
+            raise
+        if connection.reusable:
+            self.idle.append(connection)
+        else:
+            connection.close()
+        return response
+
+    def close(self):
+        while self.idle:
+            self.idle.pop().close()
+
+
+# Asyncio event loop on a daemon thread that owns one HostPool per origin
+# (one per Google TLD). Blocking callers, like the synthesis worker threads,
+# submit requests to it and wait; requests from every thread share the
+# pooled connections. The loop starts on the first request.
+class HTTPClient:
+    def __init__(self, limit=DEFAULT_CONNECTIONS):
+        self.limit = limit
+        self.loop = None
+        self.pools = {}
+        self.lock = threading.Lock()
+
+    def start(self):
+        with self.lock:
+            if self.loop is None:
+                loop = asyncio.new_event_loop()
+                threading.Thread(target=loop.run_forever, name="tts-http", daemon=True).start()
+                self.loop = loop
+        return self.loop
+
+    def pool(self, origin):
+        # Only called on the loop thread
+        pool = self.pools.get(origin)
+        if pool is None:
+            pool = self.pools[origin] = HostPool(origin, self.limit)
+        return pool
+
+    async def fetch(self, method, url, body=b"", headers=None, timeout=DEFAULT_TIMEOUT):
+        parts = urllib.parse.urlsplit(url)
+        target = urllib.parse.urlunsplit(("", "", parts.path or "/", parts.query, ""))
+        response = await self.pool(f"{parts.scheme}://{parts.netloc}").request(
+            method, target, body, headers, timeout
+        )
+        if response.status >= 400:
+            raise HTTPError(response, url)
+        return response
+
+    async def fetch_all(self, method, url, bodies, headers=None, timeout=DEFAULT_TIMEOUT):
+        return await asyncio.gather(*(self.fetch(method, url, body, headers, timeout) for body in bodies))
+
+    def post_all(self, url, bodies, headers=None, timeout=DEFAULT_TIMEOUT):
+        # Sends all bodies at once over the pooled connections and returns
+        # the responses in order
+        future = asyncio.run_coroutine_threadsafe(
+            self.fetch_all("POST", url, bodies, headers, timeout), self.start()
+        )
+        return future.result()
+
+    def stats(self):
+        return {origin: {"connections": pool.opened, "requests": pool.requests}
+                for origin, pool in list(self.pools.items())}
+
+    def close(self):
+        with self.lock:
+            loop, self.loop = self.loop, None
+        if loop is not None:
+            async def shutdown():
+                for pool in self.pools.values():
+                    pool.close()
+                self.pools.clear()
+            asyncio.run_coroutine_threadsafe(shutdown(), loop).result()
+            loop.call_soon_threadsafe(loop.stop)
+
+
+shared = None
+shared_lock = threading.Lock()
+
+
+def shared_client():
+    # Every provider in the process goes through one client, so conversions
+    # that follow each other reuse the connections already open
+    global shared
+    with shared_lock:
+        if shared is None:
+            shared = HTTPClient()
+        return shared
@@ -0,0 +1,94 @@
+import sys
+import struct
+import bisect
+from array import array
+
+MAGIC = b"TTSIDX2\0"
+HEADER = struct.Struct("<8sQIQ")
+# Byte offsets only locate segments in a merged MP3; exported audio is
+# re-encoded, so there only the times hold
+BYTE_OFFSETS = 1
+
+
+def index_path(output_file):
+    return output_file + ".idx"
+
+
+def key_hash(key):
+    # 64 bits of a segment_key() are plenty to tell segments apart
+    return int(key[:16], 16)
+
+
+# Where each segment of a conversion starts in the text and in the audio,
+# and which segment it was (a hash of its key), kept as parallel typed
+# arrays (36 bytes per segment) and written as a sidecar next to the
+# output. Lookups are binary searches, so finding the audio for a spot in
+# the text costs the same for a minute or ten hours. audio_size is the
+# size of the output the offsets belong to.
+class SegmentIndex:
+    def __init__(self):
+        self.text_offsets = array("Q")
+        self.text_lengths = array("I")
+        self.byte_offsets = array("Q")
+        self.times = array("d")
+        self.key_hashes = array("Q")
+        self.flags = BYTE_OFFSETS
+        self.audio_size = 0
+
+    def __len__(self):
+        return len(self.text_offsets)
+
+    def add(self, text_offset, text_length, key, byte_offset, time):
+        self.text_offsets.append(text_offset)
+        self.text_lengths.append(text_length)
+        self.key_hashes.append(key)
+        self.byte_offsets.append(byte_offset)
+        self.times.append(time)
+
+    def has_byte_offsets(self):
+        return bool(self.flags & BYTE_OFFSETS)
+
+    def scale_times(self, factor):
+        self.times = array("d", (t * factor for t in self.times))
+
+    def at_text(self, offset):
+        # Segment holding, or else the last one before, a text offset
+        return max(bisect.bisect_right(self.text_offsets, offset) - 1, 0) if len(self) else None
+
+    def at_time(self, seconds):
+        return max(bisect.bisect_right(self.times, seconds) - 1, 0) if len(self) else None
+
+    def span(self, i):
+        return self.text_offsets[i], self.text_offsets[i] + self.text_lengths[i]
+
+    def byte_spans(self):
+        # Byte range of every segment's audio, by key hash
+        ends = list(self.byte_offsets[1:]) + [self.audio_size]
+        return dict(zip(self.key_hashes, zip(self.byte_offsets, ends)))
+
+    def arrays(self):
+        return self.text_offsets, self.text_lengths, self.byte_offsets, self.times, self.key_hashes
+
+    def save(self, path):
+        with open(path, "wb") as f:
+            f.write(HEADER.pack(MAGIC, len(self), self.flags, self.audio_size))
+            for values in self.arrays():
+                if sys.byteorder != "little":
+                    values = array(values.typecode, values)
+                    values.byteswap()
+                values.tofile(f)
+        return path
+
+    @classmethod
+    def load(cls, path):
+        index = cls()
+        with open(path, "rb") as f:
+            header = f.read(HEADER.size)
+            if len(header) < HEADER.size or not header.startswith(MAGIC):
+                raise ValueError(f"Not a segment index: {path}")
+            _, count, index.flags, index.audio_size = HEADER.unpack(header)
+            for values in index.arrays():
+                values.fromfile(f, count)
+                if sys.byteorder != "little":
+                    values.byteswap()
+        return index
@@ -0,0 +1,117 @@
+import os
+import json
+import time
+import uuid
+import shutil
+import hashlib
+import threading
+
+from tts_cache import normalize_text, write_atomic
+
+DEFAULT_JOBS_DIR = os.path.join(
+    os.environ.get("XDG_CACHE_HOME") or os.path.expanduser("~/.cache"), "tts_pro", "jobs"
+)
+JOB_MAX_AGE = 7 * 24 * 3600
+MANIFEST = "manifest.jsonl"
+
+
+def job_id(text, lang, tld, engine="gtts", output_file=None):
+    # Files are identified by the hash of their content instead. The same
+    # text converted to two outputs is two jobs.
+    content = normalize_text(text) if isinstance(text, str) else text.scan()[1]
+    parts = [content, lang, tld]
+    if engine != "gtts":
+        parts.append(engine)
+    if output_file:
+        parts.append(os.path.abspath(output_file))
+    raw = "\0".join(parts)
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()[:32]
+
+
+# Checkpoint directory of one conversion. Finished segments are appended to
+# an append-only manifest, one JSON line each, so a crash loses at most the
+# segments that were still in flight.
+class Job:
+    def __init__(self, directory, on_close=None):
+        self.directory = directory
+        self.on_close = on_close
+        self.manifest = os.path.join(directory, MANIFEST)
+        self.done = {}
+        self.lock = threading.Lock()
+        os.makedirs(directory, exist_ok=True)
+        self.load()
+
+    def load(self):
+        try:
+            with open(self.manifest, encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        entry = json.loads(line)
+                        self.done[entry["index"]] = (entry["key"], entry["path"])
+                    except (ValueError, KeyError):
+                        # A torn last line from a crash is simply redone
+                        continue
+        except FileNotFoundError:
+            pass
+
+    def completed(self, index, key):
+        entry = self.done.get(index)
+        if entry and entry[0] == key and os.path.exists(entry[1]):
+            return entry[1]
+        return None
+
+    def write_segment(self, index, data):
+        return write_atomic(os.path.join(self.directory, f"{index:06d}.mp3"), data)
+
+    def record(self, index, key, path):
+        line = json.dumps({"index": index, "key": key, "path": path}) + "\n"
+        with self.lock:
+            with open(self.manifest, "a", encoding="utf-8") as f:
+                f.write(line)
+            self.done[index] = (key, path)
+
+    def remove(self):
+        shutil.rmtree(self.directory, ignore_errors=True)
+
+    def close(self):
+        if self.on_close:
+            self.on_close()
+            self.on_close = None
+
+
+# Checkpoints by job id. A checkpoint is only ever used by one running
+# conversion: an identical conversion started meanwhile gets a directory
+# of its own, which it removes when it closes and nothing resumes.
+class JobStore:
+    def __init__(self, directory=DEFAULT_JOBS_DIR):
+        self.directory = directory
+        self.open_ids = set()
+        self.lock = threading.Lock()
+
+    def open(self, text, lang, tld, engine="gtts", output_file=None):
+        name = job_id(text, lang, tld, engine, output_file)
+        with self.lock:
+            shared = name in self.open_ids
+            if not shared:
+                self.open_ids.add(name)
+        if shared:
+            job = Job(os.path.join(self.directory, f"{name}-{uuid.uuid4().hex[:8]}"))
+            job.on_close = job.remove
+            return job
+        return Job(os.path.join(self.directory, name), on_close=lambda: self.release(name))
+
+    def release(self, name):
+        with self.lock:
+            self.open_ids.discard(name)
+
+    def prune(self, max_age=JOB_MAX_AGE):
+        # Drop checkpoints nobody came back to resume
+        if not os.path.isdir(self.directory):
+            return 0
+        cutoff = time.time() - max_age
+        removed = 0
+        for entry in os.scandir(self.directory):
+            if entry.is_dir() and entry.stat().st_mtime < cutoff:
+                shutil.rmtree(entry.path, ignore_errors=True)
+                removed += 1
+        return removed
@@ -0,0 +1,137 @@
+import time
+import bisect
+import threading
+from contextlib import contextmanager
+
+# Upper bounds, in seconds, of the latency histogram buckets
+BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+PREFIX = "tts"
+
+COUNTER_HELP = {
+    "segments": "Segments converted",
+    "synthesized": "Segments requested from the engine",
+    "cache_hits": "Segments served from the segment cache",
+    "cache_misses": "Segments missing from the segment cache",
+    "resumed": "Segments taken from a checkpoint",
+    "reused": "Unchanged segments copied from the previous output",
+    "prefetch_hits": "Segments synthesized in the background before the conversion",
+    "prefetch_wasted": "Segments synthesized in the background the conversion did not use",
+    "retries": "Engine requests retried after an error",
+    "throttled": "Engine requests the provider turned away (HTTP 429/503)",
+    "errors": "Engine requests that failed",
+    "bytes_synthesized": "Audio bytes returned by the engine",
+    "spilled": "Segments written to temp files over the memory budget",
+    "bytes_written": "Bytes written to the output file",
+}
+
+
+class Histogram:
+    def __init__(self, buckets=BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.count = 0
+        self.sum = 0.0
+        self.max = 0.0
+
+    def observe(self, value):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.sum += value
+        self.max = max(self.max, value)
+
+    def quantile(self, q):
+        # Linear interpolation inside the bucket holding the q-th value
+        if not self.count:
+            return 0.0
+        rank = q * self.count
+        seen = 0
+        for i, n in enumerate(self.counts):
+            if n and seen + n >= rank:
+                low = self.buckets[i - 1] if i else 0.0
+                high = self.buckets[i] if i < len(self.buckets) else self.max
+                return min(low + (high - low) * (rank - seen) / n, self.max)
+            seen += n
+        return self.max
+
+    def snapshot(self):
+        return {
+            "count": self.count,
+            "sum": self.sum,
+            "mean": self.sum / self.count if self.count else 0.0,
+            "p50": self.quantile(0.5),
+            "p95": self.quantile(0.95),
+            "max": self.max,
+            "buckets": dict(zip([str(b) for b in self.buckets] + ["+Inf"], self.counts)),
+        }
+
+
+# Counters and per-stage timing histograms of one or more conversions.
+# Workers update it from several threads; the GUI and the CLI read
+# snapshots.
+class Metrics:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.counters = dict.fromkeys(COUNTER_HELP, 0)
+        self.stages = {}
+        self.started = time.time()
+
+    def count(self, name, value=1):
+        with self.lock:
+            self.counters[name] = self.counters.get(name, 0) + value
+
+    def observe(self, stage, seconds):
+        with self.lock:
+            histogram = self.stages.get(stage)
+            if histogram is None:
+                histogram = self.stages[stage] = Histogram()
+            histogram.observe(seconds)
+
+    @contextmanager
+    def span(self, stage):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(stage, time.perf_counter() - started)
+
+    def timed(self, stage, iterator):
+        # Times each step of a lazy iterator, e.g. the segmenter, which
+        # only runs while its consumer pulls from it
+        iterator = iter(iterator)
+        while True:
+            started = time.perf_counter()
+            try:
+                item = next(iterator)
+            except StopIteration:
+                return
+            finally:
+                self.observe(stage, time.perf_counter() - started)
+            yield item
+
+    def snapshot(self):
+        with self.lock:
+            return {
+                "elapsed": time.time() - self.started,
+                "counters": dict(self.counters),
+                "stages": {stage: h.snapshot() for stage, h in self.stages.items()},
+            }
+
+    def to_prometheus(self):
+        snapshot = self.snapshot()
+        lines = []
+        for name, value in snapshot["counters"].items():
+            metric = f"{PREFIX}_{name}_total"
+            lines.append(f"# HELP {metric} {COUNTER_HELP.get(name, name)}")
+            lines.append(f"# TYPE {metric} counter")
+            lines.append(f"{metric} {value}")
+        metric = f"{PREFIX}_stage_seconds"
+        lines.append(f"# HELP {metric} Time spent in each pipeline stage")
+        lines.append(f"# TYPE {metric} histogram")
+        for stage, data in sorted(snapshot["stages"].items()):
+            cumulative = 0
+            for bound, n in data["buckets"].items():
+                cumulative += n
+                lines.append(f'{metric}_bucket{{stage="{stage}",le="{bound}"}} {cumulative}')
+            lines.append(f'{metric}_sum{{stage="{stage}"}} {data["sum"]:.6f}')
+            lines.append(f'{metric}_count{{stage="{stage}"}} {data["count"]}')
+        return "\n".join(lines) + "\n"
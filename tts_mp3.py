@@ -0,0 +1,200 @@
+import os
+
+# MPEG audio frame tables (kbps / Hz), indexed by the header bit fields
+BITRATES = {
+    (1, 1): (0, 32, 64, 96, 128, 160, 192, 224, 256, 288, 320, 352, 384, 416, 448),
+    (1, 2): (0, 32, 48, 56, 64, 80, 96, 112, 128, 160, 192, 224, 256, 320, 384),
+    (1, 3): (0, 32, 40, 48, 56, 64, 80, 96, 112, 128, 160, 192, 224, 256, 320),
+    (2, 1): (0, 32, 48, 56, 64, 80, 96, 112, 128, 144, 160, 176, 192, 224, 256),
+    (2, 2): (0, 8, 16, 24, 32, 40, 48, 56, 64, 80, 96, 112, 128, 144, 160),
+    (2, 3): (0, 8, 16, 24, 32, 40, 48, 56, 64, 80, 96, 112, 128, 144, 160),
+}
+SAMPLE_RATES = {
+    3: (44100, 48000, 32000),  # MPEG 1
+    2: (22050, 24000, 16000),  # MPEG 2
+    0: (11025, 12000, 8000),   # MPEG 2.5
+}
+LAYERS = {3: 1, 2: 2, 1: 3}
+
+COPY_BLOCK = 1024 * 1024
+
+
+def parse_header(data, pos, end=None):
+    # Returns (frame_length, sample_rate, samples_per_frame, side_info_len) or None
+    if pos + 4 > (len(data) if end is None else end):
+        return None
+    b1, b2, b3 = data[pos + 1], data[pos + 2], data[pos + 3]
+    if data[pos] != 0xFF or (b1 & 0xE0) != 0xE0:
+        return None
+    version = (b1 >> 3) & 3
+    layer = LAYERS.get((b1 >> 1) & 3)
+    bitrate_idx = b2 >> 4
+    rate_idx = (b2 >> 2) & 3
+    if version == 1 or layer is None or bitrate_idx in (0, 15) or rate_idx == 3:
+        return None
+    padding = (b2 >> 1) & 1
+    mono = (b3 >> 6) == 3
+    bitrate = BITRATES[(1 if version == 3 else 2, layer)][bitrate_idx] * 1000
+    sample_rate = SAMPLE_RATES[version][rate_idx]
+    if layer == 1:
+        return (12 * bitrate // sample_rate + padding) * 4, sample_rate, 384, 0
+    if layer == 3 and version != 3:
+        return 72 * bitrate // sample_rate + padding, sample_rate, 576, 9 if mono else 17
+    side_info = (17 if mono else 32) if layer == 3 else 0
+    return 144 * bitrate // sample_rate + padding, sample_rate, 1152, side_info
+
+
+def skip_id3v2(data):
+    pos = 0
+    # Some encoders emit several stacked tags
+    while data[pos:pos + 3] == b"ID3" and pos + 10 <= len(data):
+        size = 0
+        for b in data[pos + 6:pos + 10]:
+            size = (size << 7) | (b & 0x7F)
+        footer = 10 if data[pos + 5] & 0x10 else 0
+        pos += 10 + size + footer
+    return min(pos, len(data))
+
+
+def find_sync(data, pos, end):
+    while pos < end:
+        pos = data.find(b"\xff", pos, end)
+        if pos < 0:
+            return end
+        if parse_header(data, pos, end):
+            return pos
+        pos += 1
+    return end
+
+
+def is_info_frame(data, pos, side_info):
+    tag = pos + 4 + side_info
+    if data[tag:tag + 4] in (b"Xing", b"Info"):
+        return True
+    return data[pos + 36:pos + 40] == b"VBRI"
+
+
+def audio_span(data):
+    # Byte range holding the raw audio frames of a single MP3 segment, with
+    # ID3v2/ID3v1 tags and a leading Xing/Info/VBRI frame excluded
+    end = len(data)
+    if end >= 128 and data[end - 128:end - 125] == b"TAG":
+        end -= 128
+    start = find_sync(data, skip_id3v2(data), end)
+    header = parse_header(data, start, end)
+    if header and is_info_frame(data, start, header[3]):
+        start = find_sync(data, start + header[0], end)
+    return start, max(start, end)
+
+
+def read_source(source):
+    if isinstance(source, memoryview):
+        return source.tobytes()
+    if isinstance(source, (bytes, bytearray)):
+        return source
+    with open(source, "rb") as f:
+        return f.read()
+
+
+def count_frames(data, start, end):
+    # Constant-bitrate segments without padding, like Google's, are counted
+    # from strided slices in C: every frame must carry the first frame's
+    # header bytes. Anything else is walked frame by frame.
+    header = parse_header(data, start, end)
+    if header and (end - start) % header[0] == 0:
+        length = header[0]
+        frames = (end - start) // length
+        if all(data[start + i:end:length] == data[start + i:start + i + 1] * frames for i in range(3)):
+            return frames
+    frames = 0
+    pos = start
+    while pos < end:
+        header = parse_header(data, pos, end)
+        if header is None:
+            pos = find_sync(data, pos + 1, end)
+            continue
+        frames += 1
+        pos += header[0]
+    return frames
+
+
+def info_frame(data, pos):
+    # Empty Xing frame shaped like the first audio frame; the frame and byte
+    # counts are patched in once the merge is done
+    length, _, _, side_info = parse_header(data, pos)
+    tag = 4 + side_info
+    if length < tag + 16:
+        return None, 0
+    frame = bytearray(length)
+    frame[0:4] = data[pos:pos + 4]
+    frame[1] |= 0x01  # no CRC
+    frame[tag:tag + 8] = b"Xing\x00\x00\x00\x03"
+    return frame, tag + 8
+
+
+def merge_mp3(sources, output_file, on_merged=None):
+    # Concatenate MP3 segments frame-wise into output_file in one streamed
+    # pass. Nothing is decoded, so cost grows with bytes, not audio length.
+    # A Xing header carrying the total frame count goes first, so decoders
+    # get the real duration even when segment bitrates differ.
+    # on_merged(byte_offset, seconds) reports where each source starts in
+    # the output, empty ones included.
+    written = 0
+    frames = 0
+    seconds = 0.0
+    counts_at = None
+    with open(output_file, "wb") as out:
+        for source in sources:
+            data = read_source(source)
+            start, end = audio_span(data)
+            if start >= end:
+                if on_merged:
+                    on_merged(written, seconds)
+                continue
+            if counts_at is None:
+                frame, counts_at = info_frame(data, start)
+                if frame:
+                    out.write(frame)
+                    written += len(frame)
+            if on_merged:
+                on_merged(written, seconds)
+            count = count_frames(data, start, end)
+            _, sample_rate, samples, _ = parse_header(data, start)
+            seconds += count * samples / sample_rate
+            frames += count
+            data = memoryview(data)
+            for pos in range(start, end, COPY_BLOCK):
+                out.write(data[pos:min(pos + COPY_BLOCK, end)])
+            written += end - start
+        if counts_at:
+            out.seek(counts_at)
+            out.write(frames.to_bytes(4, "big") + written.to_bytes(4, "big"))
+    return written
+
+
+def frame_at(path, start, end, seconds):
+    # Offset of the frame playing `seconds` after the frame at `start`, and
+    # how far in it starts. Only start..end, one segment's frames, is read.
+    with open(path, "rb") as f:
+        f.seek(start)
+        data = f.read(end - start)
+    pos = 0
+    elapsed = 0.0
+    while True:
+        header = parse_header(data, pos)
+        if not header:
+            break
+        length, sample_rate, samples, _ = header
+        if elapsed + samples / sample_rate > seconds:
+            break
+        elapsed += samples / sample_rate
+        pos += length
+    return start + pos, elapsed
+
+
+def remove_files(paths):
+    for path in paths:
+        try:
+            os.remove(path)
+        except OSError:
+            pass
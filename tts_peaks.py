@@ -0,0 +1,153 @@
+import io
+import struct
+
+import numpy as np
+
+from tts_audio import load_soundfile
+from tts_mp3 import audio_span, count_frames, parse_header
+
+MAGIC = b"TTSPEAK1"
+# magic, sample rate, samples per level-0 bucket, buckets merged per
+# level, level count, total samples; then the bucket count of each level
+HEADER = struct.Struct("<8sIIIIQ")
+BASE = 256
+FACTOR = 4
+SCALE = 127
+# A column drawn from a few buckets is off by at most a fraction of one
+COLUMN_BUCKETS = 4
+
+
+def peaks_path(output_file):
+    return output_file + ".peaks"
+
+
+def quantize(values):
+    return np.clip(np.rint(values * SCALE), -SCALE, SCALE).astype(np.int8)
+
+
+# Builds a min/max peak pyramid from the audio as it is written: level 0
+# holds the min and max of every BASE samples, each level above merges
+# FACTOR buckets of the one below. Peaks are int8, so the pyramid of three
+# hours of 24 kHz speech is under 3 MB. Channels are folded into one.
+class PeakBuilder:
+    def __init__(self, base=BASE, factor=FACTOR):
+        # Only MP3 segments are decoded here; failing now means no waveform
+        # rather than a failed conversion
+        self.sf = load_soundfile()
+        self.base = base
+        self.factor = factor
+        self.sample_rate = None
+        self.samples = 0
+        self.chunks = []
+        self.rest = np.empty((0, 2), dtype=np.float32)
+
+    def __len__(self):
+        return self.samples
+
+    def add(self, block, sample_rate):
+        if self.sample_rate is None:
+            self.sample_rate = sample_rate
+        elif sample_rate != self.sample_rate:
+            # Peaks only need the nearest sample at the pyramid's rate
+            picks = np.arange(int(len(block) * self.sample_rate / sample_rate)) * sample_rate // self.sample_rate
+            block = block[picks]
+        if not len(block):
+            return
+        if block.ndim > 1:
+            block = np.stack((block.min(axis=1), block.max(axis=1)), axis=1)
+        else:
+            block = np.stack((block, block), axis=1)
+        self.samples += len(block)
+        if len(self.rest):
+            block = np.concatenate((self.rest, block))
+        whole = len(block) // self.base * self.base
+        if whole:
+            buckets = block[:whole].reshape(-1, self.base, 2)
+            self.chunks.append(quantize(np.stack((buckets[:, :, 0].min(axis=1),
+                                                  buckets[:, :, 1].max(axis=1)), axis=1)))
+        self.rest = block[whole:]
+
+    def add_mp3(self, data):
+        # One merged segment. Decoders add and drop a few samples around a
+        # stream, so each segment is padded or cut to its frames' length
+        # and later segments stay where the merged file has them.
+        start, end = audio_span(data)
+        if start >= end:
+            return
+        _, sample_rate, samples, _ = parse_header(data, start)
+        expected = count_frames(data, start, end) * samples
+        block, sample_rate = self.sf.read(io.BytesIO(data), dtype="float32", always_2d=True)
+        if len(block) < expected:
+            block = np.concatenate((block, np.zeros((expected - len(block), block.shape[1]), np.float32)))
+        self.add(block[:expected], sample_rate)
+
+    def levels(self):
+        chunks = list(self.chunks)
+        if len(self.rest):
+            # The last, partial bucket
+            chunks.append(quantize(np.array([[self.rest[:, 0].min(), self.rest[:, 1].max()]])))
+        level = np.concatenate(chunks) if chunks else np.empty((0, 2), np.int8)
+        levels = [level]
+        while len(level) > 1:
+            pad = -len(level) % self.factor
+            if pad:
+                level = np.concatenate((level, np.repeat(level[-1:], pad, axis=0)))
+            groups = level.reshape(-1, self.factor, 2)
+            level = np.stack((groups[:, :, 0].min(axis=1), groups[:, :, 1].max(axis=1)), axis=1)
+            levels.append(level)
+        return levels
+
+    def save(self, path):
+        levels = self.levels()
+        with open(path, "wb") as f:
+            f.write(HEADER.pack(MAGIC, self.sample_rate or 0, self.base, self.factor, len(levels), self.samples))
+            f.write(struct.pack(f"<{len(levels)}Q", *(len(level) for level in levels)))
+            for level in levels:
+                f.write(level.tobytes())
+        return path
+
+
+# A peak pyramid opened memory-mapped: nothing is read until view() asks
+# for a range, and then only from the level fitting its resolution
+class PeakFile:
+    def __init__(self, path):
+        with open(path, "rb") as f:
+            header = f.read(HEADER.size)
+            if len(header) < HEADER.size or not header.startswith(MAGIC):
+                raise ValueError(f"Not a peak file: {path}")
+            _, self.sample_rate, self.base, self.factor, count, self.samples = HEADER.unpack(header)
+            if not self.sample_rate:
+                raise ValueError(f"Empty peak file: {path}")
+            sizes = struct.unpack(f"<{count}Q", f.read(8 * count))
+        data = np.memmap(path, dtype=np.int8, mode="r", offset=HEADER.size + 8 * count)
+        self.levels = []
+        pos = 0
+        for size in sizes:
+            self.levels.append(data[pos:pos + 2 * size].reshape(size, 2))
+            pos += 2 * size
+        self.duration = self.samples / self.sample_rate
+
+    def view(self, start, end, width):
+        # Min and max, in -1..1, of each of `width` columns spanning start
+        # to end seconds; columns past the end of the audio are left out.
+        # Zoomed in beyond level 0, neighbouring columns share a bucket.
+        width = max(int(width), 1)
+        per_column = (end - start) * self.sample_rate / width
+        level = 0
+        while (level + 1 < len(self.levels)
+               and self.base * self.factor ** (level + 1) * COLUMN_BUCKETS <= per_column):
+            level += 1
+        data = self.levels[level]
+        bucket = self.base * self.factor ** level
+        edges = (start + (end - start) * np.arange(width + 1) / width) * self.sample_rate / bucket
+        last = min(int(np.ceil(edges[-1])), len(data))
+        edges = np.clip(edges.astype(np.int64), 0, len(data))
+        first = edges[0]
+        if first >= last:
+            return np.empty(0, np.float32), np.empty(0, np.float32)
+        chunk = np.asarray(data[first:last])
+        starts = edges[:-1] - first
+        starts = starts[starts < len(chunk)]
+        mins = np.minimum.reduceat(chunk[:, 0], starts)
+        maxs = np.maximum.reduceat(chunk[:, 1], starts)
+        return mins / np.float32(SCALE), maxs / np.float32(SCALE)
@@ -0,0 +1,138 @@
+import io
+import os
+import time
+from collections import deque
+
+pygame = None
+
+
+def ensure_mixer():
+    # pygame is imported and the mixer opened on first playback only, and the
+    # same mixer is reused for every later play or stream
+    global pygame
+    if pygame is None:
+        os.environ.setdefault("PYGAME_HIDE_SUPPORT_PROMPT", "1")
+        import pygame as module
+        pygame = module
+    if not pygame.mixer.get_init():
+        pygame.mixer.init()
+    return pygame.mixer
+
+
+def mixer_ready():
+    return pygame is not None and pygame.mixer.get_init()
+
+
+# Plays MP3 segments through pygame.mixer.music as they arrive. One segment
+# is kept queued in the mixer behind the playing one so joins are gapless.
+class StreamPlayer:
+    def __init__(self):
+        self.pending = deque()
+        self.playing = None
+        self.queued = None
+        self.last_pos = 0
+        self.volume = 1.0
+        self.baked_gain = 1.0
+        self.active = False
+        self.complete = False
+        self.started_at = None
+        # Where in the file playback started, while a file plays
+        self.file_offset = None
+
+    def start(self, volume=1.0):
+        self.stop()
+        ensure_mixer()
+        self.volume = volume
+        self.baked_gain = 1.0
+        self.active = True
+        self.complete = False
+        self.started_at = None
+
+    def feed(self, data):
+        if self.active:
+            self.pending.append(data)
+            self.poll()
+
+    def finish(self):
+        self.complete = True
+
+    def poll(self):
+        if not self.active:
+            return False
+        music = pygame.mixer.music
+        if not music.get_busy():
+            if not self.pending:
+                if self.complete:
+                    self.active = False
+                return self.active
+            self.playing = io.BytesIO(self.pending.popleft())
+            self.queued = None
+            music.load(self.playing, "mp3")
+            music.set_volume(self.mixer_volume())
+            music.play()
+            self.last_pos = 0
+            if self.started_at is None:
+                self.started_at = time.perf_counter()
+            return True
+
+        # get_pos() restarts from zero when the queued segment takes over
+        pos = music.get_pos()
+        if pos < self.last_pos and self.queued is not None:
+            self.playing, self.queued = self.queued, None
+        self.last_pos = pos
+        if self.queued is None and self.pending:
+            self.queued = io.BytesIO(self.pending.popleft())
+            music.queue(self.queued, "mp3")
+        return True
+
+    def play_file(self, path, volume=1.0, baked_gain=1.0, start=0.0, byte_offset=None):
+        # baked_gain is the volume already applied to the file itself. With
+        # byte_offset (an MP3 frame boundary) decoding starts right there,
+        # so seeking costs the same anywhere in a file of any length.
+        self.stop()
+        ensure_mixer()
+        self.volume = volume
+        self.baked_gain = baked_gain
+        music = pygame.mixer.music
+        if byte_offset:
+            self.playing = open(path, "rb")
+            self.playing.seek(byte_offset)
+            music.load(self.playing, "mp3")
+            music.set_volume(self.mixer_volume())
+            music.play()
+        else:
+            music.load(path)
+            music.set_volume(self.mixer_volume())
+            try:
+                music.play(start=start)
+            except pygame.error:
+                # Not every format can start at a position
+                music.play()
+                start = 0.0
+        self.file_offset = start
+
+    def position(self):
+        # Seconds into the playing file; get_pos() counts from the start
+        # of this play() only
+        if self.file_offset is None or not mixer_ready() or not pygame.mixer.music.get_busy():
+            return None
+        return self.file_offset + max(pygame.mixer.music.get_pos(), 0) / 1000
+
+    def mixer_volume(self):
+        return min(1.0, self.volume / max(self.baked_gain, 0.01))
+
+    def set_volume(self, volume):
+        self.volume = volume
+        if mixer_ready():
+            pygame.mixer.music.set_volume(self.mixer_volume())
+
+    def stop(self):
+        self.active = False
+        self.pending.clear()
+        self.file_offset = None
+        if mixer_ready():
+            pygame.mixer.music.stop()
+            pygame.mixer.music.unload()
+        if self.playing is not None:
+            self.playing.close()
+        self.playing = self.queued = None
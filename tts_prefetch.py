@@ -0,0 +1,117 @@
+import threading
+
+from tts_cache import segment_key
+from tts_segmenter import iter_segments
+from tts_providers import Throttled
+
+DEFAULT_BUDGET = 200
+MAX_WASTED = 20
+
+
+# Synthesizes the segments of a text that is still being typed into the
+# segment cache, so converting it later only has the rest left to do. A
+# segment counts as finished once it is in two snapshots of the text in a
+# row; the caller takes a snapshot when typing pauses. One request at a
+# time, none while paused (during a conversion), at most `budget` requests
+# between resets, and none while `max_wasted` of the segments fetched are
+# no longer in the text.
+class Prefetcher:
+    def __init__(self, cache, budget=DEFAULT_BUDGET, max_wasted=MAX_WASTED):
+        self.cache = cache
+        self.budget = budget
+        self.max_wasted = max_wasted
+        self.snapshot = None
+        self.previous = set()
+        self.prefetched = set()
+        self.tried = set()
+        self.calls = 0
+        self.wasted = 0
+        self.paused = False
+        self.closed = False
+        self.cond = threading.Condition()
+        self.thread = None
+
+    def update(self, text, lang, tld, provider):
+        with self.cond:
+            self.snapshot = (text, lang, tld, provider)
+            if self.thread is None:
+                self.thread = threading.Thread(target=self.run, name="tts-prefetch", daemon=True)
+                self.thread.start()
+            self.cond.notify_all()
+
+    def pause(self):
+        with self.cond:
+            self.paused = True
+
+    def resume(self):
+        with self.cond:
+            self.paused = False
+            self.cond.notify_all()
+
+    def close(self):
+        with self.cond:
+            self.closed = True
+            self.cond.notify_all()
+
+    def keys(self):
+        with self.cond:
+            return frozenset(self.prefetched)
+
+    def reset(self):
+        # A conversion used what there was; the budget starts over
+        with self.cond:
+            self.prefetched = set()
+            self.tried = set()
+            self.calls = 0
+            self.wasted = 0
+
+    def stats(self):
+        with self.cond:
+            return {"prefetched": len(self.prefetched), "calls": self.calls, "wasted": self.wasted}
+
+    def run(self):
+        while True:
+            with self.cond:
+                while not self.closed and (self.paused or self.snapshot is None):
+                    self.cond.wait()
+                if self.closed:
+                    return
+                snapshot, self.snapshot = self.snapshot, None
+            self.prefetch(*snapshot)
+
+    def stopped(self):
+        # Newer text, a conversion or a spent budget all end a pass
+        return (self.snapshot is not None or self.paused or self.closed
+                or self.calls >= self.budget or self.wasted >= self.max_wasted)
+
+    def prefetch(self, text, lang, tld, provider):
+        segments = {}
+        for segment in iter_segments((text,)):
+            key = segment_key(segment.text, lang, tld, engine=provider.name)
+            segments.setdefault(key, segment.text)
+        previous, self.previous = self.previous, set(segments)
+        with self.cond:
+            self.wasted = len(self.prefetched - self.previous)
+        for key, segment in segments.items():
+            if key not in previous or key in self.tried or key in self.cache:
+                continue
+            with self.cond:
+                if self.stopped():
+                    return
+                self.calls += 1
+                self.tried.add(key)
+            try:
+                data = provider.synthesize(segment, lang, tld)
+                if provider.format != "mp3":
+                    from tts_audio import encode_mp3
+                    data = encode_mp3(data)
+            except Throttled:
+                # The provider is busy; the next snapshot tries again
+                with self.cond:
+                    self.tried.discard(key)
+                return
+            except Exception:
+                continue
+            self.cache.put(key, data)
+            with self.cond:
+                self.prefetched.add(key)
@@ -1,84 +1,349 @@
 import sys
 import os
+import functools
 from PyQt6.QtWidgets import (
     QApplication, QMainWindow, QWidget, QVBoxLayout, QHBoxLayout,
     QTextEdit, QPushButton, QComboBox, QLabel, QProgressBar,
     QFileDialog, QGroupBox, QRadioButton, QButtonGroup, QScrollArea,
     QFrame, QSpacerItem, QSizePolicy, QGridLayout, QTabWidget,
-    QFormLayout, QLineEdit, QSpinBox, QCheckBox, QSlider
+    QFormLayout, QLineEdit, QSpinBox, QCheckBox, QSlider, QTableWidget, QTableWidgetItem,
+    QHeaderView
 )
-from PyQt6.QtCore import Qt, QThread, pyqtSignal, QTimer, QPropertyAnimation, QEasingCurve
-from PyQt6.QtGui import QIcon, QFont, QPalette, QColor, QLinearGradient, QBrush, QPixmap
-from gtts import gTTS
-from gtts.lang import tts_langs
-import pygame
-import tempfile
+from PyQt6.QtCore import Qt, QObject, QThread, pyqtSignal, QTimer, QPropertyAnimation, QEasingCurve, QEvent, QLineF
+from PyQt6.QtGui import QIcon, QFont, QPalette, QColor, QLinearGradient, QBrush, QPixmap, QTextCursor, QPainter
+import time
+import json
 import uuid
+from tts_engine import Conversion, ConversionCancelled, SynthesisExecutor, DEFAULT_WORKERS, MAX_WORKERS
+from tts_providers import GTTSProvider, EspeakProvider
+from tts_cache import SegmentCache
+from tts_mp3 import read_source, frame_at
+from tts_jobs import JobStore
+from tts_player import StreamPlayer
+from tts_text import TextFile, TEXT_EXTENSIONS
+from tts_prefetch import Prefetcher
+
+# Typing pause after which finished segments are synthesized ahead
+PREFETCH_DELAY = 1500
+
+# Bundled resources never move while the app runs, so lookups are cached
+@functools.lru_cache(maxsize=None)
+def resource_path(relative_path):
+    try:
+        base_path = sys._MEIPASS
+    except Exception:
+        base_path = os.path.abspath(".")
+    return os.path.join(base_path, relative_path)
+
+
+@functools.lru_cache(maxsize=None)
+def load_icon(relative_path):
+    return QIcon(resource_path(relative_path))
+
 
 # Thread for TTS conversion
 class TTSThread(QThread):
     progress = pyqtSignal(int)
+    segment_ready = pyqtSignal(bytes)
     finished = pyqtSignal(str)
+    cancelled = pyqtSignal()
     error = pyqtSignal(str)
 
-    def __init__(self, text, lang, output_file, tld='com'):
+    def __init__(self, text, lang, output_file, tld='com', workers=DEFAULT_WORKERS, slow=False, cache=None,
+                 stream=False, speed=1.0, gain=1.0, normalize=False, jobs=None, provider=None, executor=None,
+                 prefetched=None, write_peaks=False):
         super().__init__()
-        self.text = text
-        self.lang = lang
+        self.conversion = Conversion(text, lang, output_file, tld=tld, slow=slow, workers=workers, cache=cache,
+                                     provider=provider, speed=speed, gain=gain, normalize=normalize, jobs=jobs,
+                                     executor=executor, prefetched=prefetched, write_peaks=write_peaks)
         self.output_file = output_file
-        self.tld = tld
+        self.stream = stream
+
+    def emit_segment(self, segment):
+        # Send the audio itself; segments come as bytes, or as files that
+        # may be gone once run() returns
+        self.segment_ready.emit(read_source(segment))
 
     def run(self):
         try:
-            total = len(self.text)
-            if total == 0:
-                self.error.emit("Text is empty!")
-                return
+            self.conversion.run(
+                on_progress=self.progress.emit,
+                on_segment=self.emit_segment if self.stream else None
+            )
+            self.finished.emit(self.output_file)
+        except ConversionCancelled:
+            self.cancelled.emit()
+        except Exception as e:
+            self.error.emit(str(e))
 
-            chunk_size = 4000
-            temp_files = []
-            for i in range(0, total, chunk_size):
-                chunk = self.text[i:i + chunk_size]
-                tts = gTTS(text=chunk, lang=self.lang, tld=self.tld, slow=False)
-                temp_fd, temp_path = tempfile.mkstemp(suffix='.mp3')
-                os.close(temp_fd)
-                tts.save(temp_path)
-                temp_files.append(temp_path)
-                progress_percent = int((i + chunk_size) / total * 100)
-                self.progress.emit(min(progress_percent, 100))
-
-            # Merge audio files
-            pygame.mixer.init()
-            merged = None
-            for temp_path in temp_files:
-                sound = pygame.mixer.Sound(temp_path)
-                if merged is None:
-                    merged = sound
-                else:
-                    channel = merged.play()
-                    while channel.get_busy():
-                        pygame.time.wait(100)
-                    merged = sound
-                os.remove(temp_path)
-
-            if merged:
-                merged_sound = pygame.mixer.Sound(buffer=merged.get_raw())
-                pygame.mixer.music.load(merged_sound.get_raw())
-                pygame.mixer.music.play()
-                while pygame.mixer.music.get_busy():
-                    pygame.time.wait(100)
 
-            self.finished.emit(self.output_file)
+# A conversion waiting in, or run by, the job queue
+class QueueJob:
+    PRIORITIES = ("High", "Normal", "Low")
+
+    def __init__(self, number, name, text, lang, tld, output_file, priority=1, options=None):
+        self.number = number
+        self.name = name
+        self.text = text
+        self.lang = lang
+        self.tld = tld
+        self.output_file = output_file
+        self.priority = priority
+        self.options = options or {}
+        self.status = "Queued"
+        self.progress = 0
+        self.error = None
+        self.thread = None
+        self.pause_requested = False
+
+    def order(self):
+        return self.priority, self.number
+
+    def finished(self):
+        return self.status in ("Done", "Failed", "Cancelled")
+
+
+# Runs queued jobs, highest priority first and first come first within a
+# priority, at most max_running at a time. Every job runs on its own
+# TTSThread and reports back through signals, so the UI thread only does
+# bookkeeping. Pausing cancels the conversion; its checkpoint lets it
+# continue where it stopped when resumed.
+class ConversionQueue(QObject):
+    job_changed = pyqtSignal(object)
+    jobs_changed = pyqtSignal()
+    idle = pyqtSignal()
+
+    def __init__(self, make_thread, max_running=2):
+        super().__init__()
+        self.make_thread = make_thread
+        self.max_running = max_running
+        self.jobs = []
+        self.retired = []
+        self.next_number = 1
+
+    def add(self, name, text, lang, tld, output_file, priority=1, options=None):
+        job = QueueJob(self.next_number, name, text, lang, tld, output_file, priority, options)
+        self.next_number += 1
+        self.jobs.append(job)
+        self.jobs_changed.emit()
+        self.schedule()
+        return job
+
+    def running(self):
+        return [job for job in self.jobs if job.status == "Running"]
+
+    def set_max_running(self, value):
+        self.max_running = value
+        self.schedule()
+
+    def schedule(self):
+        slots = self.max_running - len(self.running())
+        waiting = sorted((job for job in self.jobs if job.status == "Queued"), key=QueueJob.order)
+        for job in waiting[:max(0, slots)]:
+            self.start(job)
+
+    def start(self, job):
+        if job.thread is not None:
+            # A resumed job's last thread may still be returning from run()
+            self.retired = [thread for thread in self.retired if thread.isRunning()] + [job.thread]
+        thread = self.make_thread(job)
+        thread.progress.connect(lambda value, job=job: self.job_progress(job, value))
+        thread.finished.connect(lambda path, job=job: self.job_done(job, "Done"))
+        thread.cancelled.connect(lambda job=job: self.job_done(job, "Paused" if job.pause_requested else "Cancelled"))
+        thread.error.connect(lambda message, job=job: self.job_done(job, "Failed", message))
+        job.thread = thread
+        job.status = "Running"
+        job.pause_requested = False
+        job.error = None
+        self.job_changed.emit(job)
+        thread.start()
+
+    def job_progress(self, job, value):
+        job.progress = value
+        self.job_changed.emit(job)
+
+    def job_done(self, job, status, error=None):
+        job.status = status
+        job.error = error
+        if status == "Done":
+            job.progress = 100
+        self.job_changed.emit(job)
+        self.schedule()
+        if not self.running():
+            self.idle.emit()
+
+    def set_priority(self, job, priority):
+        job.priority = priority
+        self.job_changed.emit(job)
+        self.schedule()
+
+    def pause(self, job):
+        if job.status == "Running":
+            job.pause_requested = True
+            job.thread.conversion.cancel()
+        elif job.status == "Queued":
+            job.status = "Paused"
+            self.job_changed.emit(job)
+
+    def resume(self, job):
+        if job.status in ("Paused", "Cancelled", "Failed"):
+            job.status = "Queued"
+            self.job_changed.emit(job)
+            self.schedule()
+
+    def cancel(self, job):
+        if job.status == "Running":
+            job.pause_requested = False
+            job.thread.conversion.cancel()
+        elif job.status in ("Queued", "Paused"):
+            job.status = "Cancelled"
+            self.job_changed.emit(job)
+
+    def clear_finished(self):
+        # A thread that just reported may still be returning from run(), so
+        # it is kept referenced until it has really stopped
+        self.retired = [thread for thread in self.retired if thread.isRunning()]
+        self.retired += [job.thread for job in self.jobs if job.finished() and job.thread is not None]
+        self.jobs = [job for job in self.jobs if not job.finished()]
+        self.jobs_changed.emit()
+
+    def busy(self):
+        return bool(self.running())
+
+
+# Thread for exporting a finished conversion to another format
+class ExportThread(QThread):
+    finished = pyqtSignal(str)
+    error = pyqtSignal(str)
+
+    def __init__(self, source, target, sample_rate=None, channels=None):
+        super().__init__()
+        self.source = source
+        self.target = target
+        self.sample_rate = sample_rate
+        self.channels = channels
+
+    def run(self):
+        try:
+            # NumPy and soundfile are only needed once something is exported
+            from tts_audio import export_audio
+            export_audio(self.source, self.target, sample_rate=self.sample_rate, channels=self.channels)
+            self.finished.emit(self.target)
         except Exception as e:
             self.error.emit(str(e))
 
 
+# Waveform of the last output, drawn from its memory-mapped peak pyramid:
+# each repaint reads only the visible range, at the level that fits the
+# zoom, so a three-hour file draws as fast as a short one. The wheel zooms
+# around the pointer; clicking or dragging and letting go seeks.
+class WaveformView(QWidget):
+    seek_requested = pyqtSignal(float)
+
+    MIN_SPAN = 1.0
+    ZOOM_STEP = 0.8
+
+    def __init__(self):
+        super().__init__()
+        self.peaks = None
+        self.view_start = 0.0
+        self.view_span = 0.0
+        self.position = None
+        self.scrubbing = None
+        self.setMinimumHeight(80)
+
+    def set_peaks(self, peaks):
+        self.peaks = peaks
+        self.view_start = 0.0
+        self.view_span = peaks.duration if peaks is not None else 0.0
+        self.position = self.scrubbing = None
+        self.update()
+
+    def set_position(self, seconds):
+        if seconds != self.position:
+            self.position = seconds
+            self.update()
+
+    def time_at(self, x):
+        return min(max(self.view_start + x / max(self.width(), 1) * self.view_span, 0.0), self.peaks.duration)
+
+    def x_at(self, seconds):
+        return (seconds - self.view_start) / self.view_span * self.width()
+
+    def paintEvent(self, event):
+        painter = QPainter(self)
+        painter.fillRect(self.rect(), self.palette().color(QPalette.ColorRole.Base))
+        if self.peaks is not None and self.view_span > 0:
+            mins, maxs = self.peaks.view(self.view_start, self.view_start + self.view_span, self.width())
+            middle = self.height() / 2
+            tops = (middle - maxs * middle).tolist()
+            bottoms = (middle - mins * middle).tolist()
+            painter.setPen(self.palette().color(QPalette.ColorRole.Highlight))
+            painter.drawLines([QLineF(x, top, x, bottom + 1) for x, (top, bottom) in enumerate(zip(tops, bottoms))])
+            marker = self.scrubbing if self.scrubbing is not None else self.position
+            if marker is not None and self.view_start <= marker <= self.view_start + self.view_span:
+                painter.setPen(self.palette().color(QPalette.ColorRole.Text))
+                x = self.x_at(marker)
+                painter.drawLine(QLineF(x, 0, x, self.height()))
+        painter.end()
+
+    def wheelEvent(self, event):
+        if self.peaks is None or not event.angleDelta().y():
+            return
+        anchor = self.time_at(event.position().x())
+        span = self.view_span * self.ZOOM_STEP ** (event.angleDelta().y() / 120)
+        span = min(max(span, self.MIN_SPAN), self.peaks.duration)
+        start = anchor - (anchor - self.view_start) * span / self.view_span
+        self.view_start = min(max(start, 0.0), self.peaks.duration - span)
+        self.view_span = span
+        self.update()
+
+    def mousePressEvent(self, event):
+        if self.peaks is not None and event.button() == Qt.MouseButton.LeftButton:
+            self.scrubbing = self.time_at(event.position().x())
+            self.update()
+
+    def mouseMoveEvent(self, event):
+        if self.scrubbing is not None:
+            self.scrubbing = self.time_at(event.position().x())
+            self.update()
+
+    def mouseReleaseEvent(self, event):
+        if self.scrubbing is not None and event.button() == Qt.MouseButton.LeftButton:
+            seconds, self.scrubbing = self.time_at(event.position().x()), None
+            self.seek_requested.emit(seconds)
+
+
+THEME_GRADIENTS = {
+    "Blue": "background: qlineargradient(x1:0, y1:0, x2:1, y2:1, stop:0 #0a1940, stop:1 #1e3a8a); color: #c8e6ff;",
+    "Red": "background: qlineargradient(x1:0, y1:0, x2:1, y2:1, stop:0 #320a0a, stop:1 #8a1e1e); color: #ffc8c8;",
+}
+
+
+@functools.lru_cache(maxsize=None)
+def theme_stylesheet(theme):
+    gradient = THEME_GRADIENTS.get(theme, "")
+    return f"""
+        QMainWindow {{ {gradient} }}
+        QGroupBox {{ font-weight: bold; border: 2px solid #444; border-radius: 8px; margin-top: 10px; padding: 10px; }}
+        QGroupBox::title {{ subcontrol-origin: margin; left: 10px; padding: 0 5px; }}
+        QPushButton {{ border: none; border-radius: 8px; padding: 12px; font-weight: bold; }}
+        QPushButton:hover {{ background-color: rgba(255,255,255,0.1); }}
+        QTextEdit, QLineEdit {{ border: 1px solid #555; border-radius: 6px; padding: 8px; }}
+        QComboBox, QSlider {{ border: 1px solid #555; border-radius: 6px; padding: 5px; }}
+        QProgressBar {{ border: 1px solid #555; border-radius: 6px; text-align: center; }}
+        QTabWidget::pane {{ border: 1px solid #444; border-radius: 8px; }}
+        QTabBar::tab {{ background: #333; color: white; padding: 10px; margin: 2px; border-top-left-radius: 6px; border-top-right-radius: 6px; }}
+        QTabBar::tab:selected {{ background: #0078d4; }}
+        """
+
+
 # Main Window
 class TTSApp(QMainWindow):
     def __init__(self):
         super().__init__()
         self.setWindowTitle("Advanced Text-to-Speech Converter")
-        self.setWindowIcon(QIcon(self.resource_path("icon.ico")))
+        self.setWindowIcon(load_icon("icon.ico"))
         self.setMinimumSize(1000, 720)
         self.current_theme = "Windows11"
         self.current_lang = "en"
@@ -87,15 +352,63 @@ class TTSApp(QMainWindow):
         self.speed = 1.0
         self.volume = 1.0
         self.voice_tld = "com"
+        # The segment cache scans its directory, so it is opened on first use
+        self.cache = None
+        self.jobs = None
+        self.tts_thread = None
+        # Running exports; a QThread must outlive its run, so each is kept
+        # until it is done
+        self.export_threads = []
+        # Opened document, streamed into the conversion; the editor only
+        # shows its beginning
+        self.source_file = None
+        self.last_output = None
+        # Volume baked into last_output, so playback only applies the rest
+        self.output_gain = 1.0
+        self.pending_gain = 1.0
+        self.conversion_started = None
+        self.first_audio_reported = False
+        self.player = StreamPlayer()
+        self.player_timer = QTimer(self)
+        self.player_timer.setInterval(100)
+        self.player_timer.timeout.connect(self.poll_player)
+        # Segment index of last_output, and how to map it onto the editor:
+        # editor position = text offset + index_shift, valid while the
+        # document is at index_revision
+        self.index = None
+        self.index_shift = 0
+        self.index_revision = None
+        self.pending_shift = 0
+        self.pending_revision = None
+        self.highlighted = None
+        self.highlight_timer = QTimer(self)
+        self.highlight_timer.setInterval(100)
+        self.highlight_timer.timeout.connect(self.update_highlight)
+        self.highlight_timer.timeout.connect(self.update_playhead)
+        # Synthesis threads shared by the main conversion and every queued
+        # job, so "Parallel Requests" caps all requests in flight
+        self.executor = None
+        # Background synthesis of what has been typed, started on first use
+        self.prefetcher = None
+        self.prefetch_timer = QTimer(self)
+        self.prefetch_timer.setSingleShot(True)
+        self.prefetch_timer.setInterval(PREFETCH_DELAY)
+        self.prefetch_timer.timeout.connect(self.prefetch_text)
+        self.queue = ConversionQueue(self.make_queue_thread)
+        self.queue.job_changed.connect(self.update_queue_row)
+        self.queue.jobs_changed.connect(self.refresh_queue_table)
+        self.queue.idle.connect(self.trim_cache_if_idle)
+        # Metrics of the running or last conversion, shown in Diagnostics
+        self.metrics = None
+        self.metrics_timer = QTimer(self)
+        self.metrics_timer.setInterval(500)
+        self.metrics_timer.timeout.connect(self.update_diagnostics)
         self.init_ui()
         self.apply_theme()
+        self.setAcceptDrops(True)
 
     def resource_path(self, relative_path):
-        try:
-            base_path = sys._MEIPASS
-        except Exception:
-            base_path = os.path.abspath(".")
-        return os.path.join(base_path, relative_path)
+        return resource_path(relative_path)
 
     def init_ui(self):
         central_widget = QWidget()
@@ -127,10 +440,21 @@ class TTSApp(QMainWindow):
         themes_tab = self.create_themes_tab()
         tabs.addTab(themes_tab, self.tr("Themes"))
 
+        # Queue Tab
+        queue_tab = self.create_queue_tab()
+        tabs.addTab(queue_tab, self.tr("Queue"))
+
+        # Diagnostics Tab
+        diagnostics_tab = self.create_diagnostics_tab()
+        tabs.addTab(diagnostics_tab, self.tr("Diagnostics"))
+
         # Status Bar
         self.status_bar = self.statusBar()
         self.status_label = QLabel("Ready")
         self.status_bar.addWidget(self.status_label)
+        self.cache_label = QLabel()
+        self.status_bar.addPermanentWidget(self.cache_label)
+        self.update_cache_stats()
 
         # Progress Bar
         self.progress = QProgressBar()
@@ -179,53 +503,95 @@ class TTSApp(QMainWindow):
         self.text_edit = QTextEdit()
         self.text_edit.setPlaceholderText(self.tr("Enter your text here..."))
         self.text_edit.setFont(QFont("Segoe UI", 11))
+        # File drops on the editor open the file instead of pasting its
+        # path; clicks on it seek the audio
+        self.text_edit.viewport().installEventFilter(self)
+        self.text_edit.textChanged.connect(self.schedule_prefetch)
         text_layout.addWidget(self.text_edit)
 
+        file_layout = QHBoxLayout()
+        self.open_btn = QPushButton(self.tr("Open File..."))
+        self.open_btn.clicked.connect(self.browse_text_file)
+        self.close_file_btn = QPushButton(self.tr("Close File"))
+        self.close_file_btn.setVisible(False)
+        self.close_file_btn.clicked.connect(self.close_text_file)
+        self.file_label = QLabel()
+        file_layout.addWidget(self.open_btn)
+        file_layout.addWidget(self.close_file_btn)
+        file_layout.addWidget(self.file_label, 1)
+        text_layout.addLayout(file_layout)
+
         # Controls
         control_group = QGroupBox(self.tr("Controls"))
         control_layout = QHBoxLayout(control_group)
         control_layout.setSpacing(10)
 
         self.convert_btn = QPushButton(self.tr("Convert to Speech"))
-        self.convert_btn.setIcon(QIcon(self.resource_path("convert.png")))
+        self.convert_btn.setIcon(load_icon("convert.png"))
         self.convert_btn.setMinimumHeight(45)
         self.convert_btn.clicked.connect(self.start_conversion)
 
         self.save_btn = QPushButton(self.tr("Save As..."))
-        self.save_btn.setIcon(QIcon(self.resource_path("save.png")))
+        self.save_btn.setIcon(load_icon("save.png"))
         self.save_btn.setMinimumHeight(45)
         self.save_btn.clicked.connect(self.save_file)
 
         self.play_btn = QPushButton(self.tr("Play"))
-        self.play_btn.setIcon(QIcon(self.resource_path("play.png")))
+        self.play_btn.setIcon(load_icon("play.png"))
         self.play_btn.setMinimumHeight(45)
         self.play_btn.clicked.connect(self.play_audio)
 
         self.stop_btn = QPushButton(self.tr("Stop"))
-        self.stop_btn.setIcon(QIcon(self.resource_path("stop.png")))
+        self.stop_btn.setIcon(load_icon("stop.png"))
         self.stop_btn.setMinimumHeight(45)
         self.stop_btn.clicked.connect(self.stop_audio)
 
+        self.cancel_btn = QPushButton(self.tr("Cancel"))
+        self.cancel_btn.setMinimumHeight(45)
+        self.cancel_btn.setEnabled(False)
+        self.cancel_btn.clicked.connect(self.cancel_conversion)
+
+        self.enqueue_btn = QPushButton(self.tr("Add to Queue"))
+        self.enqueue_btn.setMinimumHeight(45)
+        self.enqueue_btn.clicked.connect(self.add_to_queue)
+
         control_layout.addWidget(self.convert_btn)
         control_layout.addWidget(self.save_btn)
         control_layout.addWidget(self.play_btn)
         control_layout.addWidget(self.stop_btn)
+        control_layout.addWidget(self.cancel_btn)
+        control_layout.addWidget(self.enqueue_btn)
+
+        # Waveform, shown once an output has a peak pyramid
+        self.wave_group = QGroupBox(self.tr("Waveform"))
+        wave_layout = QVBoxLayout(self.wave_group)
+        self.waveform = WaveformView()
+        self.waveform.seek_requested.connect(self.seek_time)
+        wave_layout.addWidget(self.waveform)
+        self.wave_group.setVisible(False)
 
         # Output Format
         format_group = QGroupBox(self.tr("Output Format"))
         format_layout = QHBoxLayout(format_group)
         self.format_mp3 = QRadioButton("MP3")
         self.format_wav = QRadioButton("WAV")
+        self.format_ogg = QRadioButton("OGG")
+        self.format_flac = QRadioButton("FLAC")
         self.format_mp3.setChecked(True)
         format_layout.addWidget(self.format_mp3)
         format_layout.addWidget(self.format_wav)
+        format_layout.addWidget(self.format_ogg)
+        format_layout.addWidget(self.format_flac)
         self.format_group = QButtonGroup()
         self.format_group.addButton(self.format_mp3, 0)
         self.format_group.addButton(self.format_wav, 1)
+        self.format_group.addButton(self.format_ogg, 2)
+        self.format_group.addButton(self.format_flac, 3)
 
         layout.addWidget(text_group, 0, 0, 1, 2)
-        layout.addWidget(control_group, 1, 0, 1, 2)
-        layout.addWidget(format_group, 2, 0, 1, 2)
+        layout.addWidget(self.wave_group, 1, 0, 1, 2)
+        layout.addWidget(control_group, 2, 0, 1, 2)
+        layout.addWidget(format_group, 3, 0, 1, 2)
 
         return widget
 
@@ -262,6 +628,14 @@ class TTSApp(QMainWindow):
         volume_row.addWidget(self.volume_value)
         layout.addRow(volume_label, volume_row)
 
+        # Synthesis Engine
+        engine_label = QLabel(self.tr("Engine:"))
+        self.engine_combo = QComboBox()
+        for provider in (GTTSProvider(), EspeakProvider()):
+            if provider.available():
+                self.engine_combo.addItem(provider.label, provider)
+        layout.addRow(engine_label, self.engine_combo)
+
         # TLD (Accent)
         tld_label = QLabel(self.tr("Accent (TLD):"))
         self.tld_combo = QComboBox()
@@ -277,10 +651,55 @@ class TTSApp(QMainWindow):
             self.tld_combo.addItem(name, code)
         layout.addRow(tld_label, self.tld_combo)
 
+        # Parallel Requests
+        workers_label = QLabel(self.tr("Parallel Requests:"))
+        self.workers_spin = QSpinBox()
+        self.workers_spin.setRange(1, MAX_WORKERS)
+        self.workers_spin.setValue(DEFAULT_WORKERS)
+        self.workers_spin.valueChanged.connect(self.resize_executor)
+        layout.addRow(workers_label, self.workers_spin)
+
         # Slow Mode
         self.slow_check = QCheckBox(self.tr("Slow Speech"))
         layout.addRow("", self.slow_check)
 
+        # Normalization
+        self.normalize_check = QCheckBox(self.tr("Normalize Loudness"))
+        layout.addRow("", self.normalize_check)
+
+        # Export Sample Rate
+        rate_label = QLabel(self.tr("Sample Rate:"))
+        self.rate_combo = QComboBox()
+        self.rate_combo.addItem(self.tr("Original"), None)
+        for rate in (16000, 22050, 24000, 44100, 48000):
+            self.rate_combo.addItem(f"{rate} Hz", rate)
+        layout.addRow(rate_label, self.rate_combo)
+
+        # Export Channels
+        channels_label = QLabel(self.tr("Channels:"))
+        self.channels_combo = QComboBox()
+        self.channels_combo.addItem(self.tr("Original"), None)
+        self.channels_combo.addItem(self.tr("Mono"), 1)
+        self.channels_combo.addItem(self.tr("Stereo"), 2)
+        layout.addRow(channels_label, self.channels_combo)
+
+        # Streaming Playback
+        self.stream_check = QCheckBox(self.tr("Play While Converting"))
+        layout.addRow("", self.stream_check)
+        self.slow_check.toggled.connect(self.update_stream_option)
+        self.normalize_check.toggled.connect(self.update_stream_option)
+        self.update_stream_option()
+
+        # Segment Cache
+        self.cache_check = QCheckBox(self.tr("Cache Synthesized Audio"))
+        self.cache_check.setChecked(True)
+        layout.addRow("", self.cache_check)
+
+        # Background Synthesis (fills the segment cache)
+        self.prefetch_check = QCheckBox(self.tr("Synthesize While Typing"))
+        self.cache_check.toggled.connect(self.prefetch_check.setEnabled)
+        layout.addRow("", self.prefetch_check)
+
         # Auto Save
         self.auto_save_check = QCheckBox(self.tr("Auto Save After Conversion"))
         layout.addRow("", self.auto_save_check)
@@ -336,6 +755,248 @@ class TTSApp(QMainWindow):
 
         return widget
 
+    def create_queue_tab(self):
+        widget = QWidget()
+        layout = QVBoxLayout(widget)
+        layout.setSpacing(15)
+
+        self.queue_table = QTableWidget(0, 6)
+        self.queue_table.setHorizontalHeaderLabels([
+            self.tr("Name"), self.tr("Language"), self.tr("Priority"), self.tr("Status"),
+            self.tr("Progress"), self.tr("Output")
+        ])
+        self.queue_table.horizontalHeader().setSectionResizeMode(QHeaderView.ResizeMode.Stretch)
+        self.queue_table.verticalHeader().setVisible(False)
+        self.queue_table.setEditTriggers(QTableWidget.EditTrigger.NoEditTriggers)
+        self.queue_table.setSelectionBehavior(QTableWidget.SelectionBehavior.SelectRows)
+        layout.addWidget(self.queue_table)
+
+        controls = QHBoxLayout()
+        self.queue_priority_combo = QComboBox()
+        for index, name in enumerate(QueueJob.PRIORITIES):
+            self.queue_priority_combo.addItem(self.tr(name), index)
+        self.queue_priority_combo.setCurrentIndex(1)
+        self.queue_priority_combo.activated.connect(self.set_selected_priority)
+        self.queue_pause_btn = QPushButton(self.tr("Pause"))
+        self.queue_pause_btn.clicked.connect(lambda: self.for_selected_jobs(self.queue.pause))
+        self.queue_resume_btn = QPushButton(self.tr("Resume"))
+        self.queue_resume_btn.clicked.connect(lambda: self.for_selected_jobs(self.queue.resume))
+        self.queue_cancel_btn = QPushButton(self.tr("Cancel"))
+        self.queue_cancel_btn.clicked.connect(lambda: self.for_selected_jobs(self.queue.cancel))
+        self.queue_clear_btn = QPushButton(self.tr("Clear Finished"))
+        self.queue_clear_btn.clicked.connect(self.queue.clear_finished)
+        self.parallel_jobs_spin = QSpinBox()
+        self.parallel_jobs_spin.setRange(1, 8)
+        self.parallel_jobs_spin.setValue(self.queue.max_running)
+        self.parallel_jobs_spin.valueChanged.connect(self.queue.set_max_running)
+
+        controls.addWidget(QLabel(self.tr("Priority:")))
+        controls.addWidget(self.queue_priority_combo)
+        controls.addWidget(self.queue_pause_btn)
+        controls.addWidget(self.queue_resume_btn)
+        controls.addWidget(self.queue_cancel_btn)
+        controls.addWidget(self.queue_clear_btn)
+        controls.addStretch()
+        controls.addWidget(QLabel(self.tr("Parallel Jobs:")))
+        controls.addWidget(self.parallel_jobs_spin)
+        layout.addLayout(controls)
+        return widget
+
+    def get_executor(self):
+        # One executor for the whole session; resizing it changes how many
+        # requests run at once, also for conversions already running
+        if self.executor is None:
+            self.executor = SynthesisExecutor()
+        self.executor.resize(self.workers_spin.value())
+        return self.executor
+
+    def resize_executor(self, size):
+        if self.executor is not None:
+            self.executor.resize(size)
+
+    def conversion_options(self):
+        return {
+            "slow": self.slow_check.isChecked(),
+            "speed": self.speed,
+            "gain": self.volume,
+            "normalize": self.normalize_check.isChecked(),
+            "cache": self.cache_check.isChecked(),
+            "provider": self.engine_combo.currentData(),
+        }
+
+    def unique_output(self, stem, replace=False):
+        # Queued jobs and the main conversion never write over each other's
+        # output. Only the main conversion replaces an existing file, its
+        # own from the last run.
+        directory = self.dir_edit.text()
+        taken = {job.output_file for job in self.queue.jobs}
+        if self.tts_thread is not None and self.tts_thread.isRunning():
+            taken.add(self.tts_thread.output_file)
+        path = os.path.join(directory, f"{stem}.{self.output_format}")
+        number = 2
+        while path in taken or (not replace and os.path.exists(path)):
+            path = os.path.join(directory, f"{stem}_{number}.{self.output_format}")
+            number += 1
+        return path
+
+    def add_to_queue(self):
+        text = self.source_file or self.text_edit.toPlainText().strip()
+        if not text:
+            self.status_label.setText(self.tr("Error: Text is empty!"))
+            return
+        options = self.conversion_options()
+        provider = options["provider"]
+        if provider.name != "gtts" and self.current_lang not in provider.languages():
+            self.status_label.setText(self.tr("Error: Engine does not support this language!"))
+            return
+        if self.source_file is not None:
+            name = self.source_file.name
+            stem = os.path.splitext(name)[0]
+        else:
+            name = " ".join(text[:40].split()) + ("..." if len(text) > 40 else "")
+            stem = self.name_edit.text() or "output"
+        job = self.queue.add(name, text, self.current_lang, self.tld_combo.currentData(),
+                             self.unique_output(stem), self.queue_priority_combo.currentData(), options)
+        self.status_label.setText(f"{self.tr('Queued:')} {os.path.basename(job.output_file)}")
+
+    def make_queue_thread(self, job):
+        options = job.options
+        return TTSThread(
+            text=job.text,
+            lang=job.lang,
+            output_file=job.output_file,
+            tld=job.tld,
+            workers=self.workers_spin.value(),
+            slow=options["slow"],
+            cache=self.get_cache() if options["cache"] else None,
+            speed=options["speed"],
+            gain=options["gain"],
+            normalize=options["normalize"],
+            jobs=self.get_jobs(),
+            provider=options["provider"],
+            executor=self.get_executor()
+        )
+
+    def selected_jobs(self):
+        rows = {index.row() for index in self.queue_table.selectionModel().selectedRows()}
+        return [self.queue.jobs[row] for row in sorted(rows) if row < len(self.queue.jobs)]
+
+    def for_selected_jobs(self, action):
+        for job in self.selected_jobs():
+            action(job)
+
+    def set_selected_priority(self):
+        for job in self.selected_jobs():
+            self.queue.set_priority(job, self.queue_priority_combo.currentData())
+
+    def refresh_queue_table(self):
+        self.queue_table.setRowCount(len(self.queue.jobs))
+        for row, job in enumerate(self.queue.jobs):
+            bar = QProgressBar()
+            bar.setRange(0, 100)
+            self.queue_table.setCellWidget(row, 4, bar)
+            self.update_queue_row(job, row)
+
+    def update_queue_row(self, job, row=None):
+        if row is None:
+            try:
+                row = self.queue.jobs.index(job)
+            except ValueError:
+                return
+        status = self.tr(job.status)
+        if job.error:
+            status += f": {job.error}"
+        values = [job.name, job.lang, self.tr(QueueJob.PRIORITIES[job.priority]), status, None,
+                  os.path.basename(job.output_file)]
+        for col, value in enumerate(values):
+            if value is not None:
+                self.queue_table.setItem(row, col, QTableWidgetItem(value))
+        bar = self.queue_table.cellWidget(row, 4)
+        if bar is None:
+            self.refresh_queue_table()
+            return
+        bar.setValue(job.progress)
+
+    def trim_cache_if_idle(self):
+        # Eviction only runs with no conversion in flight, so no segment
+        # path handed out to a running conversion disappears under it
+        main_running = self.tts_thread is not None and self.tts_thread.isRunning()
+        if self.cache is not None and not main_running and not self.queue.busy():
+            self.cache.trim()
+            self.update_cache_stats()
+
+    def create_diagnostics_tab(self):
+        widget = QWidget()
+        layout = QVBoxLayout(widget)
+        layout.setSpacing(15)
+
+        stages_group = QGroupBox(self.tr("Pipeline Stages"))
+        stages_layout = QVBoxLayout(stages_group)
+        self.stages_table = QTableWidget(0, 7)
+        self.stages_table.setHorizontalHeaderLabels([
+            self.tr("Stage"), self.tr("Count"), self.tr("Total (s)"), self.tr("Mean (ms)"),
+            "p50 (ms)", "p95 (ms)", self.tr("Max (ms)")
+        ])
+        self.stages_table.horizontalHeader().setSectionResizeMode(QHeaderView.ResizeMode.Stretch)
+        self.stages_table.verticalHeader().setVisible(False)
+        self.stages_table.setEditTriggers(QTableWidget.EditTrigger.NoEditTriggers)
+        stages_layout.addWidget(self.stages_table)
+
+        counters_group = QGroupBox(self.tr("Counters"))
+        counters_layout = QVBoxLayout(counters_group)
+        self.counters_table = QTableWidget(0, 2)
+        self.counters_table.setHorizontalHeaderLabels([self.tr("Counter"), self.tr("Value")])
+        self.counters_table.horizontalHeader().setSectionResizeMode(QHeaderView.ResizeMode.Stretch)
+        self.counters_table.verticalHeader().setVisible(False)
+        self.counters_table.setEditTriggers(QTableWidget.EditTrigger.NoEditTriggers)
+        counters_layout.addWidget(self.counters_table)
+
+        self.save_metrics_btn = QPushButton(self.tr("Save Metrics..."))
+        self.save_metrics_btn.clicked.connect(self.save_metrics)
+
+        layout.addWidget(stages_group, 2)
+        layout.addWidget(counters_group, 1)
+        layout.addWidget(self.save_metrics_btn)
+        return widget
+
+    def update_diagnostics(self):
+        if self.metrics is None:
+            return
+        snapshot = self.metrics.snapshot()
+        stages = snapshot["stages"]
+        self.stages_table.setRowCount(len(stages))
+        for row, (stage, data) in enumerate(stages.items()):
+            values = [stage, str(data["count"]), f"{data['sum']:.3f}", f"{data['mean'] * 1000:.1f}",
+                      f"{data['p50'] * 1000:.1f}", f"{data['p95'] * 1000:.1f}", f"{data['max'] * 1000:.1f}"]
+            for col, value in enumerate(values):
+                self.stages_table.setItem(row, col, QTableWidgetItem(value))
+        counters = snapshot["counters"]
+        self.counters_table.setRowCount(len(counters))
+        for row, (name, value) in enumerate(counters.items()):
+            self.counters_table.setItem(row, 0, QTableWidgetItem(name))
+            self.counters_table.setItem(row, 1, QTableWidgetItem(str(value)))
+
+    def finish_diagnostics(self):
+        self.metrics_timer.stop()
+        self.update_diagnostics()
+
+    def save_metrics(self):
+        if self.metrics is None:
+            self.status_label.setText(self.tr("Convert some text first!"))
+            return
+        file_path, selected = QFileDialog.getSaveFileName(
+            self, self.tr("Save Metrics..."), "metrics.json",
+            "JSON (*.json);;Prometheus (*.prom *.txt)"
+        )
+        if not file_path:
+            return
+        with open(file_path, "w", encoding="utf-8") as f:
+            if selected.startswith("Prometheus"):
+                f.write(self.metrics.to_prometheus())
+            else:
+                json.dump(self.metrics.snapshot(), f, indent=2)
+        self.status_label.setText(f"{self.tr('Saved:')} {os.path.basename(file_path)}")
+
     def change_language(self, index):
         lang_code = self.lang_combo.itemData(index)
         self.current_lang = lang_code
@@ -360,55 +1021,265 @@ class TTSApp(QMainWindow):
         self.save_btn.setText(self.tr("Save As..."))
         self.play_btn.setText(self.tr("Play"))
         self.stop_btn.setText(self.tr("Stop"))
+        self.cancel_btn.setText(self.tr("Cancel"))
+        self.enqueue_btn.setText(self.tr("Add to Queue"))
+        self.open_btn.setText(self.tr("Open File..."))
+        self.close_file_btn.setText(self.tr("Close File"))
+        self.update_stream_option()
 
     def update_speed(self, value):
         self.speed = value / 100.0
         self.speed_value.setText(f"{self.speed:.1f}x")
+        self.update_stream_option()
+
+    def stream_allowed(self):
+        # Segments are played as synthesized, before the speed and
+        # normalization stage; the mixer only matches the volume
+        return self.speed == 1 and not self.slow_check.isChecked() and not self.normalize_check.isChecked()
+
+    def update_stream_option(self, *args):
+        allowed = self.stream_allowed()
+        self.stream_check.setEnabled(allowed)
+        self.stream_check.setToolTip(
+            "" if allowed else self.tr("Only available at normal speed without loudness normalization")
+        )
 
     def update_volume(self, value):
         self.volume = value / 100.0
         self.volume_value.setText(f"{value}%")
+        self.player.set_volume(self.volume)
 
-    def start_conversion(self):
+    def browse_text_file(self):
+        patterns = " ".join("*" + ext for ext in TEXT_EXTENSIONS)
+        file_path, _ = QFileDialog.getOpenFileName(
+            self, self.tr("Open File..."), "", f"{self.tr('Text Files')} ({patterns})"
+        )
+        if file_path:
+            self.open_text_file(file_path)
+
+    def open_text_file(self, path):
+        try:
+            source = TextFile(path)
+            preview = source.preview()
+        except OSError as e:
+            self.status_label.setText(f"{self.tr('Error:')} {e}")
+            return
+        self.source_file = source
+        self.text_edit.setPlainText(preview)
+        self.text_edit.setReadOnly(True)
+        self.close_file_btn.setVisible(True)
+        self.file_label.setText(
+            f"{self.tr('Preview of')} {source.name} ({source.size / 1024 / 1024:.1f} MB)"
+        )
+
+    def close_text_file(self):
+        self.source_file = None
+        self.text_edit.clear()
+        self.text_edit.setReadOnly(False)
+        self.close_file_btn.setVisible(False)
+        self.file_label.clear()
+
+    def dropped_file(self, event):
+        mime = event.mimeData()
+        if mime.hasUrls():
+            for url in mime.urls():
+                if url.isLocalFile() and url.toLocalFile().lower().endswith(TEXT_EXTENSIONS):
+                    return url.toLocalFile()
+        return None
+
+    def dragEnterEvent(self, event):
+        if self.dropped_file(event):
+            event.acceptProposedAction()
+
+    def dropEvent(self, event):
+        path = self.dropped_file(event)
+        if path:
+            event.acceptProposedAction()
+            self.open_text_file(path)
+
+    def eventFilter(self, obj, event):
+        if event.type() in (QEvent.Type.DragEnter, QEvent.Type.DragMove, QEvent.Type.Drop) \
+                and self.dropped_file(event):
+            if event.type() == QEvent.Type.Drop:
+                self.dropEvent(event)
+            else:
+                event.acceptProposedAction()
+            return True
+        if event.type() == QEvent.Type.MouseButtonRelease and event.button() == Qt.MouseButton.LeftButton:
+            # A click seeks while the audio plays; Ctrl+click also starts it
+            playing = self.player.position() is not None
+            if self.index_valid() and (playing or event.modifiers() & Qt.KeyboardModifier.ControlModifier):
+                self.seek_to(self.text_edit.cursorForPosition(event.position().toPoint()).position())
+        return super().eventFilter(obj, event)
+
+    def schedule_prefetch(self):
+        # Every edit restarts the timer, so it only fires once typing pauses
+        if self.prefetch_check.isChecked() and self.cache_check.isChecked() and self.source_file is None:
+            self.prefetch_timer.start()
+
+    def prefetch_text(self):
         text = self.text_edit.toPlainText().strip()
+        provider = self.engine_combo.currentData()
+        if not text or (provider.name != "gtts" and self.current_lang not in provider.languages()):
+            return
+        self.get_prefetcher().update(text, self.current_lang, self.tld_combo.currentData(), provider)
+
+    def get_prefetcher(self):
+        if self.prefetcher is None:
+            self.prefetcher = Prefetcher(self.get_cache())
+        return self.prefetcher
+
+    def start_conversion(self):
+        text = self.source_file or self.text_edit.toPlainText().strip()
         if not text:
             self.status_label.setText(self.tr("Error: Text is empty!"))
             return
+        provider = self.engine_combo.currentData()
+        if provider.name != "gtts" and self.current_lang not in provider.languages():
+            self.status_label.setText(self.tr("Error: Engine does not support this language!"))
+            return
 
         self.progress.setVisible(True)
         self.progress.setValue(0)
         self.status_label.setText(self.tr("Converting..."))
-
-        output_file = os.path.join(
-            self.dir_edit.text(),
-            f"{self.name_edit.text() or 'output'}.{self.output_format}"
-        )
+        # The engine sees the text stripped, and files from their start
+        if self.source_file is not None:
+            self.pending_shift = -self.source_file.preview_lead
+        else:
+            raw = self.text_edit.toPlainText()
+            self.pending_shift = len(raw) - len(raw.lstrip())
+        self.pending_revision = self.text_edit.document().revision()
+        # The new output replaces the mapped pyramid file
+        self.show_waveform(None)
+        # Background synthesis waits while the conversion runs
+        prefetched = None
+        if self.prefetcher is not None:
+            self.prefetcher.pause()
+            prefetched = self.prefetcher.keys()
+
+        output_file = self.unique_output(self.name_edit.text() or "output", replace=True)
+        stream = self.stream_check.isChecked() and self.stream_allowed()
 
         self.tts_thread = TTSThread(
             text=text,
             lang=self.current_lang,
             output_file=output_file,
-            tld=self.tld_combo.currentData()
+            tld=self.tld_combo.currentData(),
+            workers=self.workers_spin.value(),
+            slow=self.slow_check.isChecked(),
+            cache=self.get_cache() if self.cache_check.isChecked() else None,
+            stream=stream,
+            speed=self.speed,
+            gain=self.volume,
+            normalize=self.normalize_check.isChecked(),
+            jobs=self.get_jobs(),
+            provider=provider,
+            executor=self.get_executor(),
+            prefetched=prefetched,
+            write_peaks=True
         )
+        self.pending_gain = self.volume
+        self.metrics = self.tts_thread.conversion.metrics
+        self.metrics_timer.start()
+        self.conversion_started = time.perf_counter()
+        self.first_audio_reported = False
+        if stream:
+            self.player.start(self.volume)
+            self.tts_thread.segment_ready.connect(self.player.feed)
+            self.player_timer.start()
         self.tts_thread.progress.connect(self.progress.setValue)
         self.tts_thread.finished.connect(self.conversion_finished)
+        self.tts_thread.cancelled.connect(self.conversion_cancelled)
         self.tts_thread.error.connect(self.conversion_error)
+        # One main conversion at a time; more documents go through the queue
+        self.convert_btn.setEnabled(False)
+        self.cancel_btn.setEnabled(True)
         self.tts_thread.start()
 
     def conversion_finished(self, file_path):
         self.progress.setVisible(False)
-        self.status_label.setText(self.tr(f"Saved: {os.path.basename(file_path)}"))
+        self.cancel_btn.setEnabled(False)
+        self.last_output = file_path
+        self.output_gain = self.pending_gain
+        self.index = self.tts_thread.conversion.index
+        self.index_shift = self.pending_shift
+        self.index_revision = self.pending_revision
+        self.show_waveform(file_path)
+        self.player.finish()
+        status = f"{self.tr('Saved:')} {os.path.basename(file_path)}"
+        if self.player.started_at is not None and self.player.active:
+            status += f" ({self.tr('first audio after')} {self.first_audio_delay():.2f} s)"
+        if self.tts_thread.conversion.resumed:
+            status += f" ({self.tr('resumed')} {self.tts_thread.conversion.resumed} {self.tr('segments')})"
+        if self.tts_thread.conversion.reused:
+            status += f" ({self.tr('unchanged')} {self.tts_thread.conversion.reused} {self.tr('segments')})"
+        if self.tts_thread.conversion.prefetched:
+            status += (f" ({self.tr('prefetched')} {self.tts_thread.conversion.prefetch_hits}/"
+                       f"{self.tts_thread.conversion.segments} {self.tr('segments')})")
+        if self.prefetcher is not None:
+            self.prefetcher.reset()
+            self.prefetcher.resume()
+        self.status_label.setText(status)
+        self.update_cache_stats()
+        self.finish_diagnostics()
+        self.convert_btn.setEnabled(True)
+        self.trim_cache_if_idle()
         if self.auto_save_check.isChecked():
             self.save_file(file_path)
 
     def conversion_error(self, msg):
         self.progress.setVisible(False)
+        self.cancel_btn.setEnabled(False)
+        self.player.finish()
         self.status_label.setText(self.tr(f"Error: {msg}"))
+        if self.prefetcher is not None:
+            self.prefetcher.resume()
+        self.update_cache_stats()
+        self.finish_diagnostics()
+        self.convert_btn.setEnabled(True)
+        self.trim_cache_if_idle()
+
+    def cancel_conversion(self):
+        if self.tts_thread is not None and self.tts_thread.isRunning():
+            self.tts_thread.conversion.cancel()
+            self.status_label.setText(self.tr("Cancelling..."))
+
+    def conversion_cancelled(self):
+        self.progress.setVisible(False)
+        self.cancel_btn.setEnabled(False)
+        self.player.stop()
+        self.player_timer.stop()
+        self.status_label.setText(self.tr("Cancelled. Convert again to resume."))
+        if self.prefetcher is not None:
+            self.prefetcher.resume()
+        self.update_cache_stats()
+        self.finish_diagnostics()
+        self.convert_btn.setEnabled(True)
+        self.trim_cache_if_idle()
+
+    def get_jobs(self):
+        if self.jobs is None:
+            self.jobs = JobStore()
+            self.jobs.prune()
+        return self.jobs
+
+    def get_cache(self):
+        if self.cache is None:
+            self.cache = SegmentCache()
+        return self.cache
+
+    def update_cache_stats(self):
+        stats = self.cache.stats() if self.cache is not None else {"hits": 0, "misses": 0}
+        self.cache_label.setText(
+            f"{self.tr('Cache:')} {stats['hits']} {self.tr('hits')}, {stats['misses']} {self.tr('misses')}"
+        )
 
     def save_file(self, default_path=None):
         formats = {
             0: ("MP3 Files (*.mp3)", ".mp3"),
             1: ("WAV Files (*.wav)", ".wav"),
+            2: ("OGG Files (*.ogg)", ".ogg"),
+            3: ("FLAC Files (*.flac)", ".flac"),
         }
         fmt_idx = self.format_group.checkedId()
         filter_str, ext = formats[fmt_idx]
@@ -418,17 +1289,147 @@ class TTSApp(QMainWindow):
         if file_path:
             if not file_path.endswith(ext):
                 file_path += ext
-            # In real app, convert format here
-            self.status_label.setText(self.tr(f"Saved: {os.path.basename(file_path)}"))
+            self.export_file(file_path)
+
+    def export_file(self, file_path):
+        if not self.last_output:
+            self.status_label.setText(self.tr("Convert some text first!"))
+            return
+        self.status_label.setText(self.tr("Exporting..."))
+        thread = ExportThread(
+            self.last_output,
+            file_path,
+            sample_rate=self.rate_combo.currentData(),
+            channels=self.channels_combo.currentData()
+        )
+        thread.finished.connect(lambda path: self.export_finished(thread, path))
+        thread.error.connect(lambda msg: self.export_error(thread, msg))
+        self.export_threads.append(thread)
+        thread.start()
+
+    def export_finished(self, thread, path):
+        # Emitted at the end of run(), so the wait is over at once
+        thread.wait()
+        self.export_threads.remove(thread)
+        self.status_label.setText(f"{self.tr('Saved:')} {os.path.basename(path)}")
+
+    def export_error(self, thread, msg):
+        # Unlike conversion_error, leaves a running conversion and its
+        # buttons alone
+        thread.wait()
+        self.export_threads.remove(thread)
+        self.status_label.setText(f"{self.tr('Export failed:')} {msg}")
 
     def play_audio(self):
-        pygame.mixer.init()
-        pygame.mixer.music.load(self.last_output or self.resource_path("sample.mp3"))
-        pygame.mixer.music.set_volume(self.volume)
-        pygame.mixer.music.play()
+        self.player_timer.stop()
+        if self.last_output:
+            self.player.play_file(self.last_output, self.volume, baked_gain=self.output_gain)
+            self.highlight_timer.start()
+        else:
+            self.player.play_file(self.resource_path("sample.mp3"), self.volume)
 
     def stop_audio(self):
-        pygame.mixer.music.stop()
+        self.player_timer.stop()
+        self.player.stop()
+        self.clear_highlight()
+        self.waveform.set_position(None)
+
+    def index_valid(self):
+        return (self.index is not None and len(self.index) > 0 and self.last_output is not None
+                and self.text_edit.document().revision() == self.index_revision)
+
+    def seek_to(self, position):
+        # Jumps to the segment under an editor position. The index gives
+        # the segment's MP3 frame, so playback starts there without
+        # decoding anything before it.
+        i = self.index.at_text(max(position - self.index_shift, 0))
+        byte_offset = self.index.byte_offsets[i] if self.index.has_byte_offsets() else None
+        self.play_from(self.index.times[i], byte_offset)
+
+    def seek_time(self, seconds):
+        # A scrub lands on the MP3 frame playing at `seconds`; the index
+        # gives its segment, and only that segment is read to find it
+        if not self.last_output:
+            return
+        byte_offset = None
+        index = self.index
+        if index is not None and len(index) and index.has_byte_offsets():
+            i = index.at_time(seconds)
+            end = index.byte_offsets[i + 1] if i + 1 < len(index) else index.audio_size
+            byte_offset, into = frame_at(self.last_output, index.byte_offsets[i], end, seconds - index.times[i])
+            seconds = index.times[i] + into
+        self.play_from(seconds, byte_offset)
+
+    def play_from(self, seconds, byte_offset=None):
+        self.player_timer.stop()
+        self.player.play_file(self.last_output, self.volume, baked_gain=self.output_gain,
+                              start=seconds, byte_offset=byte_offset)
+        self.highlighted = None
+        self.highlight_timer.start()
+
+    def show_waveform(self, path):
+        # Without NumPy, or a pyramid for `path`, there is no waveform
+        peaks = None
+        if path is not None:
+            try:
+                from tts_peaks import PeakFile, peaks_path
+                peaks = PeakFile(peaks_path(path))
+            except (ImportError, OSError, ValueError):
+                peaks = None
+        self.waveform.set_peaks(peaks)
+        self.wave_group.setVisible(peaks is not None)
+
+    def update_playhead(self):
+        self.waveform.set_position(self.player.position())
+
+    def update_highlight(self):
+        seconds = self.player.position()
+        if seconds is None:
+            self.clear_highlight()
+            return
+        if not self.index_valid():
+            self.clear_highlight(stop=False)
+            return
+        i = self.index.at_time(seconds)
+        if i == self.highlighted:
+            return
+        self.highlighted = i
+        start, end = (offset + self.index_shift for offset in self.index.span(i))
+        length = self.text_edit.document().characterCount() - 1
+        if start < 0 or start >= length:
+            # Beyond the preview of an opened file
+            self.text_edit.setExtraSelections([])
+            return
+        selection = QTextEdit.ExtraSelection()
+        selection.format.setBackground(self.palette().color(QPalette.ColorRole.Highlight).lighter(130))
+        selection.format.setForeground(self.palette().color(QPalette.ColorRole.HighlightedText))
+        selection.cursor = QTextCursor(self.text_edit.document())
+        selection.cursor.setPosition(start)
+        selection.cursor.setPosition(min(end, length), QTextCursor.MoveMode.KeepAnchor)
+        self.text_edit.setExtraSelections([selection])
+        # Follow the reading without moving the user's own cursor
+        rect = self.text_edit.cursorRect(selection.cursor)
+        if not self.text_edit.viewport().rect().contains(rect):
+            bar = self.text_edit.verticalScrollBar()
+            bar.setValue(bar.value() + rect.top() - self.text_edit.viewport().height() // 3)
+
+    def clear_highlight(self, stop=True):
+        if stop:
+            self.highlight_timer.stop()
+        self.highlighted = None
+        self.text_edit.setExtraSelections([])
+
+    def poll_player(self):
+        if not self.player.poll():
+            self.player_timer.stop()
+        if self.player.started_at is not None and not self.first_audio_reported:
+            self.first_audio_reported = True
+            self.status_label.setText(
+                f"{self.tr('Playing...')} ({self.tr('first audio after')} {self.first_audio_delay():.2f} s)"
+            )
+
+    def first_audio_delay(self):
+        return self.player.started_at - self.conversion_started
 
     def browse_directory(self):
         dir_path = QFileDialog.getExistingDirectory(self, self.tr("Select Output Directory"))
@@ -438,6 +1439,8 @@ class TTSApp(QMainWindow):
     def apply_theme_by_button(self, button):
         themes = ["Windows11", "Light", "Dark", "Blue", "Red"]
         idx = self.theme_buttons.id(button)
+        if themes[idx] == self.current_theme:
+            return
         self.current_theme = themes[idx]
         self.apply_theme()
 
@@ -489,131 +1492,394 @@ class TTSApp(QMainWindow):
         self.update_styles()
 
     def update_styles(self):
-        gradient = ""
-        if self.current_theme == "Blue":
-            gradient = "background: qlineargradient(x1:0, y1:0, x2:1, y2:1, stop:0 #0a1940, stop:1 #1e3a8a); color: #c8e6ff;"
-        elif self.current_theme == "Red":
-            gradient = "background: qlineargradient(x1:0, y1:0, x2:1, y2:1, stop:0 #320a0a, stop:1 #8a1e1e); color: #ffc8c8;"
-
-        stylesheet = f"""
-        QMainWindow {{ {gradient} }}
-        QGroupBox {{ font-weight: bold; border: 2px solid #444; border-radius: 8px; margin-top: 10px; padding: 10px; }}
-        QGroupBox::title {{ subcontrol-origin: margin; left: 10px; padding: 0 5px; }}
-        QPushButton {{ border: none; border-radius: 8px; padding: 12px; font-weight: bold; }}
-        QPushButton:hover {{ background-color: rgba(255,255,255,0.1); }}
-        QTextEdit, QLineEdit {{ border: 1px solid #555; border-radius: 6px; padding: 8px; }}
-        QComboBox, QSlider {{ border: 1px solid #555; border-radius: 6px; padding: 5px; }}
-        QProgressBar {{ border: 1px solid #555; border-radius: 6px; text-align: center; }}
-        QTabWidget::pane {{ border: 1px solid #444; border-radius: 8px; }}
-        QTabBar::tab {{ background: #333; color: white; padding: 10px; margin: 2px; border-top-left-radius: 6px; border-top-right-radius: 6px; }}
-        QTabBar::tab:selected {{ background: #0078d4; }}
-        """
-        self.setStyleSheet(stylesheet)
+        # Setting a stylesheet re-polishes every widget in the window, so it
+        # is skipped when the theme's sheet is already the one applied
+        stylesheet = theme_stylesheet(self.current_theme)
+        if stylesheet != self.styleSheet():
+            self.setStyleSheet(stylesheet)
 
     def tr(self, text):
-        translations = {
-            "en": {
-                "Main": "Main",
-                "Settings": "Settings",
-                "Themes": "Themes",
-                "Language": "Language",
-                "Input Text": "Input Text",
-                "Controls": "Controls",
-                "Convert to Speech": "Convert to Speech",
-                "Save As...": "Save As...",
-                "Play": "Play",
-                "Stop": "Stop",
-                "Output Format": "Output Format",
-                "Speed:": "Speed:",
-                "Volume:": "Volume:",
-                "Accent (TLD):": "Accent (TLD):",
-                "Slow Speech": "Slow Speech",
-                "Auto Save After Conversion": "Auto Save After Conversion",
-                "Default File Name:": "Default File Name:",
-                "Output Directory:": "Output Directory:",
-                "Select Output Directory": "Select Output Directory",
-                "Error: Text is empty!": "Error: Text is empty!",
-                "Converting...": "Converting...",
-                "Saved:": "Saved:",
-                "Ready": "Ready",
-            },
-            "fa": {
-                "Main": "اصلی",
-                "Settings": "تنظیمات",
-                "Themes": "تم‌ها",
-                "Language": "زبان",
-                "Input Text": "متن ورودی",
-                "Controls": "کنترل‌ها",
-                "Convert to Speech": "تبدیل به گفتار",
-                "Save As...": "ذخیره با نام...",
-                "Play": "پخش",
-                "Stop": "توقف",
-                "Output Format": "فرمت خروجی",
-                "Speed:": "سرعت:",
-                "Volume:": "حجم صدا:",
-                "Accent (TLD):": "لهجه (TLD):",
-                "Slow Speech": "گفتار آهسته",
-                "Auto Save After Conversion": "ذخیره خودکار پس از تبدیل",
-                "Default File Name:": "نام فایل پیش‌فرض:",
-                "Output Directory:": "مسیر خروجی:",
-                "Select Output Directory": "انتخاب مسیر خروجی",
-                "Error: Text is empty!": "خطا: متن خالی است!",
-                "Converting...": "در حال تبدیل...",
-                "Saved:": "ذخیره شد:",
-                "Ready": "آماده",
-            },
-            "zh-CN": {
-                "Main": "主要",
-                "Settings": "设置",
-                "Themes": "主题",
-                "Language": "语言",
-                "Input Text": "输入文本",
-                "Controls": "控制",
-                "Convert to Speech": "转换为语音",
-                "Save As...": "另存为...",
-                "Play": "播放",
-                "Stop": "停止",
-                "Output Format": "输出格式",
-                "Speed:": "速度:",
-                "Volume:": "音量:",
-                "Accent (TLD):": "口音 (TLD):",
-                "Slow Speech": "慢速语音",
-                "Auto Save After Conversion": "转换后自动保存",
-                "Default File Name:": "默认文件名:",
-                "Output Directory:": "输出目录:",
-                "Select Output Directory": "选择输出目录",
-                "Error: Text is empty!": "错误：文本为空！",
-                "Converting...": "正在转换...",
-                "Saved:": "已保存:",
-                "Ready": "就绪",
-            },
-            "ru": {
-                "Main": "Основное",
-                "Settings": "Настройки",
-                "Themes": "Темы",
-                "Language": "Язык",
-                "Input Text": "Входной текст",
-                "Controls": "Управление",
-                "Convert to Speech": "Преобразовать в речь",
-                "Save As...": "Сохранить как...",
-                "Play": "Воспроизвести",
-                "Stop": "Остановить",
-                "Output Format": "Формат вывода",
-                "Speed:": "Скорость:",
-                "Volume:": "Громкость:",
-                "Accent (TLD):": "Акцент (TLD):",
-                "Slow Speech": "Медленная речь",
-                "Auto Save After Conversion": "Автосохранение после конвертации",
-                "Default File Name:": "Имя файла по умолчанию:",
-                "Output Directory:": "Каталог вывода:",
-                "Select Output Directory": "Выбрать каталог",
-                "Error: Text is empty!": "Ошибка: Текст пуст!",
-                "Converting...": "Преобразование...",
-                "Saved:": "Сохранено:",
-                "Ready": "Готово",
-            },
-        }
-        return translations.get(self.current_lang, translations["en"]).get(text, text)
+        return CATALOG.get((self.current_lang, text), text)
+
+
+TRANSLATIONS = {
+    "en": {
+        "Main": "Main",
+        "Settings": "Settings",
+        "Themes": "Themes",
+        "Language": "Language",
+        "Input Text": "Input Text",
+        "Controls": "Controls",
+        "Convert to Speech": "Convert to Speech",
+        "Save As...": "Save As...",
+        "Play": "Play",
+        "Stop": "Stop",
+        "Cancel": "Cancel",
+        "Diagnostics": "Diagnostics",
+        "Pipeline Stages": "Pipeline Stages",
+        "Stage": "Stage",
+        "Count": "Count",
+        "Total (s)": "Total (s)",
+        "Mean (ms)": "Mean (ms)",
+        "Max (ms)": "Max (ms)",
+        "Counters": "Counters",
+        "Counter": "Counter",
+        "Value": "Value",
+        "Save Metrics...": "Save Metrics...",
+        "Open File...": "Open File...",
+        "Close File": "Close File",
+        "Queue": "Queue",
+        "Add to Queue": "Add to Queue",
+        "Name": "Name",
+        "Priority": "Priority",
+        "Priority:": "Priority:",
+        "Status": "Status",
+        "Progress": "Progress",
+        "Output": "Output",
+        "High": "High",
+        "Normal": "Normal",
+        "Low": "Low",
+        "Queued": "Queued",
+        "Running": "Running",
+        "Paused": "Paused",
+        "Done": "Done",
+        "Failed": "Failed",
+        "Cancelled": "Cancelled",
+        "Pause": "Pause",
+        "Resume": "Resume",
+        "Clear Finished": "Clear Finished",
+        "Parallel Jobs:": "Parallel Jobs:",
+        "Queued:": "Queued:",
+        "Text Files": "Text Files",
+        "Preview of": "Preview of",
+        "Error:": "Error:",
+        "resumed": "resumed",
+        "unchanged": "unchanged",
+        "segments": "segments",
+        "Cancelling...": "Cancelling...",
+        "Cancelled. Convert again to resume.": "Cancelled. Convert again to resume.",
+        "Output Format": "Output Format",
+        "Waveform": "Waveform",
+        "Speed:": "Speed:",
+        "Volume:": "Volume:",
+        "Accent (TLD):": "Accent (TLD):",
+        "Engine:": "Engine:",
+        "Error: Engine does not support this language!": "Error: Engine does not support this language!",
+        "Parallel Requests:": "Parallel Requests:",
+        "Slow Speech": "Slow Speech",
+        "Normalize Loudness": "Normalize Loudness",
+        "Auto Save After Conversion": "Auto Save After Conversion",
+        "Default File Name:": "Default File Name:",
+        "Output Directory:": "Output Directory:",
+        "Select Output Directory": "Select Output Directory",
+        "Error: Text is empty!": "Error: Text is empty!",
+        "Converting...": "Converting...",
+        "Saved:": "Saved:",
+        "Ready": "Ready",
+        "Cache Synthesized Audio": "Cache Synthesized Audio",
+        "Synthesize While Typing": "Synthesize While Typing",
+        "prefetched": "prefetched",
+        "Cache:": "Cache:",
+        "hits": "hits",
+        "misses": "misses",
+        "Play While Converting": "Play While Converting",
+        "Only available at normal speed without loudness normalization": "Only available at normal speed without loudness normalization",
+        "Playing...": "Playing...",
+        "first audio after": "first audio after",
+        "Sample Rate:": "Sample Rate:",
+        "Channels:": "Channels:",
+        "Original": "Original",
+        "Mono": "Mono",
+        "Stereo": "Stereo",
+        "Exporting...": "Exporting...",
+        "Export failed:": "Export failed:",
+        "Convert some text first!": "Convert some text first!",
+    },
+    "fa": {
+        "Main": "اصلی",
+        "Settings": "تنظیمات",
+        "Themes": "تم‌ها",
+        "Language": "زبان",
+        "Input Text": "متن ورودی",
+        "Controls": "کنترل‌ها",
+        "Convert to Speech": "تبدیل به گفتار",
+        "Save As...": "ذخیره با نام...",
+        "Play": "پخش",
+        "Stop": "توقف",
+        "Cancel": "لغو",
+        "Diagnostics": "عیب‌یابی",
+        "Pipeline Stages": "مراحل پردازش",
+        "Stage": "مرحله",
+        "Count": "تعداد",
+        "Total (s)": "مجموع (ثانیه)",
+        "Mean (ms)": "میانگین (میلی‌ثانیه)",
+        "Max (ms)": "بیشینه (میلی‌ثانیه)",
+        "Counters": "شمارنده‌ها",
+        "Counter": "شمارنده",
+        "Value": "مقدار",
+        "Save Metrics...": "ذخیره معیارها...",
+        "Open File...": "باز کردن فایل...",
+        "Close File": "بستن فایل",
+        "Queue": "صف",
+        "Add to Queue": "افزودن به صف",
+        "Name": "نام",
+        "Priority": "اولویت",
+        "Priority:": "اولویت:",
+        "Status": "وضعیت",
+        "Progress": "پیشرفت",
+        "Output": "خروجی",
+        "High": "بالا",
+        "Normal": "عادی",
+        "Low": "پایین",
+        "Queued": "در صف",
+        "Running": "در حال اجرا",
+        "Paused": "متوقف",
+        "Done": "انجام شد",
+        "Failed": "ناموفق",
+        "Cancelled": "لغو شد",
+        "Pause": "توقف",
+        "Resume": "ادامه",
+        "Clear Finished": "پاک کردن تمام‌شده‌ها",
+        "Parallel Jobs:": "کارهای همزمان:",
+        "Queued:": "به صف اضافه شد:",
+        "Text Files": "فایل‌های متنی",
+        "Preview of": "پیش‌نمایش",
+        "Error:": "خطا:",
+        "resumed": "ادامه از",
+        "unchanged": "بدون تغییر",
+        "segments": "بخش",
+        "Cancelling...": "در حال لغو...",
+        "Cancelled. Convert again to resume.": "لغو شد. برای ادامه دوباره تبدیل کنید.",
+        "Output Format": "فرمت خروجی",
+        "Waveform": "شکل موج",
+        "Speed:": "سرعت:",
+        "Volume:": "حجم صدا:",
+        "Accent (TLD):": "لهجه (TLD):",
+        "Engine:": "موتور گفتار:",
+        "Error: Engine does not support this language!": "خطا: موتور از این زبان پشتیبانی نمی‌کند!",
+        "Parallel Requests:": "درخواست‌های موازی:",
+        "Slow Speech": "گفتار آهسته",
+        "Normalize Loudness": "یکسان‌سازی بلندی صدا",
+        "Auto Save After Conversion": "ذخیره خودکار پس از تبدیل",
+        "Default File Name:": "نام فایل پیش‌فرض:",
+        "Output Directory:": "مسیر خروجی:",
+        "Select Output Directory": "انتخاب مسیر خروجی",
+        "Error: Text is empty!": "خطا: متن خالی است!",
+        "Converting...": "در حال تبدیل...",
+        "Saved:": "ذخیره شد:",
+        "Ready": "آماده",
+        "Cache Synthesized Audio": "ذخیره موقت صداهای ساخته‌شده",
+        "Synthesize While Typing": "ساخت صدا هنگام تایپ",
+        "prefetched": "از پیش ساخته‌شده",
+        "Cache:": "حافظه موقت:",
+        "hits": "یافته",
+        "misses": "نایافته",
+        "Play While Converting": "پخش هم‌زمان با تبدیل",
+        "Only available at normal speed without loudness normalization": "فقط با سرعت عادی و بدون یکسان‌سازی بلندی صدا",
+        "Playing...": "در حال پخش...",
+        "first audio after": "اولین صدا پس از",
+        "Sample Rate:": "نرخ نمونه‌برداری:",
+        "Channels:": "کانال‌ها:",
+        "Original": "اصلی",
+        "Mono": "مونو",
+        "Stereo": "استریو",
+        "Exporting...": "در حال خروجی گرفتن...",
+        "Export failed:": "خروجی گرفتن ناموفق بود:",
+        "Convert some text first!": "ابتدا متنی را تبدیل کنید!",
+    },
+    "zh-CN": {
+        "Main": "主要",
+        "Settings": "设置",
+        "Themes": "主题",
+        "Language": "语言",
+        "Input Text": "输入文本",
+        "Controls": "控制",
+        "Convert to Speech": "转换为语音",
+        "Save As...": "另存为...",
+        "Play": "播放",
+        "Stop": "停止",
+        "Cancel": "取消",
+        "Diagnostics": "诊断",
+        "Pipeline Stages": "处理阶段",
+        "Stage": "阶段",
+        "Count": "次数",
+        "Total (s)": "总计 (秒)",
+        "Mean (ms)": "平均 (毫秒)",
+        "Max (ms)": "最大 (毫秒)",
+        "Counters": "计数器",
+        "Counter": "计数器",
+        "Value": "值",
+        "Save Metrics...": "保存指标...",
+        "Open File...": "打开文件...",
+        "Close File": "关闭文件",
+        "Queue": "队列",
+        "Add to Queue": "加入队列",
+        "Name": "名称",
+        "Priority": "优先级",
+        "Priority:": "优先级：",
+        "Status": "状态",
+        "Progress": "进度",
+        "Output": "输出",
+        "High": "高",
+        "Normal": "普通",
+        "Low": "低",
+        "Queued": "排队中",
+        "Running": "运行中",
+        "Paused": "已暂停",
+        "Done": "完成",
+        "Failed": "失败",
+        "Cancelled": "已取消",
+        "Pause": "暂停",
+        "Resume": "继续",
+        "Clear Finished": "清除已完成",
+        "Parallel Jobs:": "并行任务：",
+        "Queued:": "已加入队列：",
+        "Text Files": "文本文件",
+        "Preview of": "预览",
+        "Error:": "错误:",
+        "resumed": "已恢复",
+        "unchanged": "未更改",
+        "segments": "个片段",
+        "Cancelling...": "正在取消...",
+        "Cancelled. Convert again to resume.": "已取消。再次转换即可继续。",
+        "Output Format": "输出格式",
+        "Waveform": "波形",
+        "Speed:": "速度:",
+        "Volume:": "音量:",
+        "Accent (TLD):": "口音 (TLD):",
+        "Engine:": "语音引擎:",
+        "Error: Engine does not support this language!": "错误：引擎不支持此语言！",
+        "Parallel Requests:": "并行请求数:",
+        "Slow Speech": "慢速语音",
+        "Normalize Loudness": "响度标准化",
+        "Auto Save After Conversion": "转换后自动保存",
+        "Default File Name:": "默认文件名:",
+        "Output Directory:": "输出目录:",
+        "Select Output Directory": "选择输出目录",
+        "Error: Text is empty!": "错误：文本为空！",
+        "Converting...": "正在转换...",
+        "Saved:": "已保存:",
+        "Ready": "就绪",
+        "Cache Synthesized Audio": "缓存已合成的音频",
+        "Synthesize While Typing": "输入时提前合成",
+        "prefetched": "已预先合成",
+        "Cache:": "缓存:",
+        "hits": "命中",
+        "misses": "未命中",
+        "Play While Converting": "边转换边播放",
+        "Only available at normal speed without loudness normalization": "仅在正常语速且未启用响度标准化时可用",
+        "Playing...": "正在播放...",
+        "first audio after": "首段音频用时",
+        "Sample Rate:": "采样率:",
+        "Channels:": "声道:",
+        "Original": "原始",
+        "Mono": "单声道",
+        "Stereo": "立体声",
+        "Exporting...": "正在导出...",
+        "Export failed:": "导出失败：",
+        "Convert some text first!": "请先转换文本！",
+    },
+    "ru": {
+        "Main": "Основное",
+        "Settings": "Настройки",
+        "Themes": "Темы",
+        "Language": "Язык",
+        "Input Text": "Входной текст",
+        "Controls": "Управление",
+        "Convert to Speech": "Преобразовать в речь",
+        "Save As...": "Сохранить как...",
+        "Play": "Воспроизвести",
+        "Stop": "Остановить",
+        "Cancel": "Отмена",
+        "Diagnostics": "Диагностика",
+        "Pipeline Stages": "Этапы обработки",
+        "Stage": "Этап",
+        "Count": "Количество",
+        "Total (s)": "Всего (с)",
+        "Mean (ms)": "Среднее (мс)",
+        "Max (ms)": "Максимум (мс)",
+        "Counters": "Счётчики",
+        "Counter": "Счётчик",
+        "Value": "Значение",
+        "Save Metrics...": "Сохранить метрики...",
+        "Open File...": "Открыть файл...",
+        "Close File": "Закрыть файл",
+        "Queue": "Очередь",
+        "Add to Queue": "Добавить в очередь",
+        "Name": "Имя",
+        "Priority": "Приоритет",
+        "Priority:": "Приоритет:",
+        "Status": "Статус",
+        "Progress": "Прогресс",
+        "Output": "Вывод",
+        "High": "Высокий",
+        "Normal": "Обычный",
+        "Low": "Низкий",
+        "Queued": "В очереди",
+        "Running": "Выполняется",
+        "Paused": "Приостановлено",
+        "Done": "Готово",
+        "Failed": "Ошибка",
+        "Cancelled": "Отменено",
+        "Pause": "Пауза",
+        "Resume": "Продолжить",
+        "Clear Finished": "Очистить завершённые",
+        "Parallel Jobs:": "Параллельные задания:",
+        "Queued:": "Добавлено в очередь:",
+        "Text Files": "Текстовые файлы",
+        "Preview of": "Предпросмотр",
+        "Error:": "Ошибка:",
+        "resumed": "продолжено",
+        "unchanged": "без изменений",
+        "segments": "фрагментов",
+        "Cancelling...": "Отмена...",
+        "Cancelled. Convert again to resume.": "Отменено. Запустите снова, чтобы продолжить.",
+        "Output Format": "Формат вывода",
+        "Waveform": "Форма волны",
+        "Speed:": "Скорость:",
+        "Volume:": "Громкость:",
+        "Accent (TLD):": "Акцент (TLD):",
+        "Engine:": "Движок:",
+        "Error: Engine does not support this language!": "Ошибка: движок не поддерживает этот язык!",
+        "Parallel Requests:": "Параллельные запросы:",
+        "Slow Speech": "Медленная речь",
+        "Normalize Loudness": "Нормализовать громкость",
+        "Auto Save After Conversion": "Автосохранение после конвертации",
+        "Default File Name:": "Имя файла по умолчанию:",
+        "Output Directory:": "Каталог вывода:",
+        "Select Output Directory": "Выбрать каталог",
+        "Error: Text is empty!": "Ошибка: Текст пуст!",
+        "Converting...": "Преобразование...",
+        "Saved:": "Сохранено:",
+        "Ready": "Готово",
+        "Cache Synthesized Audio": "Кэшировать синтезированный звук",
+        "Synthesize While Typing": "Синтезировать во время набора",
+        "prefetched": "заранее синтезировано",
+        "Cache:": "Кэш:",
+        "hits": "попаданий",
+        "misses": "промахов",
+        "Play While Converting": "Воспроизводить во время конвертации",
+        "Only available at normal speed without loudness normalization": "Доступно только при обычной скорости без нормализации громкости",
+        "Playing...": "Воспроизведение...",
+        "first audio after": "первый звук через",
+        "Sample Rate:": "Частота дискретизации:",
+        "Channels:": "Каналы:",
+        "Original": "Исходная",
+        "Mono": "Моно",
+        "Stereo": "Стерео",
+        "Exporting...": "Экспорт...",
+        "Export failed:": "Ошибка экспорта:",
+        "Convert some text first!": "Сначала преобразуйте текст!",
+    },
+}
+
+# Flat (language, text) -> translation table, built once at import. Strings
+# a language lacks fall back to English here rather than on every lookup.
+CATALOG = {
+    (lang, text): table.get(text, english)
+    for lang, table in TRANSLATIONS.items()
+    for text, english in TRANSLATIONS["en"].items()
+}
 
 
 if __name__ == "__main__":
@@ -0,0 +1,222 @@
+import re
+import math
+import time
+import base64
+import random
+import shutil
+import functools
+import threading
+import subprocess
+import urllib.parse
+from collections import Counter
+
+# Google Translate domains gTTS documents as accents. The TLD becomes part
+# of a host name, so no other value is ever put into a request URL.
+GOOGLE_TLDS = ("com", "com.au", "co.uk", "us", "ca", "co.in", "ie", "co.za", "com.ng", "com.br", "pt", "es",
+               "com.mx", "fr")
+
+
+@functools.lru_cache(maxsize=None)
+def gtts_languages():
+    # The language table is only loaded on first use
+    from gtts.lang import tts_langs
+    return tts_langs()
+
+
+class SynthesisError(Exception):
+    pass
+
+
+# The provider asked for fewer requests. Retried without using up the
+# retry budget; the governor holds the retry back as long as it has to.
+class Throttled(SynthesisError):
+    def __init__(self, message, retry_after=None):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+# An "Other Languages" entry of `espeak-ng --voices`, like "(en 2)"; the
+# voice with the lowest number is the one a bare "-v en" picks
+ESPEAK_ALIAS = re.compile(r"\(([^\s()]+) +(\d+)\)")
+
+
+@functools.lru_cache(maxsize=None)
+def espeak_voices(binary):
+    output = subprocess.run([binary, "--voices"], capture_output=True, text=True).stdout
+    voices = {}
+    aliases = {}
+    for line in output.splitlines()[1:]:
+        fields = line.split()
+        if len(fields) >= 4:
+            voices[fields[1]] = fields[3]
+            for alias, priority in ESPEAK_ALIAS.findall(" ".join(fields[5:])):
+                aliases.setdefault(alias, []).append((int(priority), fields[3]))
+    # espeak-ng has no plain "en" voice, only aliases of en-gb and others
+    for alias, names in aliases.items():
+        voices.setdefault(alias, min(names)[1])
+    return voices
+
+
+# Google Translate's TTS endpoint (online). gTTS only builds the request
+# bodies; they are sent through the shared asyncio HTTP client, which keeps
+# a pool of keep-alive connections per TLD instead of the new session, and
+# so new TCP/TLS handshake, gTTS opens for every request. Requests to each
+# TLD host go through the shared rate governor, which finds out how much
+# load the host accepts instead of failing the conversion on HTTP 429.
+class GTTSProvider:
+    name = "gtts"
+    label = "Google (online)"
+    format = "mp3"
+    PATH = "_/TranslateWebserverUi/data/batchexecute"
+    AUDIO = re.compile(r'jQ1olc","\[\\"(.*)\\"]')
+
+    def __init__(self, client=None, base_url=None, governor=None):
+        self.client = client
+        self.governor = governor
+        # Points every TLD at another server, e.g. a local stand-in
+        self.base_url = base_url
+
+    def available(self):
+        return True
+
+    def languages(self):
+        return gtts_languages()
+
+    def url(self, tld):
+        base = self.base_url or f"https://translate.google.{tld}"
+        return f"{base.rstrip('/')}/{self.PATH}"
+
+    def synthesize(self, text, lang, tld="com", cancelled=None):
+        if tld not in GOOGLE_TLDS:
+            raise SynthesisError(f"Unknown Google TLD: {tld}")
+        # gTTS pulls in requests, so it is only imported once synthesis starts
+        from gtts import gTTS
+        import asyncio
+        from tts_http import shared_client, HTTPError
+        from tts_governor import shared_governor, parse_retry_after, THROTTLE_STATUSES
+        if self.client is None:
+            self.client = shared_client()
+        if self.governor is None:
+            self.governor = shared_governor()
+        tts = gTTS(text=text, lang=lang, tld=tld)
+        bodies = [body.encode("utf-8") for body in tts.get_bodies()]
+        url = self.url(tld)
+        # Waits for the host end early when the conversion is cancelled
+        with self.governor.slot(urllib.parse.urlsplit(url).netloc, cancelled) as slot:
+            try:
+                # A text gTTS splits into several tokens is requested all at once
+                responses = self.client.post_all(url, bodies, headers=tts.GOOGLE_TTS_HEADERS)
+            except HTTPError as e:
+                status = e.response.status
+                if status in THROTTLE_STATUSES:
+                    retry_after = parse_retry_after(e.response.headers.get("retry-after"))
+                    slot.throttled(retry_after)
+                    raise Throttled(str(e), retry_after) from e
+                if status >= 500:
+                    slot.failed()
+                raise
+            except (OSError, asyncio.TimeoutError, asyncio.IncompleteReadError):
+                slot.failed()
+                raise
+        return b"".join(self.decode(response.body) for response in responses)
+
+    def decode(self, body):
+        for line in body.decode("utf-8").splitlines():
+            if "jQ1olc" in line:
+                match = self.AUDIO.search(line)
+                if match:
+                    return base64.b64decode(match.group(1).encode("ascii"))
+                break
+        raise SynthesisError("No audio in the TTS response")
+
+
+# Local espeak-ng binary (offline). Produces WAV, which the engine encodes
+# to MP3 so it can be merged like any other segment.
+class EspeakProvider:
+    name = "espeak"
+    label = "eSpeak NG (offline)"
+    format = "wav"
+    VOICES = {"zh-CN": "cmn", "zh-TW": "yue", "zh": "cmn"}
+
+    def binary(self):
+        return shutil.which("espeak-ng") or shutil.which("espeak")
+
+    def available(self):
+        return self.binary() is not None
+
+    def languages(self):
+        if not self.available():
+            return {}
+        voices = dict(espeak_voices(self.binary()))
+        for lang, voice in self.VOICES.items():
+            if voice in voices:
+                voices[lang] = voices[voice]
+        return voices
+
+    def synthesize(self, text, lang, tld="com", cancelled=None):
+        result = subprocess.run(
+            [self.binary(), "-v", self.VOICES.get(lang, lang), "--stdout", "--stdin"],
+            # On the command line, text starting with "-" reads as an option
+            input=text.encode("utf-8"), capture_output=True, check=True
+        )
+        return result.stdout
+
+
+# Deterministic offline stand-in that needs nothing beyond the standard
+# library: returns silent MPEG-2 Layer III frames (24 kHz mono, 32 kbps,
+# like gTTS) whose duration scales with the text length. Latency jitter and
+# failures are drawn from the seed, the text and how often that text was
+# requested, so a run behaves the same whatever order threads call in.
+class StubProvider:
+    name = "stub"
+    label = "Silent test engine (offline)"
+    format = "mp3"
+    FRAME = b"\xff\xf3\x44\xc4" + bytes(92)
+    FRAME_SECONDS = 576 / 24000
+    SECONDS_PER_CHAR = 0.06
+
+    def __init__(self, latency=0.0, jitter=0.0, failure_rate=0.0, seed=0, seconds_per_char=SECONDS_PER_CHAR):
+        self.latency = latency
+        self.jitter = jitter
+        self.failure_rate = failure_rate
+        self.seed = seed
+        self.seconds_per_char = seconds_per_char
+        self.calls = Counter()
+        self.lock = threading.Lock()
+
+    def available(self):
+        return True
+
+    def languages(self):
+        return {"en": "English", "fa": "Persian", "zh-CN": "Chinese (Mandarin)", "ru": "Russian"}
+
+    def synthesize(self, text, lang, tld="com", cancelled=None):
+        attempt = 0
+        if self.failure_rate:
+            # Retries of a text must not be doomed to repeat its failure
+            with self.lock:
+                self.calls[text] += 1
+                attempt = self.calls[text]
+        rng = random.Random(f"{self.seed}\0{attempt}\0{text}")
+        delay = self.latency + self.jitter * (2 * rng.random() - 1)
+        if delay > 0:
+            time.sleep(delay)
+        if rng.random() < self.failure_rate:
+            raise SynthesisError("Simulated engine failure")
+        frames = max(1, math.ceil(len(text) * self.seconds_per_char / self.FRAME_SECONDS))
+        return self.FRAME * frames
+
+
+PROVIDERS = {
+    GTTSProvider.name: GTTSProvider,
+    EspeakProvider.name: EspeakProvider,
+    StubProvider.name: StubProvider,
+}
+DEFAULT_PROVIDER = GTTSProvider.name
+
+
+def get_provider(name=DEFAULT_PROVIDER):
+    try:
+        return PROVIDERS[name]()
+    except KeyError:
+        raise ValueError(f"Unknown engine: {name}")
@@ -0,0 +1,105 @@
+import re
+from collections import namedtuple
+
+# gTTS sends at most this many characters per request
+MAX_CHARS = 100
+
+# Sentence and clause punctuation for the UI languages (en, fa, zh-CN, ru)
+SENTENCE_END = ".!?…。！？؟۔"
+CLAUSE_END = ",;:،؛，、；：—"
+DELIMITERS = SENTENCE_END + CLAUSE_END
+
+# A single line break is whitespace, so hard-wrapped text still packs
+# across lines; a blank line ends a paragraph and is a piece of its own
+PIECE = re.compile(r"(?:[^{0}\n]+|\n(?!\s*\n))+[{0}]*|[{0}]+|(?P<paragraph>\n\s*\n)".format(re.escape(DELIMITERS)))
+WORD_CHAR = re.compile(r"\w")
+
+Segment = namedtuple("Segment", "offset text")
+
+
+def make_segment(text, start, end, base):
+    raw = text[start:end]
+    stripped = raw.strip()
+    # Punctuation-only runs would make the provider reject the request
+    if not WORD_CHAR.search(stripped):
+        return None
+    # Same length, so offsets into the text still hold
+    return Segment(base + start + len(raw) - len(raw.lstrip()), stripped.replace("\n", " "))
+
+
+def split_long(text, start, end, base, limit):
+    # Split a piece without punctuation at whitespace, hard-cutting words
+    # that are longer than the limit. Returns where the remainder starts.
+    pos = start
+    while end - pos > limit:
+        cut = text.rfind(" ", pos + 1, pos + limit + 1)
+        if cut < 0:
+            cut = pos + limit
+        segment = make_segment(text, pos, cut, base)
+        if segment:
+            yield segment
+        pos = cut
+    return pos
+
+
+def pack(text, base, limit, final):
+    # Greedily pack punctuation-delimited pieces into segments of at most
+    # `limit` characters. A segment always ends with its paragraph, so an
+    # edit only changes the segments of the paragraph it touches and the
+    # rest keep their audio. Returns where the unflushed remainder starts.
+    seg_start = seg_end = 0
+    # Before the last block, a piece running into trailing whitespace may
+    # still grow or lose its line break to a blank line, so it is left for
+    # the next block; only a long run is cut up to its last word character
+    tail = len(text.rstrip())
+    for match in PIECE.finditer(text):
+        piece_start, piece_end = match.span()
+        if not final and piece_end >= tail:
+            if match.lastgroup != "paragraph" and tail - piece_start > limit:
+                if seg_end > seg_start:
+                    segment = make_segment(text, seg_start, seg_end, base)
+                    if segment:
+                        yield segment
+                seg_start = yield from split_long(text, piece_start, tail, base, limit)
+            return seg_start
+        if match.lastgroup == "paragraph":
+            # A blank line: the next paragraph starts a segment
+            if seg_end > seg_start:
+                segment = make_segment(text, seg_start, seg_end, base)
+                if segment:
+                    yield segment
+            seg_start = seg_end = piece_end
+            continue
+        if piece_end - seg_start > limit:
+            if seg_end > seg_start:
+                segment = make_segment(text, seg_start, seg_end, base)
+                if segment:
+                    yield segment
+            seg_start = piece_start
+            if piece_end - piece_start > limit:
+                seg_start = yield from split_long(text, piece_start, piece_end, base, limit)
+        seg_end = piece_end
+    if final and seg_end > seg_start:
+        segment = make_segment(text, seg_start, seg_end, base)
+        if segment:
+            yield segment
+        seg_start = seg_end
+    return seg_start
+
+
+def iter_segments(blocks, limit=MAX_CHARS):
+    # Lazily segment an iterable of text blocks in a single pass. Text after
+    # the last settled piece of a block is carried into the next one, so
+    # block boundaries never affect where segments are cut.
+    pending = ""
+    offset = 0
+    for block in blocks:
+        text = pending + block
+        consumed = yield from pack(text, offset, limit, final=False)
+        pending = text[consumed:]
+        offset += consumed
+    yield from pack(pending, offset, limit, final=True)
+
+
+def segment_text(text, limit=MAX_CHARS):
+    return iter_segments((text,), limit)
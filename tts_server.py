@@ -0,0 +1,446 @@
+import os
+import sys
+import json
+import time
+import uuid
+import queue
+import shutil
+import hashlib
+import argparse
+import tempfile
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from tts_engine import Conversion, ConversionCancelled, DEFAULT_WORKERS, MAX_WORKERS
+from tts_cache import SegmentCache, DEFAULT_CACHE_DIR, normalize_text
+from tts_providers import PROVIDERS, DEFAULT_PROVIDER, GOOGLE_TLDS, get_provider
+from tts_metrics import Metrics
+from tts_mp3 import audio_span, read_source, remove_files
+
+DEFAULT_PORT = 8765
+MAX_TEXT_CHARS = 1000 * 1000
+STREAM_BLOCK = 64 * 1024
+HISTORY = 256
+RETRY_AFTER = 1
+CONTENT_TYPES = {"mp3": "audio/mpeg", "wav": "audio/wav", "ogg": "audio/ogg", "flac": "audio/flac"}
+FINISHED = ("done", "failed", "cancelled")
+
+
+class Saturated(Exception):
+    pass
+
+
+def request_key(text, lang, tld, speed, fmt, engine):
+    # Requests with the same key would produce the same audio
+    raw = "\0".join([normalize_text(text), lang, tld, repr(float(speed)), fmt, engine])
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()[:32]
+
+
+# One synthesis, shared by every request that asked for the same audio.
+# Audio is appended to a spool file as segments are merged, and readers
+# follow it from their own offset, so late joiners get the whole stream.
+class ServiceJob:
+    def __init__(self, key, text, lang, tld, speed, fmt, directory):
+        # Every job gets its own id and files, so a new job for the same
+        # key never writes into audio an earlier job is still streaming
+        self.id = uuid.uuid4().hex
+        self.key = key
+        self.text = text
+        self.lang = lang
+        self.tld = tld
+        self.speed = speed
+        self.format = fmt
+        self.output_file = os.path.join(directory, f"{self.id}.{fmt}")
+        self.path = os.path.join(directory, f"{self.id}.stream.{fmt}")
+        self.size = 0
+        self.status = "queued"
+        self.progress = 0
+        self.error = None
+        self.waiters = 0
+        self.requests = 0
+        self.chars = 0
+        self.segments = 0
+        self.created = time.time()
+        self.seconds = None
+        self.conversion = None
+        self.cond = threading.Condition()
+
+    def finished(self):
+        return self.status in FINISHED
+
+    def append_segment(self, segment):
+        # Raw MP3 frames concatenate into a playable stream; tags and info
+        # frames of the single segments are left out
+        data = read_source(segment)
+        start, end = audio_span(data)
+        with open(self.path, "ab") as f:
+            f.write(memoryview(data)[start:end])
+        with self.cond:
+            self.size += end - start
+            self.cond.notify_all()
+
+    def set_progress(self, value):
+        self.progress = value
+
+    def finish(self, status, error=None):
+        with self.cond:
+            self.status = status
+            self.error = error
+            self.seconds = round(time.time() - self.created, 3)
+            if status == "done":
+                self.progress = 100
+            self.cond.notify_all()
+
+    def chunks(self, offset=0):
+        while True:
+            with self.cond:
+                while self.size <= offset and not self.finished():
+                    self.cond.wait()
+                size, path, status = self.size, self.path, self.status
+            if size > offset:
+                with open(path, "rb") as f:
+                    f.seek(offset)
+                    data = f.read(min(size - offset, STREAM_BLOCK))
+                offset += len(data)
+                yield data
+            elif status != "done":
+                raise RuntimeError(self.error or status)
+            else:
+                return
+
+    def wait_started(self):
+        # Until the first audio arrives the response can still be an error
+        with self.cond:
+            while not self.size and not self.finished():
+                self.cond.wait()
+
+    def info(self):
+        return {
+            "id": self.id,
+            "status": self.status,
+            "progress": self.progress,
+            "lang": self.lang,
+            "tld": self.tld,
+            "speed": self.speed,
+            "format": self.format,
+            "chars": self.chars,
+            "segments": self.segments,
+            "bytes": self.size,
+            "waiters": self.waiters,
+            "requests": self.requests,
+            "seconds": self.seconds,
+            "error": self.error,
+        }
+
+
+# The engine behind the HTTP endpoints. Identical requests in flight are
+# coalesced into one job; distinct ones wait in a bounded queue for one of
+# `max_jobs` runners, and requests beyond that are refused with Saturated
+# instead of piling up in memory.
+class SynthesisService:
+    def __init__(self, provider=None, cache=None, workers=DEFAULT_WORKERS, max_jobs=2, queue_size=8,
+                 max_waiters=64, directory=None, metrics=None):
+        self.provider = provider or get_provider()
+        self.cache = cache
+        self.workers = workers
+        self.max_waiters = max_waiters
+        self.directory = directory or tempfile.mkdtemp(prefix="tts_server_")
+        os.makedirs(self.directory, exist_ok=True)
+        self.metrics = metrics or Metrics()
+        self.executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="tts-synth")
+        self.pending = queue.Queue(maxsize=queue_size)
+        self.lock = threading.Lock()
+        self.in_flight = {}
+        self.history = OrderedDict()
+        self.waiters = 0
+        self.running = 0
+        self.runners = [threading.Thread(target=self.run_jobs, daemon=True) for _ in range(max(1, max_jobs))]
+        for runner in self.runners:
+            runner.start()
+
+    def submit(self, text, lang="en", tld="com", speed=1.0, fmt="mp3"):
+        key = request_key(text, lang, tld, speed, fmt, self.provider.name)
+        with self.lock:
+            if self.waiters >= self.max_waiters:
+                raise Saturated("too many open requests")
+            job = self.in_flight.get(key)
+            # A job that just finished may already have dropped its audio
+            if job is not None and job.finished():
+                job = None
+            coalesced = job is not None
+            if job is None:
+                job = ServiceJob(key, text, lang, tld, speed, fmt, self.directory)
+                try:
+                    self.pending.put_nowait(job)
+                except queue.Full:
+                    raise Saturated("synthesis queue is full") from None
+                self.in_flight[key] = job
+                self.remember(job)
+            job.waiters += 1
+            job.requests += 1
+            self.waiters += 1
+        self.metrics.count("coalesced" if coalesced else "requests")
+        return job, coalesced
+
+    def release(self, job):
+        # Called once per submit, when its response is over. A job nobody
+        # waits for any more is cancelled; finished ones drop their audio.
+        with self.lock:
+            job.waiters -= 1
+            self.waiters -= 1
+            if job.waiters:
+                return
+            if not job.finished():
+                self.forget(job)
+                if job.conversion is not None:
+                    # The runner discards it once the conversion stops
+                    job.conversion.cancel()
+                    return
+                job.finish("cancelled")
+        self.discard(job)
+
+    def forget(self, job):
+        # A newer job for the same key may have taken its place already
+        if self.in_flight.get(job.key) is job:
+            del self.in_flight[job.key]
+
+    def remember(self, job):
+        self.history[job.id] = job
+        self.history.move_to_end(job.id)
+        while len(self.history) > HISTORY:
+            self.history.popitem(last=False)
+
+    def discard(self, job):
+        job.text = None
+        remove_files((job.path, job.output_file))
+
+    def job(self, job_id):
+        with self.lock:
+            return self.history.get(job_id)
+
+    def run_jobs(self):
+        while True:
+            job = self.pending.get()
+            if job is None:
+                return
+            with self.lock:
+                if job.finished():
+                    continue
+                job.conversion = Conversion(job.text, job.lang, job.output_file, tld=job.tld,
+                                            workers=self.workers, cache=self.cache, provider=self.provider,
+                                            executor=self.executor, speed=job.speed, metrics=self.metrics,
+                                            write_index=False)
+                job.status = "running"
+                self.running += 1
+            self.convert(job)
+            with self.lock:
+                self.running -= 1
+                self.forget(job)
+                idle = not self.running and self.pending.empty()
+                orphaned = not job.waiters
+                # Eviction only runs with nothing in flight, so no segment
+                # handed out to a running job disappears under it
+                if idle and self.cache is not None:
+                    self.cache.trim()
+            if orphaned:
+                self.discard(job)
+
+    def convert(self, job):
+        conversion = job.conversion
+        # Without a DSP/export stage the merged frames are the final audio
+        # and can be streamed while later segments are still synthesized
+        streaming = not conversion.needs_export()
+        try:
+            conversion.run(on_progress=job.set_progress, on_segment=job.append_segment if streaming else None)
+            job.chars, job.segments = conversion.total_chars, conversion.segments
+            if streaming:
+                remove_files((job.output_file,))
+            else:
+                with job.cond:
+                    job.path, job.size = job.output_file, os.path.getsize(job.output_file)
+            job.finish("done")
+        except ConversionCancelled:
+            job.finish("cancelled")
+        except Exception as e:
+            job.finish("failed", str(e))
+
+    def close(self):
+        while True:
+            try:
+                job = self.pending.get_nowait()
+            except queue.Empty:
+                break
+            if job is not None:
+                job.finish("cancelled")
+        for _ in self.runners:
+            self.pending.put(None)
+        with self.lock:
+            for job in self.in_flight.values():
+                if job.conversion is not None:
+                    job.conversion.cancel()
+        for runner in self.runners:
+            runner.join()
+        self.executor.shutdown(wait=False)
+        shutil.rmtree(self.directory, ignore_errors=True)
+
+
+class RequestHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    server_version = "TTSPro"
+
+    def log_message(self, format, *args):
+        if not self.server.quiet:
+            super().log_message(format, *args)
+
+    def send_json(self, status, data, headers=None):
+        body = json.dumps(data, ensure_ascii=False).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        path = self.path.split("?", 1)[0]
+        if path.startswith("/jobs/"):
+            job = self.server.service.job(path[len("/jobs/"):])
+            if job is None:
+                self.send_json(404, {"error": "unknown job"})
+            else:
+                self.send_json(200, job.info())
+        elif path == "/metrics":
+            body = self.server.service.metrics.to_prometheus().encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", "text/plain; version=0.0.4")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+        else:
+            self.send_json(404, {"error": "not found"})
+
+    def read_request(self):
+        length = int(self.headers.get("Content-Length") or 0)
+        if length > MAX_TEXT_CHARS * 4:
+            raise ValueError("request too large")
+        request = json.loads(self.rfile.read(length) or b"{}")
+        text = str(request.get("text") or "").strip()
+        if not text:
+            raise ValueError("text is empty")
+        if len(text) > MAX_TEXT_CHARS:
+            raise ValueError(f"text is longer than {MAX_TEXT_CHARS} characters")
+        lang = str(request.get("lang", "en"))
+        if lang not in self.server.service.provider.languages():
+            raise ValueError(f"unsupported language: {lang}")
+        speed = float(request.get("speed", 1.0))
+        if not 0.5 <= speed <= 2.0:
+            raise ValueError("speed must be between 0.5 and 2.0")
+        fmt = str(request.get("format", "mp3"))
+        if fmt not in CONTENT_TYPES:
+            raise ValueError(f"unsupported format: {fmt}")
+        tld = str(request.get("tld", "com"))
+        if tld not in GOOGLE_TLDS:
+            raise ValueError(f"unsupported tld: {tld}")
+        return text, lang, tld, speed, fmt
+
+    def do_POST(self):
+        if self.path.split("?", 1)[0] != "/synthesize":
+            self.send_json(404, {"error": "not found"})
+            return
+        try:
+            text, lang, tld, speed, fmt = self.read_request()
+        except (ValueError, TypeError) as e:
+            self.send_json(400, {"error": str(e)})
+            return
+        service = self.server.service
+        try:
+            job, coalesced = service.submit(text, lang, tld, speed, fmt)
+        except Saturated as e:
+            self.close_connection = True
+            self.send_json(503, {"error": str(e)}, {"Retry-After": str(RETRY_AFTER)})
+            return
+        try:
+            self.stream(job, coalesced)
+        finally:
+            service.release(job)
+
+    def stream(self, job, coalesced):
+        job.wait_started()
+        if job.status in ("failed", "cancelled"):
+            self.send_json(500, {"error": job.error or job.status, "job": job.id})
+            return
+        self.send_response(200)
+        self.send_header("Content-Type", CONTENT_TYPES[job.format])
+        self.send_header("Transfer-Encoding", "chunked")
+        self.send_header("X-Job-Id", job.id)
+        self.send_header("X-Coalesced", "1" if coalesced else "0")
+        self.end_headers()
+        try:
+            for data in job.chunks():
+                self.wfile.write(f"{len(data):X}\r\n".encode("ascii") + data + b"\r\n")
+            self.wfile.write(b"0\r\n\r\n")
+        except (BrokenPipeError, ConnectionResetError):
+            self.close_connection = True
+        except RuntimeError:
+            # Headers are gone; a stream cut without its last chunk tells
+            # the client the audio is incomplete
+            self.close_connection = True
+
+
+class TTSServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address, service, quiet=False):
+        super().__init__(address, RequestHandler)
+        self.service = service
+        self.quiet = quiet
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(
+        description="Serve text-to-speech over HTTP on this machine."
+    )
+    parser.add_argument("--host", default="127.0.0.1", help="address to listen on (default: 127.0.0.1)")
+    parser.add_argument("-p", "--port", type=int, default=DEFAULT_PORT, help=f"port (default: {DEFAULT_PORT})")
+    parser.add_argument("-e", "--engine", default=DEFAULT_PROVIDER, choices=sorted(PROVIDERS),
+                        help=f"synthesis engine (default: {DEFAULT_PROVIDER})")
+    parser.add_argument("-w", "--workers", type=int, default=DEFAULT_WORKERS,
+                        help="synthesis requests in flight, shared by all jobs")
+    parser.add_argument("-j", "--jobs", type=int, default=2, help="distinct texts synthesized at once")
+    parser.add_argument("--queue-size", type=int, default=8,
+                        help="distinct texts waiting for a free job before requests get 503")
+    parser.add_argument("--max-waiters", type=int, default=64,
+                        help="open synthesize requests, coalesced ones included, before requests get 503")
+    parser.add_argument("--cache-dir", default=DEFAULT_CACHE_DIR, help="segment cache directory")
+    parser.add_argument("--no-cache", action="store_true", help="disable the segment cache")
+    parser.add_argument("-q", "--quiet", action="store_true", help="do not log requests")
+    return parser
+
+
+def main(argv=None):
+    parser = build_parser()
+    args = parser.parse_args(argv)
+    provider = get_provider(args.engine)
+    if not provider.available():
+        parser.error(f"engine not available: {args.engine}")
+    service = SynthesisService(provider=provider,
+                               cache=None if args.no_cache else SegmentCache(args.cache_dir),
+                               workers=max(1, min(args.workers, MAX_WORKERS)), max_jobs=args.jobs,
+                               queue_size=max(1, args.queue_size), max_waiters=max(1, args.max_waiters))
+    server = TTSServer((args.host, args.port), service, quiet=args.quiet)
+    print(f"Serving on http://{args.host}:{server.server_address[1]}", file=sys.stderr)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        service.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,163 @@
+import os
+import re
+import codecs
+import hashlib
+from html.parser import HTMLParser
+
+READ_BYTES = 64 * 1024
+PREVIEW_CHARS = 20000
+MARKDOWN_EXTENSIONS = (".md", ".markdown")
+HTML_EXTENSIONS = (".html", ".htm", ".xhtml")
+TEXT_EXTENSIONS = (".txt",) + MARKDOWN_EXTENSIONS + HTML_EXTENSIONS
+
+MD_FENCE = re.compile(r"^\s*(```|~~~)")
+MD_RULE = re.compile(r"^\s*([-*_]\s*){3,}$")
+MD_PREFIX = re.compile(r"^\s*(#{1,6}\s+|>\s?|[-*+]\s+|\d+[.)]\s+)+")
+MD_IMAGE = re.compile(r"!\[([^\]]*)\]\([^)]*\)")
+MD_LINK = re.compile(r"\[([^\]]*)\]\([^)]*\)")
+MD_TAG = re.compile(r"<[^>]+>")
+MD_MARKS = re.compile(r"[*_`~]+")
+
+
+# Markdown to plain text, one line at a time. Only what would be read out
+# is kept: no fenced code, rules, list or heading markers, link targets or
+# emphasis marks.
+class MarkdownStripper:
+    def __init__(self):
+        self.partial = ""
+        self.in_code = False
+
+    def line(self, line):
+        if MD_FENCE.match(line):
+            self.in_code = not self.in_code
+            return ""
+        if self.in_code or MD_RULE.match(line):
+            return ""
+        line = MD_PREFIX.sub("", line)
+        line = MD_LINK.sub(r"\1", MD_IMAGE.sub(r"\1", line))
+        return MD_MARKS.sub("", MD_TAG.sub("", line))
+
+    def feed(self, text):
+        lines = (self.partial + text).split("\n")
+        self.partial = lines.pop()
+        return "".join(self.line(line) + "\n" for line in lines)
+
+    def close(self):
+        text, self.partial = self.line(self.partial), ""
+        return text
+
+
+# HTML to plain text. Block-level tags end a line so the segmenter still
+# sees paragraph breaks; script and style contents are dropped.
+class HTMLStripper(HTMLParser):
+    BLOCKS = {"p", "br", "div", "li", "tr", "h1", "h2", "h3", "h4", "h5", "h6",
+              "blockquote", "section", "article", "title", "pre"}
+    HIDDEN = {"script", "style", "head"}
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.parts = []
+        self.hidden = 0
+
+    def handle_starttag(self, tag, attrs):
+        if tag in self.HIDDEN:
+            self.hidden += 1
+        elif tag in self.BLOCKS:
+            self.parts.append("\n")
+
+    def handle_endtag(self, tag):
+        if tag in self.HIDDEN:
+            self.hidden = max(0, self.hidden - 1)
+        elif tag in self.BLOCKS:
+            self.parts.append("\n")
+
+    def handle_data(self, data):
+        if not self.hidden:
+            self.parts.append(data)
+
+    def take(self):
+        text = "".join(self.parts)
+        self.parts = []
+        return text
+
+    def feed(self, text):
+        super().feed(text)
+        return self.take()
+
+    def close(self):
+        super().close()
+        return self.take()
+
+
+class PlainText:
+    def feed(self, text):
+        return text
+
+    def close(self):
+        return ""
+
+
+def stripper_for(path):
+    name = path.lower()
+    if name.endswith(MARKDOWN_EXTENSIONS):
+        return MarkdownStripper()
+    if name.endswith(HTML_EXTENSIONS):
+        return HTMLStripper()
+    return PlainText()
+
+
+# A text document read lazily from disk. blocks() decodes and strips it a
+# fixed-size chunk at a time, so a conversion never holds more than one
+# chunk of the file in memory, however large the file is.
+class TextFile:
+    def __init__(self, path, encoding="utf-8-sig", read_bytes=READ_BYTES):
+        self.path = path
+        self.name = os.path.basename(path)
+        self.encoding = encoding
+        self.read_bytes = read_bytes
+        self.size = os.path.getsize(path)
+        self.chars = None
+        self.digest = None
+        # Characters preview() dropped from the start of the text
+        self.preview_lead = 0
+
+    def blocks(self):
+        decoder = codecs.getincrementaldecoder(self.encoding)(errors="replace")
+        stripper = stripper_for(self.path)
+        with open(self.path, "rb") as f:
+            while True:
+                data = f.read(self.read_bytes)
+                text = stripper.feed(decoder.decode(data, final=not data))
+                if text:
+                    yield text
+                if not data:
+                    break
+        tail = stripper.close()
+        if tail:
+            yield tail
+
+    def scan(self):
+        # One streaming pass for the length (for progress) and a content
+        # hash (to find the checkpoint of an earlier, unfinished run)
+        if self.digest is None:
+            digest = hashlib.sha256()
+            chars = 0
+            for block in self.blocks():
+                chars += len(block)
+                digest.update(block.encode("utf-8"))
+            self.chars = chars
+            self.digest = digest.hexdigest()
+        return self.chars, self.digest
+
+    def preview(self, limit=PREVIEW_CHARS):
+        parts = []
+        size = 0
+        for block in self.blocks():
+            parts.append(block)
+            size += len(block)
+            if size >= limit:
+                break
+        text = "".join(parts)
+        preview = text.lstrip()
+        self.preview_lead = len(text) - len(preview)
+        return preview[:limit]